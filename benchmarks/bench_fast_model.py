@@ -0,0 +1,83 @@
+"""
+compare `Model` (casymda blocks) with `FastModel` (one process per instruction)
+
+each run happens in its own subprocess and logs in the "stream" mode, so the time spent on copying lab states does
+not hide the cost of the models themselves, the start/finish times of all instructions are compared between the
+two models
+
+usage: python benchmarks/bench_fast_model.py [--examples parallel tecan] [--repeat N]
+"""
+import argparse
+import contextlib
+import io
+import json
+import tempfile
+import time
+
+from common import EXAMPLES, CountingEnvironment, load_example, print_table, run_in_subprocess
+
+MODELS = ["Model", "FastModel"]
+
+
+def run_model(example: str, model_class: str) -> dict:
+    from casymda_hardware import model as model_module
+    from casymda_hardware.trace import read_trace
+
+    lab = load_example(example)
+    env = CountingEnvironment()
+    with tempfile.TemporaryDirectory() as wdir, contextlib.redirect_stdout(io.StringIO()):
+        ts = time.perf_counter()
+        model = getattr(model_module, model_class)(env, lab, wdir=wdir, model_name="bench", log_mode="stream")
+        env.run()
+        wall_time = time.perf_counter() - ts
+        # instruction identifiers are random, use their positions in the lab instead
+        position = {k: i for i, k in enumerate(lab.dict_instruction)}
+        timings = sorted(
+            (position[r["instruction"]], r["start"], r["finished"]) for r in read_trace(model.sink.trace_path)
+        )
+    return {
+        "example": example,
+        "model": model_class,
+        "n_instructions": len(lab.dict_instruction),
+        "makespan": model.sink.time_of_last_entry,
+        "wall_time": wall_time,
+        "n_events": env.n_events,
+        "n_processes": env.n_processes,
+        "timings": timings,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--examples", nargs="+", choices=list(EXAMPLES), default=["parallel", "tecan"])
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--run", nargs=2, metavar=("EXAMPLE", "MODEL"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run is not None:
+        print(json.dumps(run_model(*args.run)))
+        return
+
+    rows = []
+    for example in args.examples:
+        results = {m: [run_in_subprocess(__file__, "--run", example, m) for _ in range(args.repeat)] for m in MODELS}
+        reference = results["Model"][0]["timings"]
+        for m in MODELS:
+            r = results[m][0]
+            wall_time = min(rr["wall_time"] for rr in results[m])
+            rows.append({
+                "example": example,
+                "model": m,
+                "n_instructions": r["n_instructions"],
+                "makespan": r["makespan"],
+                "identical_timings": r["timings"] == reference,
+                "wall_time": round(wall_time, 4),
+                "speedup": round(min(rr["wall_time"] for rr in results["Model"]) / wall_time, 2),
+                "n_events": r["n_events"],
+                "n_processes": r["n_processes"],
+            })
+    print_table(rows)
+
+
+if __name__ == '__main__':
+    main()
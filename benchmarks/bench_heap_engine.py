@@ -0,0 +1,74 @@
+"""
+compare the makespan-only `HeapEngine` with the `simpy` models
+
+each run happens in its own subprocess, the `simpy` models log in the "stream" mode, the start/finish times of all
+instructions are compared with those of `Model`
+
+usage: python benchmarks/bench_heap_engine.py [--examples parallel tecan] [--repeat N]
+"""
+import argparse
+import json
+import time
+
+from bench_fast_model import run_model
+from common import EXAMPLES, load_example, print_table, run_in_subprocess
+
+ENGINES = ["Model", "FastModel", "HeapEngine"]
+
+
+def run_heap_engine(example: str) -> dict:
+    from casymda_hardware.heap_engine import HeapEngine
+
+    lab = load_example(example)
+    ts = time.perf_counter()
+    engine = HeapEngine(lab)
+    makespan = engine.run()
+    wall_time = time.perf_counter() - ts
+    position = {k: i for i, k in enumerate(lab.dict_instruction)}
+    timings = sorted((position[k], engine.start_time[k], engine.finish_time[k]) for k in lab.dict_instruction)
+    return {
+        "example": example,
+        "model": "HeapEngine",
+        "n_instructions": len(lab.dict_instruction),
+        "makespan": makespan,
+        "wall_time": wall_time,
+        "timings": timings,
+        "device_busy_time": engine.device_busy_time,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--examples", nargs="+", choices=list(EXAMPLES), default=["parallel", "tecan"])
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--run", nargs=2, metavar=("EXAMPLE", "ENGINE"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run is not None:
+        example, engine = args.run
+        result = run_heap_engine(example) if engine == "HeapEngine" else run_model(example, engine)
+        print(json.dumps(result))
+        return
+
+    rows = []
+    for example in args.examples:
+        results = {e: [run_in_subprocess(__file__, "--run", example, e) for _ in range(args.repeat)] for e in ENGINES}
+        reference = results["Model"][0]["timings"]
+        reference_wall_time = min(r["wall_time"] for r in results["Model"])
+        for e in ENGINES:
+            r = results[e][0]
+            wall_time = min(rr["wall_time"] for rr in results[e])
+            rows.append({
+                "example": example,
+                "engine": e,
+                "n_instructions": r["n_instructions"],
+                "makespan": r["makespan"],
+                "identical_timings": r["timings"] == reference,
+                "wall_time": round(wall_time, 4),
+                "speedup": round(reference_wall_time / wall_time, 2),
+            })
+    print_table(rows)
+
+
+if __name__ == '__main__':
+    main()
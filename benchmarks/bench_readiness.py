@@ -0,0 +1,67 @@
+"""
+compare how not-ready jobs wait for their predecessors on the Tecan 96-well example
+
+- "interrupt": all jobs enter the model at the start, not-ready jobs are parked in the `Buffer` on an infinite
+  timeout and woken up by interrupts
+- "event": jobs are created and enter the model only when their preceding jobs are completed
+
+each mode runs in its own subprocess, as `sim_tecan` sets up the module-level `TECAN_LAB`
+
+usage: python benchmarks/bench_readiness.py [--repeat N]
+"""
+import argparse
+import contextlib
+import io
+import json
+import resource
+import tempfile
+import time
+
+from common import CountingEnvironment, load_example, print_table, run_in_subprocess
+
+MODES = ["interrupt", "event"]
+
+
+def run_mode(mode: str) -> dict:
+    from casymda_hardware.model import Model
+
+    lab = load_example("tecan")
+    env = CountingEnvironment()
+    with tempfile.TemporaryDirectory() as wdir, contextlib.redirect_stdout(io.StringIO()):
+        ts = time.perf_counter()
+        model = Model(env, lab, wdir=wdir, model_name="bench", log_mode="stream",
+                      release_when_ready=mode == "event")
+        env.run()
+        wall_time = time.perf_counter() - ts
+    return {
+        "mode": mode,
+        "n_instructions": len(lab.dict_instruction),
+        "makespan": model.sink.time_of_last_entry,
+        "wall_time": wall_time,
+        "n_events": env.n_events,
+        "n_processes": env.n_processes,
+        "max_live_processes": env.max_live_processes,
+        "max_jobs": model.source.max_created_not_completed if mode == "event" else len(lab.dict_instruction),
+        "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--mode", choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode is not None:
+        print(json.dumps(run_mode(args.mode)))
+        return
+
+    results = []
+    for mode in MODES:
+        for _ in range(args.repeat):
+            results.append(run_in_subprocess(__file__, "--mode", mode))
+    print_table(results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""
+helpers shared by the benchmark scripts
+
+the examples use the module-level labs `JUNIOR_LAB` and `TECAN_LAB`, so only one example should be loaded per
+process, `run_in_subprocess` runs a benchmark script with the given arguments in a fresh interpreter
+"""
+import importlib
+import json
+import os
+import subprocess
+import sys
+
+import simpy
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO not in sys.path:
+    sys.path.insert(0, REPO)
+
+EXAMPLES = {
+    "parallel": os.path.join("sim_junior", "sulfonylation", "parallel.py"),
+    "grignard": os.path.join("sim_junior", "tips_pn", "grignard.py"),
+    "quinone": os.path.join("sim_junior", "tips_pn", "quinone.py"),
+    "tandem": os.path.join("sim_junior", "tips_pn", "tandem.py"),
+    "tecan": os.path.join("sim_tecan", "sim_tecan.py"),
+}
+
+
+def load_example(name: str):
+    """Import an example script and define its instructions, returns the lab of the example."""
+    folder, filename = os.path.split(os.path.join(REPO, EXAMPLES[name]))
+    sys.path.insert(0, folder)
+    module = importlib.import_module(filename[:-len(".py")])
+    if hasattr(module, "define_instructions"):
+        module.define_instructions()
+        return module.JUNIOR_LAB
+    return module.TECAN_LAB
+
+
+def run_in_subprocess(script: str, *args: str) -> dict:
+    """Run a benchmark script in a fresh interpreter, the script prints its result as json in the last line."""
+    out = subprocess.run(
+        [sys.executable, os.path.abspath(script), *args],
+        check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def print_table(results: list[dict]):
+    """Print a list of dicts as a tab separated table."""
+    keys = list(results[0].keys())
+    print("\t".join(keys))
+    for r in results:
+        print("\t".join(str(r[k]) for k in keys))
+
+
+class CountingEnvironment(simpy.Environment):
+    """A `simpy.Environment` that counts scheduled events and live processes."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.n_events = 0
+        self.n_processes = 0
+        self.n_live_processes = 0
+        self.max_live_processes = 0
+
+    def schedule(self, event, priority=1, delay=0):
+        self.n_events += 1
+        super().schedule(event, priority, delay)
+
+    def process(self, generator):
+        self.n_processes += 1
+        self.n_live_processes += 1
+        self.max_live_processes = max(self.max_live_processes, self.n_live_processes)
+        p = super().process(generator)
+        p.callbacks.append(self._on_process_exit)
+        return p
+
+    def _on_process_exit(self, event):
+        self.n_live_processes -= 1
@@ -0,0 +1,199 @@
+from __future__ import annotations
+
+import json
+import math
+import os
+import pickle
+from typing import Any, Iterable
+
+import numpy as np
+
+from .journal import SinkJournal
+from .trace import read_trace
+
+COLUMNAR_META_FILE = "columns.json"
+
+NUMERIC_COLUMNS = {
+    "state_index": np.int64,
+    "start": np.float64,
+    "finished": np.float64,
+    "last_entry": np.float64,
+    "wait": np.float64,
+}
+""" columns stored as plain arrays, unknown values of float columns are NaN """
+
+CATEGORICAL_COLUMNS = ["instruction", "device", "action_name", "description"]
+""" columns stored as int32 codes into a list of labels """
+
+
+def _encode(values: list[Any]) -> tuple[np.ndarray, list]:
+    labels = []
+    index = dict()
+    codes = np.empty(len(values), dtype=np.int32)
+    for i, v in enumerate(values):
+        try:
+            codes[i] = index[v]
+        except KeyError:
+            index[v] = codes[i] = len(labels)
+            labels.append(v)
+    return codes, labels
+
+
+def write_columnar_trace(path: str | os.PathLike, records: Iterable[dict[str, Any]], **tags: int | float | str):
+    """Write trace records as a columnar trace.
+
+    Parameters
+    ----------
+    path : str | os.PathLike
+        The directory of the columnar trace, created if it does not exist.
+    records : Iterable[dict[str, Any]]
+        The records, usually from `Sink.get_trace_record` or `records_from_log`, keys not in `NUMERIC_COLUMNS`
+        or `CATEGORICAL_COLUMNS` are ignored.
+    tags : int | float | str
+        Settings of the run, e.g. `concurrency=4`, each stored as a column with the same value in every row,
+        so traces of different runs can be concatenated.
+
+    Notes
+    -----
+    Each column is a `.npy` file that can be memory-mapped, categorical columns store `int32` codes and their
+    labels are kept in `columns.json`.
+
+    """
+    records = list(records)
+    os.makedirs(path, exist_ok=True)
+    meta = {"n_rows": len(records), "columns": dict()}
+
+    for name, dtype in NUMERIC_COLUMNS.items():
+        values = [r.get(name) for r in records]
+        if dtype is np.float64:
+            values = [math.nan if v is None else v for v in values]
+        np.save(os.path.join(path, f"{name}.npy"), np.asarray(values, dtype=dtype))
+        meta["columns"][name] = {"dtype": np.dtype(dtype).name}
+
+    for name in CATEGORICAL_COLUMNS:
+        codes, labels = _encode([r.get(name) for r in records])
+        np.save(os.path.join(path, f"{name}.npy"), codes)
+        meta["columns"][name] = {"dtype": "category", "labels": labels}
+
+    for name, value in tags.items():
+        if isinstance(value, str):
+            np.save(os.path.join(path, f"{name}.npy"), np.zeros(len(records), dtype=np.int32))
+            meta["columns"][name] = {"dtype": "category", "labels": [value, ]}
+        else:
+            array = np.full(len(records), value)
+            np.save(os.path.join(path, f"{name}.npy"), array)
+            meta["columns"][name] = {"dtype": array.dtype.name}
+
+    with open(os.path.join(path, COLUMNAR_META_FILE), "w") as f:
+        json.dump(meta, f, indent=2)
+
+
+def read_columnar_trace(
+        path: str | os.PathLike, mmap: bool = True
+) -> tuple[dict[str, np.ndarray], dict[str, list]]:
+    """Read a columnar trace.
+
+    Parameters
+    ----------
+    path : str | os.PathLike
+        The directory of the columnar trace.
+    mmap : bool, optional
+        Whether to memory-map the columns instead of reading them. Default is True.
+
+    Returns
+    -------
+    tuple[dict[str, np.ndarray], dict[str, list]]
+        The arrays of all columns, codes for the categorical columns, and the labels of the categorical columns.
+
+    """
+    with open(os.path.join(path, COLUMNAR_META_FILE)) as f:
+        meta = json.load(f)
+    columns = dict()
+    labels = dict()
+    for name, spec in meta["columns"].items():
+        columns[name] = np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r" if mmap else None)
+        if spec["dtype"] == "category":
+            labels[name] = spec["labels"]
+    return columns, labels
+
+
+def load_columnar_trace(path: str | os.PathLike):
+    """Load a columnar trace as a `pandas.DataFrame`, categorical columns become `pandas.Categorical`."""
+    import pandas as pd
+
+    columns, labels = read_columnar_trace(path, mmap=True)
+    data = dict()
+    for name, array in columns.items():
+        if name in labels:
+            data[name] = pd.Categorical.from_codes(np.asarray(array), categories=labels[name])
+        else:
+            data[name] = np.asarray(array)
+    return pd.DataFrame(data)
+
+
+def records_from_log(log: list[dict[str, Any]] | SinkJournal) -> list[dict[str, Any]]:
+    """Trace records of a log of the "full" or "journal" mode of `Sink`.
+
+    Parameters
+    ----------
+    log : list[dict[str, Any]] | SinkJournal
+        The log.
+
+    Returns
+    -------
+    list[dict[str, Any]]
+        One record per finished instruction, the processing start and the waiting time are not logged in these
+        modes and are left as `None`.
+
+    """
+    entries = log.entries if isinstance(log, SinkJournal) else log
+    records = []
+    for entry in entries:
+        instruction = entry["instruction"]
+        if instruction is None:
+            continue
+        records.append(
+            {
+                "state_index": entry["state_index"],
+                "start": None,
+                "finished": entry["finished"],
+                "last_entry": entry["last_entry"],
+                "wait": None,
+                "instruction": instruction.identifier,
+                "action_name": instruction.action_name,
+                "description": instruction.description,
+                "device": instruction.device.identifier,
+            }
+        )
+    return records
+
+
+def convert_log(
+        log_path: str | os.PathLike, columns_path: str | os.PathLike = None, **tags: int | float | str
+) -> str:
+    """Convert a `.pkl` log or a `.trace` file written by `Sink` to a columnar trace.
+
+    Parameters
+    ----------
+    log_path : str | os.PathLike
+        The path of the log.
+    columns_path : str | os.PathLike, optional
+        The directory of the columnar trace. Default is None, i.e. the log path with the extension `.columns`.
+    tags : int | float | str
+        Settings of the run, see `write_columnar_trace`.
+
+    Returns
+    -------
+    str
+        The directory of the columnar trace.
+
+    """
+    if columns_path is None:
+        columns_path = os.path.splitext(log_path)[0] + ".columns"
+    if str(log_path).endswith(".trace"):
+        records = read_trace(log_path)
+    else:
+        with open(log_path, "rb") as f:
+            records = records_from_log(pickle.load(f))
+    write_columnar_trace(columns_path, records, **tags)
+    return str(columns_path)
@@ -0,0 +1,180 @@
+from __future__ import annotations
+
+from copy import deepcopy
+from typing import Any
+
+from hardware_pydantic import Lab, LabProxy, PreActError, resolve_lab
+from .critical_path import run_on_copy, topological_order
+from .heap_engine import HeapEngine
+
+
+def touched_identifiers(lab: Lab | LabProxy) -> dict[str, set[str]]:
+    """The identifiers of the lab objects each instruction may read or change.
+
+    The instructions are replayed one at a time in `topological_order` as in `critical_path.projected_durations`,
+    so the lab states are changed and the lab should not be simulated afterward.
+
+    Parameters
+    ----------
+    lab : Lab | LabProxy
+        The lab object, it must be the lab the proxy of its platform currently stands for.
+
+    Returns
+    -------
+    dict[str, set[str]]
+        For each instruction, its device, the involved objects projected by the device, and all the containers
+        of the device and the involved objects before and after the action.
+
+    """
+    lab = resolve_lab(lab)
+    lab.notify_containment_change()
+    touched = dict()
+    for k in topological_order(lab):
+        instruction = lab.dict_instruction[k]
+        involved_objects, _ = lab.act_by_instruction(instruction, actor_type="proj")
+        identifiers = {instruction.device.identifier} | {o.identifier for o in involved_objects if o is not None}
+        containers = set()
+        for identifier in identifiers:
+            containers.update(lab.get_containers(identifier))
+        lab.act_by_instruction(instruction, actor_type="post")
+        for identifier in identifiers:
+            # objects removed from the lab, e.g. disposed, have no containers anymore
+            if identifier in lab.dict_object:
+                containers.update(lab.get_containers(identifier))
+        touched[k] = identifiers | containers
+    return touched
+
+
+def _reduce(order: list[str], required: dict[str, int]) -> dict[str, list[str]]:
+    """Transitive reduction of the DAG whose `required` bitset of each instruction holds its predecessors."""
+    ancestors = dict()
+    preceding = dict()
+    for i, k in enumerate(order):
+        implied = 0
+        reachable = 0
+        bits = required[k]
+        while bits:
+            low = bits & -bits
+            p = order[low.bit_length() - 1]
+            implied |= ancestors[p]
+            reachable |= ancestors[p] | low
+            bits ^= low
+        direct = required[k] & ~implied
+        preceding[k] = [order[j] for j in range(i) if direct >> j & 1]
+        ancestors[k] = reachable
+    return preceding
+
+
+def _ancestors(lab: Lab, order: list[str]) -> dict[str, int]:
+    index = {k: i for i, k in enumerate(order)}
+    ancestors = dict()
+    for k in order:
+        bits = 0
+        for p in lab.dict_instruction[k].preceding_instructions:
+            bits |= ancestors[p] | 1 << index[p]
+        ancestors[k] = bits
+    return ancestors
+
+
+def transitive_reduction(lab: Lab | LabProxy) -> dict[str, list[str]]:
+    """The preceding instructions of each instruction without the ones implied by other preceding instructions.
+
+    The order of the instructions is unchanged.
+    """
+    lab = resolve_lab(lab)
+    order = topological_order(lab)
+    index = {k: i for i, k in enumerate(order)}
+    required = {
+        k: sum({1 << index[p] for p in lab.dict_instruction[k].preceding_instructions}) for k in order
+    }
+    return _reduce(order, required)
+
+
+def compact_dependencies(lab: Lab | LabProxy, touched: dict[str, set[str]]) -> dict[str, list[str]]:
+    """The preceding instructions each instruction really depends on.
+
+    An instruction only has to follow the instructions it follows in the instruction DAG, directly or not,
+    that touch some of the lab objects it touches, see `touched_identifiers`. Ordering constraints between
+    instructions touching disjoint objects are dropped, no new ones are added, and the result is transitively
+    reduced.
+
+    Parameters
+    ----------
+    lab : Lab | LabProxy
+        The lab object.
+    touched : dict[str, set[str]]
+        The identifiers touched by each instruction.
+
+    Returns
+    -------
+    dict[str, list[str]]
+        The preceding instructions of each instruction.
+
+    """
+    lab = resolve_lab(lab)
+    order = topological_order(lab)
+    touching = dict()
+    for i, k in enumerate(order):
+        for identifier in touched[k]:
+            touching[identifier] = touching.get(identifier, 0) | 1 << i
+    ancestors = _ancestors(lab, order)
+    required = dict()
+    for k in order:
+        conflicting = 0
+        for identifier in touched[k]:
+            conflicting |= touching[identifier]
+        required[k] = ancestors[k] & conflicting
+    return _reduce(order, required)
+
+
+def apply_dependencies(lab: Lab | LabProxy, preceding: dict[str, list[str]]):
+    """Replace the preceding instructions of the instructions of a lab."""
+    lab = resolve_lab(lab)
+    for k, v in preceding.items():
+        lab.dict_instruction[k].preceding_instructions = list(v)
+
+
+def count_edges(preceding: dict[str, list[str]]) -> int:
+    return sum(len(v) for v in preceding.values())
+
+
+def compaction_report(lab: Lab | LabProxy, *proxies: LabProxy) -> dict[str, Any]:
+    """Compact the instruction DAG of a lab that has not been simulated, and predict the makespan improvement.
+
+    Parameters
+    ----------
+    lab : Lab | LabProxy
+        The lab object, it is left unchanged.
+    proxies : LabProxy
+        The proxies the device actions of the lab use, e.g. `JUNIOR_LAB`, copies of the lab are analyzed and
+        simulated in contexts of these proxies.
+
+    Returns
+    -------
+    dict[str, Any]
+        The numbers of edges before compaction, after transitive reduction and after compaction, the makespans
+        simulated with `HeapEngine` before and after compaction, and the compacted preceding instructions
+        under "preceding". If the compacted instructions fail the checks of the pre actors, "makespan_after" is
+        None and the error is under "error".
+
+    """
+    lab = resolve_lab(lab)
+    original = {k: list(v.preceding_instructions) for k, v in lab.dict_instruction.items()}
+    preceding = compact_dependencies(lab, run_on_copy(touched_identifiers, lab, *proxies))
+    report = {
+        "n_instructions": len(lab.dict_instruction),
+        "n_edges": count_edges(original),
+        "n_edges_reduced": count_edges(transitive_reduction(lab)),
+        "n_edges_compacted": count_edges(preceding),
+        "makespan_before": run_on_copy(lambda c: HeapEngine(c).run(), lab, *proxies),
+        "makespan_after": None,
+        "preceding": preceding,
+    }
+
+    compacted = deepcopy(lab)
+    apply_dependencies(compacted, preceding)
+    try:
+        report["makespan_after"] = run_on_copy(lambda c: HeapEngine(c).run(), compacted, *proxies)
+    except (PreActError, RuntimeError) as e:
+        report["error"] = repr(e)
+    return report
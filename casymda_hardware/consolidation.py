@@ -0,0 +1,223 @@
+from __future__ import annotations
+
+from copy import deepcopy
+from typing import Any, Literal, get_args
+
+from hardware_pydantic import Lab, LabProxy, PreActError, resolve_lab
+from hardware_pydantic.travel import TravelTimeModel, use_travel_model
+from .compaction import _ancestors
+from .critical_path import projected_durations, run_on_copy, topological_order
+from .heap_engine import HeapEngine
+
+REDUNDANCY_KIND = Literal["idle move", "consecutive move", "round trip"]
+""" why an instruction can be removed, see `redundant_instructions` """
+
+MOVE_ACTION = "move_to"
+PUT_DOWN_ACTION = "put_down"
+PICK_UP_ACTION = "pick_up"
+
+
+def _successors(lab: Lab) -> dict[str, list[str]]:
+    successors = {k: [] for k in lab.dict_instruction}
+    for k, v in lab.dict_instruction.items():
+        for p in v.preceding_instructions:
+            successors[p].append(k)
+    return successors
+
+
+def _next_in_chain(lab: Lab, successors: dict[str, list[str]], k: str) -> str | None:
+    """ the only successor of an instruction if it has no other preceding instruction """
+    if len(successors[k]) != 1:
+        return None
+    s = successors[k][0]
+    if lab.dict_instruction[s].preceding_instructions != [k]:
+        return None
+    return s
+
+
+def _devices_with_known_position(lab: Lab, order: list[str]) -> set[str]:
+    """ the devices whose moves are totally ordered by the instruction DAG, so their positions are known """
+    index = {k: i for i, k in enumerate(order)}
+    ancestors = _ancestors(lab, order)
+    moves = dict()
+    for k in order:
+        instruction = lab.dict_instruction[k]
+        if instruction.action_name == MOVE_ACTION:
+            moves.setdefault(instruction.device.identifier, []).append(k)
+    return {
+        device for device, ks in moves.items()
+        if all(ancestors[ks[i + 1]] >> index[ks[i]] & 1 for i in range(len(ks) - 1))
+    }
+
+
+def redundant_instructions(lab: Lab | LabProxy) -> dict[str, REDUNDANCY_KIND]:
+    """Find arm moves and pick-ups that can be removed without changing what the instructions do.
+
+    - "idle move": a move to where the arm already is, with the same anchor arm if any. Only the moves of devices
+      whose moves are totally ordered by the instruction DAG are considered, otherwise where the arm is depends on
+      the run.
+    - "consecutive move": a move directly followed by another move of the same device, nothing can happen at the
+      intermediate position. Each of the two moves must be the only neighbour of the other in the instruction DAG.
+    - "round trip": putting down a lab object and picking it up again with the same device, with only idle moves in
+      between, e.g. the VPG between two rack transfers. Both are removed along with the idle moves.
+
+    The instructions are replayed one at a time in `topological_order` as in `critical_path.projected_durations`,
+    so the lab states are changed and the lab should not be simulated afterward.
+
+    Parameters
+    ----------
+    lab : Lab | LabProxy
+        The lab object, it must be the lab the proxy of its platform currently stands for.
+
+    Returns
+    -------
+    dict[str, REDUNDANCY_KIND]
+        The identifiers of the redundant instructions and why they are redundant.
+
+    """
+    lab = resolve_lab(lab)
+    lab.notify_containment_change()
+    order = topological_order(lab)
+    successors = _successors(lab)
+    known_position = _devices_with_known_position(lab, order)
+
+    redundant = dict()
+    put_down = dict()
+    for k in order:
+        instruction = lab.dict_instruction[k]
+        device = lab.dict_object[instruction.device.identifier]
+        if instruction.action_name == MOVE_ACTION:
+            anchor_arm = instruction.action_parameters.get("anchor_arm")
+            follows_removed_move = any(
+                redundant.get(p) == "consecutive move" for p in instruction.preceding_instructions
+            )
+            if (
+                    device.identifier in known_position and not follows_removed_move
+                    and device.position_on_top_of == instruction.action_parameters["move_to_slot"].identifier
+                    and (anchor_arm is None or device.anchor_arm == anchor_arm.identifier)
+            ):
+                redundant[k] = "idle move"
+            else:
+                s = _next_in_chain(lab, successors, k)
+                if s is not None:
+                    following = lab.dict_instruction[s]
+                    if following.action_name == MOVE_ACTION and following.device.identifier == device.identifier:
+                        redundant[k] = "consecutive move"
+        elif instruction.action_name == PUT_DOWN_ACTION:
+            before = set(lab.get_containees(device.identifier))
+            lab.act_by_instruction(instruction, actor_type="post")
+            put_down[k] = before - set(lab.get_containees(device.identifier))
+            continue
+        elif instruction.action_name == PICK_UP_ACTION:
+            thing = instruction.action_parameters.get("thing")
+            # walk back the chain to the put-down of the same device, over idle moves only
+            p = instruction.preceding_instructions[0] if len(instruction.preceding_instructions) == 1 else None
+            while p is not None and redundant.get(p) == "idle move" and _next_in_chain(lab, successors, p) is not None:
+                preceding = lab.dict_instruction[p].preceding_instructions
+                p = preceding[0] if len(preceding) == 1 else None
+            if (
+                    p in put_down
+                    and thing is not None and thing.identifier in put_down[p]
+                    and lab.dict_instruction[p].device.identifier == device.identifier
+                    and _next_in_chain(lab, successors, p) is not None
+            ):
+                redundant[p] = "round trip"
+                redundant[k] = "round trip"
+        lab.act_by_instruction(instruction, actor_type="post")
+    return redundant
+
+
+def remove_instructions(lab: Lab | LabProxy, identifiers: set[str] | dict[str, Any]):
+    """Remove instructions from a lab, their successors follow their preceding instructions instead."""
+    lab = resolve_lab(lab)
+    for k in topological_order(lab):
+        instruction = lab.dict_instruction[k]
+        preceding = []
+        for p in instruction.preceding_instructions:
+            if p in identifiers:
+                # preceding instructions of removed ones are already rewired
+                preceding += lab.dict_instruction[p].preceding_instructions
+            else:
+                preceding.append(p)
+        instruction.preceding_instructions = list(dict.fromkeys(preceding))
+    for k in identifiers:
+        lab.remove_instruction(k)
+
+
+def consolidate_moves(lab: Lab | LabProxy, *proxies: LabProxy, max_rounds: int = 100) -> dict[str, REDUNDANCY_KIND]:
+    """Remove the redundant instructions of a lab that has not been simulated, until there are none left.
+
+    Removing a round trip can make the moves around it consecutive, so `redundant_instructions` is found again on
+    a copy of the lab after each removal, in contexts of the given proxies, see `critical_path.run_on_copy`.
+
+    Returns
+    -------
+    dict[str, REDUNDANCY_KIND]
+        The identifiers of the removed instructions and why they were removed.
+
+    """
+    lab = resolve_lab(lab)
+    removed = dict()
+    for _ in range(max_rounds):
+        redundant = run_on_copy(redundant_instructions, lab, *proxies)
+        if not redundant:
+            break
+        remove_instructions(lab, redundant)
+        removed.update(redundant)
+    return removed
+
+
+def travel_time(lab: Lab | LabProxy, *proxies: LabProxy) -> float:
+    """The total projected duration of the moves of a lab, computed on a copy."""
+    lab = resolve_lab(lab)
+    durations = run_on_copy(projected_durations, lab, *proxies)
+    return sum(d for k, d in durations.items() if lab.dict_instruction[k].action_name == MOVE_ACTION)
+
+
+def consolidation_report(
+        lab: Lab | LabProxy, *proxies: LabProxy, travel_model: TravelTimeModel | None = None
+) -> dict[str, Any]:
+    """Consolidate the moves of a lab that has not been simulated, and predict the time saved.
+
+    Parameters
+    ----------
+    lab : Lab | LabProxy
+        The lab object, it is left unchanged.
+    proxies : LabProxy
+        The proxies the device actions of the lab use, e.g. `JUNIOR_LAB`.
+    travel_model : TravelTimeModel, optional
+        The travel model timing the moves, e.g. `TravelTimeModel(lab)`. Default is None, i.e. the flat time cost
+        of the move actions.
+
+    Returns
+    -------
+    dict[str, Any]
+        The numbers of instructions before and after consolidation and of removed instructions of each kind, the
+        total travel times and the makespans simulated with `HeapEngine` before and after consolidation, the time
+        saved, and the removed instructions under "removed". If the consolidated instructions fail the checks of
+        the pre actors, "makespan_after" and "time_saved" are None and the error is under "error".
+
+    """
+    lab = resolve_lab(lab)
+    with use_travel_model(travel_model):
+        consolidated = deepcopy(lab)
+        removed = consolidate_moves(consolidated, *proxies)
+        report = {
+            "n_instructions": len(lab.dict_instruction),
+            "n_instructions_after": len(consolidated.dict_instruction),
+            "travel_time_before": travel_time(lab, *proxies),
+            "travel_time_after": None,
+            "makespan_before": run_on_copy(lambda c: HeapEngine(c).run(), lab, *proxies),
+            "makespan_after": None,
+            "time_saved": None,
+            "removed": removed,
+        }
+        for kind in get_args(REDUNDANCY_KIND):
+            report[f"n_{kind.replace(' ', '_')}"] = sum(v == kind for v in removed.values())
+        try:
+            report["travel_time_after"] = travel_time(consolidated, *proxies)
+            report["makespan_after"] = run_on_copy(lambda c: HeapEngine(c).run(), consolidated, *proxies)
+            report["time_saved"] = report["makespan_before"] - report["makespan_after"]
+        except (PreActError, RuntimeError) as e:
+            report["error"] = repr(e)
+    return report
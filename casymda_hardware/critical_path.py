@@ -0,0 +1,262 @@
+from __future__ import annotations
+
+from collections import deque
+from contextlib import ExitStack
+from copy import deepcopy
+from typing import Any, Callable, Iterable, Literal, TypeVar
+
+from hardware_pydantic import Lab, LabProxy, resolve_lab
+
+BINDING_KIND = Literal["start", "precedence", "device", "object"]
+""" why an instruction on a trace critical path could not start earlier """
+
+T = TypeVar("T")
+
+
+def run_on_copy(f: Callable[[Lab], T], lab: Lab | LabProxy, *proxies: LabProxy) -> T:
+    """Call `f` with a deep copy of a lab, in contexts of the given proxies standing for the copy.
+
+    The device actions use the proxies of their platforms, e.g. `JUNIOR_LAB`, so a copy can only be replayed or
+    simulated while these proxies stand for it, the lab itself is left unchanged.
+    """
+    lab_copy = deepcopy(resolve_lab(lab))
+    with ExitStack() as stack:
+        for proxy in proxies:
+            stack.enter_context(proxy.context(lab_copy))
+        return f(lab_copy)
+
+
+def topological_order(lab: Lab | LabProxy) -> list[str]:
+    """The identifiers of the instructions of a lab, each after all of its preceding instructions.
+
+    Raises
+    ------
+    ValueError
+        If the preceding instructions form a cycle.
+
+    """
+    lab = resolve_lab(lab)
+    n_pending = {k: len(v.preceding_instructions) for k, v in lab.dict_instruction.items()}
+    successors = dict()
+    for k, v in lab.dict_instruction.items():
+        for p in v.preceding_instructions:
+            successors.setdefault(p, []).append(k)
+    queue = deque(k for k, n in n_pending.items() if n == 0)
+    order = []
+    while queue:
+        k = queue.popleft()
+        order.append(k)
+        for s in successors.get(k, []):
+            n_pending[s] -= 1
+            if n_pending[s] == 0:
+                queue.append(s)
+    if len(order) != len(n_pending):
+        raise ValueError("the preceding instructions form a cycle")
+    return order
+
+
+def projected_durations(lab: Lab | LabProxy) -> dict[str, float]:
+    """Durations of the instructions projected by the proj actors of their devices.
+
+    The instructions are replayed one at a time in `topological_order`, the post actor of each instruction runs
+    after its projection, so the lab states are changed as in a simulation and the lab should not be simulated
+    afterward.
+
+    Parameters
+    ----------
+    lab : Lab | LabProxy
+        The lab object.
+
+    Returns
+    -------
+    dict[str, float]
+        The projected duration of each instruction.
+
+    """
+    lab = resolve_lab(lab)
+    lab.notify_containment_change()
+    durations = dict()
+    for k in topological_order(lab):
+        instruction = lab.dict_instruction[k]
+        _, durations[k] = lab.act_by_instruction(instruction, actor_type="proj")
+        lab.act_by_instruction(instruction, actor_type="post")
+    return durations
+
+
+def times_from_records(records: Iterable[dict[str, Any]]) -> tuple[dict[str, float], dict[str, float]]:
+    """The start and finish times of the instructions in trace records of `Sink`, see `columnar.records_from_log`.
+
+    Raises
+    ------
+    ValueError
+        If the records do not have start times, e.g. those of the "full" or "journal" log mode.
+
+    """
+    start_time = dict()
+    finish_time = dict()
+    for r in records:
+        if r["instruction"] is None:
+            continue
+        if r["start"] is None:
+            raise ValueError(f"no start time of instruction: {r['instruction']}")
+        start_time[r["instruction"]] = r["start"]
+        finish_time[r["instruction"]] = r["finished"]
+    return start_time, finish_time
+
+
+class CriticalPathAnalysis:
+    def __init__(self, lab: Lab | LabProxy, durations: dict[str, float], tolerance: float = 1e-6):
+        """Earliest and latest start times, slack and critical path of the instruction DAG of a lab.
+
+        Parameters
+        ----------
+        lab : Lab | LabProxy
+            The lab object, only its instructions and their preceding instructions are used.
+        durations : dict[str, float]
+            The duration of each instruction, e.g. from `projected_durations` or from a simulation.
+        tolerance : float, optional
+            Instructions whose slack is within the tolerance are critical. Default is 1e-6.
+
+        Notes
+        -----
+        Only precedence is considered, the devices and lab objects shared by instructions are assumed to be
+        always available, so `makespan` is a lower bound of the makespan of a simulation with these durations.
+        `trace_critical_path` takes the waits for devices and lab objects into account.
+
+        """
+        self.lab = resolve_lab(lab)
+        self.durations = durations
+        self.tolerance = tolerance
+        self.order = topological_order(self.lab)
+
+        self.earliest_start: dict[str, float] = dict()
+        self.earliest_finish: dict[str, float] = dict()
+        for k in self.order:
+            preceding = self.lab.dict_instruction[k].preceding_instructions
+            self.earliest_start[k] = max((self.earliest_finish[p] for p in preceding), default=0.0)
+            self.earliest_finish[k] = self.earliest_start[k] + durations[k]
+        self.makespan = max(self.earliest_finish.values(), default=0.0)
+
+        self.successors: dict[str, list[str]] = {k: [] for k in self.order}
+        for k in self.order:
+            for p in self.lab.dict_instruction[k].preceding_instructions:
+                self.successors[p].append(k)
+        self.latest_start: dict[str, float] = dict()
+        self.latest_finish: dict[str, float] = dict()
+        for k in reversed(self.order):
+            self.latest_finish[k] = min((self.latest_start[s] for s in self.successors[k]), default=self.makespan)
+            self.latest_start[k] = self.latest_finish[k] - durations[k]
+
+    @property
+    def slack(self) -> dict[str, float]:
+        """How long each instruction can be delayed without delaying the makespan."""
+        return {k: self.latest_start[k] - self.earliest_start[k] for k in self.order}
+
+    def is_critical(self, instruction_identifier: str) -> bool:
+        return self.latest_start[instruction_identifier] - self.earliest_start[instruction_identifier] <= self.tolerance
+
+    @property
+    def critical_path(self) -> list[str]:
+        """A chain of critical instructions from a first instruction to one finishing at the makespan."""
+        current = None
+        for k in self.order:
+            if not self.lab.dict_instruction[k].preceding_instructions and self.is_critical(k):
+                current = k
+                break
+        path = []
+        while current is not None:
+            path.append(current)
+            current = next(
+                (
+                    s for s in self.successors[current]
+                    if self.is_critical(s)
+                    and abs(self.earliest_start[s] - self.earliest_finish[current]) <= self.tolerance
+                ),
+                None,
+            )
+        return path
+
+
+def trace_critical_path(
+        lab: Lab | LabProxy,
+        start_time: dict[str, float],
+        finish_time: dict[str, float],
+        tolerance: float = 1e-6,
+) -> list[tuple[str, BINDING_KIND]]:
+    """The chain of instructions that bound the makespan of a simulation.
+
+    Starting from the instruction that finished last, each step goes back to the instruction that finished right
+    when the current one started: a preceding instruction, else an instruction of the same device, else any
+    instruction, which held a lab object the current one needed.
+
+    Parameters
+    ----------
+    lab : Lab | LabProxy
+        The lab object.
+    start_time : dict[str, float]
+        The start time of the processing of each instruction, e.g. `HeapEngine.start_time` or from
+        `times_from_records`.
+    finish_time : dict[str, float]
+        The finish time of each instruction.
+    tolerance : float, optional
+        Times within the tolerance are equal. Default is 1e-6.
+
+    Returns
+    -------
+    list[tuple[str, BINDING_KIND]]
+        The instructions in the order they ran, each with what it waited for before starting, "start" for the
+        first one.
+
+    """
+    lab = resolve_lab(lab)
+    if len(finish_time) == 0:
+        return []
+    by_device = dict()
+    for k in finish_time:
+        by_device.setdefault(lab.dict_instruction[k].device.identifier, []).append(k)
+
+    def finished_at(candidates: Iterable[str], t: float) -> str | None:
+        candidates = [c for c in candidates if c in finish_time and abs(finish_time[c] - t) <= tolerance]
+        return max(candidates, key=lambda c: start_time[c], default=None)
+
+    current = max(finish_time, key=finish_time.get)
+    path = []
+    visited = set()
+    while current is not None and current not in visited:
+        visited.add(current)
+        t = start_time[current]
+        instruction = lab.dict_instruction[current]
+        for kind, candidates in (
+                ("precedence", instruction.preceding_instructions),
+                ("device", by_device[instruction.device.identifier]),
+                ("object", finish_time.keys()),
+        ):
+            previous = finished_at((c for c in candidates if c != current), t)
+            if previous is not None:
+                break
+        else:
+            kind = "start"
+        path.append((current, kind))
+        current = previous
+    return path[::-1]
+
+
+def summarize_path(
+        lab: Lab | LabProxy, path: Iterable[str], durations: dict[str, float]
+) -> list[dict[str, Any]]:
+    """Total duration of the instructions on a path by device and task, the longest first.
+
+    The task of an instruction is its description up to the first ":", e.g. "move to slot".
+    """
+    lab = resolve_lab(lab)
+    totals = dict()
+    for k in path:
+        instruction = lab.dict_instruction[k]
+        key = (instruction.device.identifier, instruction.description.split(":")[0])
+        n, total = totals.get(key, (0, 0.0))
+        totals[key] = (n + 1, total + durations[k])
+    rows = [
+        {"device": device, "task": task, "n_instructions": n, "duration": total}
+        for (device, task), (n, total) in totals.items()
+    ]
+    return sorted(rows, key=lambda r: r["duration"], reverse=True)
@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+from typing import Type
+
+from hardware_pydantic import Lab, LabProxy
+from .critical_path import CriticalPathAnalysis, projected_durations, run_on_copy
+
+
+class DispatchPolicy:
+    name = "fcfs"
+
+    def __init__(self, lab: Lab | LabProxy = None, durations: dict[str, float] = None):
+        """First come first serve, the base class of the policies deciding which waiting instruction gets a busy
+        device next.
+
+        Parameters
+        ----------
+        lab : Lab | LabProxy, optional
+            The lab object. Default is None.
+        durations : dict[str, float], optional
+            The estimated duration of each instruction, e.g. from `critical_path.projected_durations`.
+            Default is None.
+
+        Notes
+        -----
+        The waiting instructions are granted the device in the order of their priorities, lower first, and of
+        their requests for equal priorities, as in `simpy.PriorityResource`. All instructions have the same
+        priority with this policy, so the device is granted in the order of requests.
+
+        """
+        self.lab = lab
+        self.durations = durations
+
+    def priority(self, instruction_identifier: str) -> float:
+        """The priority of an instruction waiting for its device, lower goes first."""
+        return 0.0
+
+    @classmethod
+    def from_lab(cls, lab: Lab | LabProxy, *proxies: LabProxy) -> DispatchPolicy:
+        """Create the policy for a lab that has not been simulated, the durations are projected on a copy.
+
+        Parameters
+        ----------
+        lab : Lab | LabProxy
+            The lab object.
+        proxies : LabProxy
+            The proxies the device actions of the lab use, see `critical_path.run_on_copy`.
+
+        """
+        return cls(lab, run_on_copy(projected_durations, lab, *proxies))
+
+
+class ShortestProcessingTime(DispatchPolicy):
+    """The instruction with the shortest estimated duration goes first."""
+    name = "spt"
+
+    def priority(self, instruction_identifier: str) -> float:
+        return self.durations[instruction_identifier]
+
+
+class CriticalPathFirst(DispatchPolicy):
+    """The instruction with the longest chain of succeeding instructions goes first, i.e. the earliest latest
+    start time in the instruction DAG."""
+    name = "cpf"
+
+    def __init__(self, lab: Lab | LabProxy = None, durations: dict[str, float] = None):
+        super().__init__(lab, durations)
+        self.analysis = CriticalPathAnalysis(lab, durations)
+
+    def priority(self, instruction_identifier: str) -> float:
+        return self.analysis.latest_start[instruction_identifier]
+
+
+class EarliestDueDate(DispatchPolicy):
+    """The instruction due first goes first, by default an instruction is due at its latest finish time in the
+    instruction DAG."""
+    name = "edd"
+
+    def __init__(
+            self, lab: Lab | LabProxy = None, durations: dict[str, float] = None, due: dict[str, float] = None
+    ):
+        super().__init__(lab, durations)
+        if due is None:
+            due = CriticalPathAnalysis(lab, durations).latest_finish
+        self.due = due
+
+    def priority(self, instruction_identifier: str) -> float:
+        return self.due[instruction_identifier]
+
+
+DISPATCH_POLICIES: dict[str, Type[DispatchPolicy]] = {
+    p.name: p for p in [DispatchPolicy, ShortestProcessingTime, CriticalPathFirst, EarliestDueDate]
+}
@@ -0,0 +1,218 @@
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client, Connection, Listener
+from typing import Any, Iterator
+
+LIVE_ADDRESS = ("localhost", 6000)
+""" the default local address the events of a run are published at """
+
+LIVE_AUTHKEY = b"casymda-hardware"
+""" the default key authenticating the subscribers of a `SocketPublisher` """
+
+
+class EventPublisher:
+    def publish(self, event: dict[str, Any]):
+        """Publish the event of a finished instruction, i.e. its trace record, see `Sink.get_trace_record`."""
+        raise NotImplementedError
+
+    def close(self):
+        """Tell the subscribers that no more events will be published."""
+        pass
+
+
+class QueuePublisher(EventPublisher):
+    def __init__(self, event_queue: queue.Queue = None):
+        """Publish the events to a queue of the same process, e.g. consumed by a thread of a visualizer.
+
+        Parameters
+        ----------
+        event_queue : queue.Queue, optional
+            The queue the events are put in, `None` is put in once the publisher is closed. Default is None,
+            i.e. a new unbounded queue.
+
+        """
+        self.queue = queue.Queue() if event_queue is None else event_queue
+
+    def publish(self, event: dict[str, Any]):
+        self.queue.put(event)
+
+    def close(self):
+        self.queue.put(None)
+
+    def __iter__(self) -> Iterator[dict[str, Any]]:
+        """Consume the events until the publisher is closed."""
+        while (event := self.queue.get()) is not None:
+            yield event
+
+
+class _Subscriber:
+    def __init__(self, connection: Connection, max_pending: int):
+        """A connection to a subscriber, events are sent from a thread so a slow subscriber never blocks the run."""
+        self.connection = connection
+        self.pending = queue.Queue(maxsize=max_pending)
+        self.alive = True
+        self.sending = threading.Thread(target=self._send_pending, daemon=True)
+        self.sending.start()
+
+    def _send_pending(self):
+        while True:
+            event = self.pending.get()
+            try:
+                self.connection.send(event)
+            except (OSError, ValueError):
+                # the subscriber is gone, or dropped and its connection closed
+                self.alive = False
+                return
+            if event is None:
+                return
+
+    def offer(self, event: dict[str, Any] | None) -> bool:
+        """Queue an event without blocking, False if the subscriber is gone or too far behind."""
+        if not self.alive:
+            return False
+        try:
+            self.pending.put_nowait(event)
+        except queue.Full:
+            return False
+        return True
+
+    def close(self):
+        self.alive = False
+        self.connection.close()
+
+
+class SocketPublisher(EventPublisher):
+    def __init__(
+            self, address: tuple[str, int] = LIVE_ADDRESS, authkey: bytes = LIVE_AUTHKEY, max_pending: int = 10000
+    ):
+        """Publish the events on a local socket, to the visualizers of other processes, see `subscribe`.
+
+        Parameters
+        ----------
+        address : tuple[str, int], optional
+            The address to listen at. Default is `LIVE_ADDRESS`, only reachable from the same host.
+        authkey : bytes, optional
+            The key subscribers must know. Default is `LIVE_AUTHKEY`.
+        max_pending : int, optional
+            The number of events waiting to be sent to a subscriber, beyond which the subscriber is dropped.
+            Default is 10000.
+
+        Notes
+        -----
+        Subscribers can connect at any time and receive the events published after they connected. The events
+        are sent by one thread per subscriber, so publishing never waits for a subscriber that stopped reading,
+        e.g. a paused dashboard, such a subscriber is dropped once `max_pending` events are waiting. The events
+        are pickled, so only trusted subscribers on the same host should be given the key.
+
+        """
+        assert max_pending > 0
+        self.max_pending = max_pending
+        self.authkey = authkey
+        self.listener = Listener(address, authkey=authkey)
+        self.subscribers: list[_Subscriber] = []
+        self._closed = False
+        self._lock = threading.Lock()
+        self._accepting = threading.Thread(target=self._accept, daemon=True)
+        self._accepting.start()
+
+    def _accept(self):
+        while True:
+            try:
+                connection = self.listener.accept()
+            except (AuthenticationError, EOFError):
+                # a client with a wrong key or gone during the handshake
+                continue
+            except OSError:
+                # the listener is closed
+                return
+            if self._closed:
+                connection.close()
+                return
+            with self._lock:
+                self.subscribers.append(_Subscriber(connection, self.max_pending))
+
+    def _send(self, event: dict[str, Any] | None):
+        with self._lock:
+            subscribers = list(self.subscribers)
+        dropped = [subscriber for subscriber in subscribers if not subscriber.offer(event)]
+        if dropped:
+            with self._lock:
+                self.subscribers = [s for s in self.subscribers if s not in dropped]
+            for subscriber in dropped:
+                subscriber.close()
+
+    def publish(self, event: dict[str, Any]):
+        self._send(event)
+
+    def close(self, timeout: float = 5.0):
+        """Send the pending events and tell the subscribers the run is over, waiting at most `timeout` seconds."""
+        # a thread waiting in `accept` keeps the address in use, wake it up before closing the listener
+        self._closed = True
+        try:
+            Client(self.listener.address, authkey=self.authkey).close()
+        except OSError:
+            pass
+        self._accepting.join(timeout)
+        self.listener.close()
+        self._send(None)
+        deadline = time.monotonic() + timeout
+        with self._lock:
+            subscribers, self.subscribers = self.subscribers, []
+        for subscriber in subscribers:
+            subscriber.sending.join(max(deadline - time.monotonic(), 0.0))
+            subscriber.close()
+
+
+def subscribe(
+        address: tuple[str, int] = LIVE_ADDRESS,
+        authkey: bytes = LIVE_AUTHKEY,
+        retry_interval: float = 1.0,
+        timeout: float | None = None,
+) -> Iterator[dict[str, Any]]:
+    """Receive the events of a `SocketPublisher`, waiting for it to be started if needed.
+
+    Parameters
+    ----------
+    address : tuple[str, int], optional
+        The address the publisher listens at. Default is `LIVE_ADDRESS`.
+    authkey : bytes, optional
+        The key of the publisher. Default is `LIVE_AUTHKEY`.
+    retry_interval : float, optional
+        The time between attempts to connect, in seconds. Default is 1.0.
+    timeout : float, optional
+        The time to wait for the publisher and then for its first event, in seconds, after which no events are
+        yielded. Default is None, i.e. wait forever.
+
+    Yields
+    ------
+    dict[str, Any]
+        The events in the order they were published, until the publisher is closed.
+
+    """
+    deadline = None if timeout is None else time.monotonic() + timeout
+    while True:
+        try:
+            connection = Client(address, authkey=authkey)
+            break
+        except ConnectionRefusedError:
+            if deadline is None:
+                time.sleep(retry_interval)
+            elif time.monotonic() < deadline:
+                time.sleep(min(retry_interval, max(deadline - time.monotonic(), 0.0)))
+            else:
+                return
+    with connection:
+        if deadline is not None and not connection.poll(max(deadline - time.monotonic(), 0.0)):
+            return
+        while True:
+            try:
+                event = connection.recv()
+            except EOFError:
+                return
+            if event is None:
+                return
+            yield event
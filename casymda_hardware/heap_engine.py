@@ -0,0 +1,259 @@
+from __future__ import annotations
+
+import heapq
+from typing import Callable
+
+from hardware_pydantic import Lab, LabProxy, Device, LabObject, Instruction, resolve_lab
+from .dispatch import DispatchPolicy
+
+URGENT = 0
+NORMAL = 1
+""" event priorities, same as `simpy.events.URGENT` and `simpy.events.NORMAL` """
+
+
+class HeapResource:
+    def __init__(self, engine: HeapEngine):
+        """A capacity-1 resource of `HeapEngine`, granting requests in the order of their priorities, lower first,
+        and of their requests for equal priorities.
+
+        Parameters
+        ----------
+        engine : HeapEngine
+            The engine scheduling the grants and releases.
+
+        Notes
+        -----
+        This follows `simpy.PriorityResource`: a request is granted by an event scheduled at the current time,
+        a release is an event as well, and the next request in the queue is only granted once that event is
+        processed. With equal priorities it is the same as `simpy.Resource`.
+
+        """
+        self.engine = engine
+        self.n_users = 0
+        self.queue: list[tuple[float, float, int, Callable[[], None]]] = []
+        self._n_requests = 0
+
+    def request(self, on_granted: Callable[[], None], priority: float = 0.0):
+        """Request the resource, `on_granted` is called once it is granted."""
+        heapq.heappush(self.queue, (priority, self.engine.now, self._n_requests, on_granted))
+        self._n_requests += 1
+        self.trigger()
+
+    def release(self):
+        """Release the resource."""
+        self.n_users -= 1
+        self.engine.schedule(0, NORMAL, self.trigger)
+
+    def trigger(self):
+        """Grant the first request in the queue if the resource is free."""
+        if self.queue and self.n_users < 1:
+            self.n_users += 1
+            self.engine.schedule(0, NORMAL, heapq.heappop(self.queue)[-1])
+
+
+class HeapEngine:
+    def __init__(
+            self, lab: Lab | LabProxy, check_pre: bool = True,
+            duration_model: Callable[[Instruction, float], float] = None,
+            dispatch_policy: DispatchPolicy = None,
+    ):
+        """A discrete-event engine computing the makespan of the instructions of a lab without `simpy`.
+
+        Parameters
+        ----------
+        lab : Lab | LabProxy
+            The lab object, its states are changed by the post actors as in a `simpy` run. A proxy such as
+            `JUNIOR_LAB` stands for the lab of the current context.
+        check_pre : bool, optional
+            Whether to run the pre actors, which only check the states of the involved objects. Default is True.
+        duration_model : Callable[[Instruction, float], float], optional
+            Maps an instruction and the processing time projected by its device to the processing time used in
+            the run, e.g. a `DurationPerturbation`. Default is None, i.e. the projected processing time.
+        dispatch_policy : DispatchPolicy, optional
+            Decides which of the instructions waiting for a device gets it next. Default is None, i.e. first come
+            first serve.
+
+        Notes
+        -----
+        An instruction follows the same steps as in `FastModel`: it waits for its device, makes projections,
+        acquires the device and the involved lab objects in the order of their identifiers, moves the clock and
+        runs the post actor. Instead of processes and events the steps are callbacks in a heap ordered by time,
+        priority and scheduling order, scheduled exactly where `simpy` would schedule an event, so the timings
+        are identical to those of `FastModel` and `Model`.
+
+        As the device actions use the module-level lab proxies, a lab must be run in the context it was built in,
+        see `LabProxy.context`.
+
+        """
+        self.lab = resolve_lab(lab)
+        self.check_pre = check_pre
+        self.duration_model = duration_model
+        self.dispatch_policy = dispatch_policy
+        self.now = 0.0
+        self._heap: list[tuple[float, int, int, Callable[[], None]]] = []
+        self._n_scheduled = 0
+
+        self.device_resources: dict[str, HeapResource] = dict()
+        self.object_resources: dict[str, HeapResource] = dict()
+
+        self.n_pending_predecessors: dict[str, int] = dict()
+        self.dict_succeeding_instructions: dict[str, list[str]] = dict()
+
+        # results
+        self.start_time: dict[str, float] = dict()
+        self.finish_time: dict[str, float] = dict()
+        self.device_busy_time: dict[str, float] = dict()
+
+    def schedule(self, delay: float, priority: int, callback: Callable[[], None]):
+        """Schedule a callback at `now + delay`."""
+        heapq.heappush(self._heap, (self.now + delay, priority, self._n_scheduled, callback))
+        self._n_scheduled += 1
+
+    def run(self) -> float:
+        """Run all instructions of the lab.
+
+        Returns
+        -------
+        float
+            The makespan, i.e. the time the last instruction finished.
+
+        Raises
+        ------
+        RuntimeError
+            If some instructions never ran, e.g. because of a cycle in their dependencies.
+        ValueError
+            If the duration model gives a negative processing time, the clock would run backward.
+
+        """
+        # the containment of lab objects may have been changed directly when setting up the lab
+        self.lab.notify_containment_change()
+        for k, v in self.lab.dict_instruction.items():
+            self.n_pending_predecessors[k] = len(v.preceding_instructions)
+            for predecessor_identifier in v.preceding_instructions:
+                if predecessor_identifier not in self.lab.dict_instruction:
+                    raise KeyError(predecessor_identifier)
+                self.dict_succeeding_instructions.setdefault(predecessor_identifier, []).append(k)
+        for k, n in self.n_pending_predecessors.items():
+            if n == 0:
+                self.release(k)
+
+        heap = self._heap
+        while heap:
+            self.now, _, _, callback = heapq.heappop(heap)
+            callback()
+
+        if len(self.finish_time) != len(self.lab.dict_instruction):
+            raise RuntimeError(
+                f"{len(self.lab.dict_instruction) - len(self.finish_time)} instructions never ran"
+            )
+        return self.makespan
+
+    @property
+    def makespan(self) -> float:
+        """The time the last instruction finished."""
+        return max(self.finish_time.values(), default=0.0)
+
+    @property
+    def device_utilization(self) -> dict[str, float]:
+        """The busy time of each device divided by the makespan."""
+        makespan = self.makespan
+        return {k: v / makespan if makespan > 0 else 0.0 for k, v in self.device_busy_time.items()}
+
+    def get_object_resources(self, objects: list[LabObject]) -> list[HeapResource]:
+        """The resources of the lab objects in the order of their identifiers, `None` and duplicates are skipped."""
+        identifiers = sorted({o.identifier for o in objects if o is not None})
+        resources = []
+        for identifier in identifiers:
+            if identifier not in self.object_resources:
+                self.object_resources[identifier] = HeapResource(self)
+            resources.append(self.object_resources[identifier])
+        return resources
+
+    def release(self, instruction_identifier: str):
+        """Start an instruction whose preceding instructions are all completed."""
+        # a new `simpy` process is initialized by an urgent event
+        self.schedule(0, URGENT, lambda: self.request_device(instruction_identifier))
+
+    def request_device(self, instruction_identifier: str):
+        device = self.lab.dict_instruction[instruction_identifier].device
+        if device.identifier not in self.device_resources:
+            self.device_resources[device.identifier] = HeapResource(self)
+            self.device_busy_time[device.identifier] = 0.0
+        priority = 0.0 if self.dispatch_policy is None else self.dispatch_policy.priority(instruction_identifier)
+        self.device_resources[device.identifier].request(
+            lambda: self.on_device_granted(instruction_identifier), priority
+        )
+
+    def on_device_granted(self, instruction_identifier: str):
+        instruction = self.lab.dict_instruction[instruction_identifier]
+        device: Device = instruction.device
+        involved_objects, processing_time = device.act_by_instruction(instruction, actor_type="proj")
+        if self.duration_model is not None:
+            processing_time = self.duration_model(instruction, processing_time)
+            if processing_time < 0:
+                raise ValueError(
+                    f"negative processing time of instruction {instruction_identifier}: {processing_time}"
+                )
+        resources = self.get_object_resources([device, ] + list(involved_objects))
+        self.acquire_next(instruction_identifier, resources, 0, involved_objects, processing_time)
+
+    def acquire_next(
+            self,
+            instruction_identifier: str,
+            resources: list[HeapResource],
+            i_resource: int,
+            involved_objects: list[LabObject],
+            processing_time: float,
+    ):
+        if i_resource < len(resources):
+            resources[i_resource].request(
+                lambda: self.acquire_next(
+                    instruction_identifier, resources, i_resource + 1, involved_objects, processing_time
+                )
+            )
+            return
+        instruction = self.lab.dict_instruction[instruction_identifier]
+        if self.check_pre:
+            instruction.device.act_by_instruction(instruction, actor_type="pre")
+        self.start_time[instruction_identifier] = self.now
+        self.schedule(processing_time, NORMAL, lambda: self.on_processed(instruction_identifier, resources))
+
+    def on_processed(self, instruction_identifier: str, resources: list[HeapResource]):
+        instruction = self.lab.dict_instruction[instruction_identifier]
+        device = instruction.device
+        device.act_by_instruction(instruction, actor_type="post")
+        for r in resources:
+            r.release()
+        self.device_resources[device.identifier].release()
+        self.finish_time[instruction_identifier] = self.now
+        self.device_busy_time[device.identifier] += self.now - self.start_time[instruction_identifier]
+
+        for k in self.dict_succeeding_instructions.get(instruction_identifier, []):
+            self.n_pending_predecessors[k] -= 1
+            if self.n_pending_predecessors[k] == 0:
+                self.release(k)
+
+
+def simulate_makespan(
+        lab: Lab | LabProxy, check_pre: bool = True, duration_model: Callable[[Instruction, float], float] = None,
+) -> tuple[float, dict[str, float]]:
+    """Run the instructions of a lab with `HeapEngine`.
+
+    Parameters
+    ----------
+    lab : Lab | LabProxy
+        The lab object.
+    check_pre : bool, optional
+        Whether to run the pre actors. Default is True.
+    duration_model : Callable[[Instruction, float], float], optional
+        See `HeapEngine`. Default is None.
+
+    Returns
+    -------
+    tuple[float, dict[str, float]]
+        The makespan and the busy time of each device.
+
+    """
+    engine = HeapEngine(lab, check_pre=check_pre, duration_model=duration_model)
+    makespan = engine.run()
+    return makespan, engine.device_busy_time
@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+from copy import deepcopy
+from typing import Any, Iterable, Iterator
+
+from hardware_pydantic.base import Lab, Instruction
+
+
+class SinkJournal:
+    def __init__(self, keyframe_interval: int = 50):
+        """An incremental log of lab states, used by `Sink` in place of one deep copy of the lab per instruction.
+
+        Parameters
+        ----------
+        keyframe_interval : int, optional
+            A full copy of the lab (keyframe) is stored every `keyframe_interval` entries, the entries in
+            between only store the lab objects touched by the finished instruction. Default is 50.
+
+        Notes
+        -----
+        The journal can be used as the `list` of dicts produced by the "full" log mode of `Sink`, i.e.
+        `journal[i]`, `journal[i:j]`, `len(journal)` and iterating over it give dicts with the keys
+        "finished", "last_entry", "state_index", "instruction" and "lab", where the lab is reconstructed
+        on demand from the closest preceding keyframe.
+
+        """
+        assert keyframe_interval > 0
+        self.keyframe_interval = keyframe_interval
+        self.entries: list[dict[str, Any]] = []
+        self.keyframes: dict[int, Lab] = dict()
+        self._known_identifiers: set[str] = set()
+
+    def record(
+            self,
+            lab: Lab,
+            finished: float,
+            last_entry: float,
+            instruction: Instruction | None,
+            touched: Iterable[str] = (),
+    ) -> dict[str, Any]:
+        """Record the current state of the lab.
+
+        Parameters
+        ----------
+        lab : Lab
+            The lab whose state is recorded.
+        finished : float
+            The simulation time at which the instruction finished.
+        last_entry : float
+            The simulation time of the previous entry.
+        instruction : Instruction | None
+            The finished instruction, `None` for the initial state.
+        touched : Iterable[str], optional
+            The identifiers of the lab objects that may have changed since the last entry.
+
+        Returns
+        -------
+        dict[str, Any]
+            The journal entry.
+
+        """
+        state_index = len(self.entries)
+        entry = {
+            "finished": finished,
+            "last_entry": last_entry,
+            "state_index": state_index,
+            "instruction": instruction,
+            "delta": dict(),
+            "removed": [],
+        }
+        if state_index % self.keyframe_interval != 0:
+            for identifier in touched:
+                if identifier in lab.dict_object:
+                    entry["delta"][identifier] = deepcopy(lab.dict_object[identifier])
+                    self._known_identifiers.add(identifier)
+                elif identifier in self._known_identifiers:
+                    entry["removed"].append(identifier)
+                    self._known_identifiers.remove(identifier)
+        # objects added or removed without being touched by any instruction can only be caught by a keyframe
+        if state_index % self.keyframe_interval == 0 or len(self._known_identifiers) != len(lab.dict_object):
+            self.keyframes[state_index] = deepcopy(lab)
+            self._known_identifiers = set(lab.dict_object.keys())
+            entry["delta"] = dict()
+            entry["removed"] = []
+        self.entries.append(entry)
+        return entry
+
+    def lab_at(self, state_index: int) -> Lab:
+        """Reconstruct the lab at a given state index.
+
+        Parameters
+        ----------
+        state_index : int
+            The state index, negative values count from the end.
+
+        Returns
+        -------
+        Lab
+            A new lab object, changing it does not affect the journal.
+
+        """
+        if state_index < 0:
+            state_index += len(self.entries)
+        if not 0 <= state_index < len(self.entries):
+            raise IndexError(f"state index out of range: {state_index}")
+        i_keyframe = max(i for i in self.keyframes if i <= state_index)
+        lab = deepcopy(self.keyframes[i_keyframe])
+        for entry in self.entries[i_keyframe + 1: state_index + 1]:
+            self.apply(lab, entry)
+        return lab
+
+    @staticmethod
+    def apply(lab: Lab, entry: dict[str, Any]):
+        """Apply the delta of a journal entry to a lab in place."""
+        for identifier, obj in entry["delta"].items():
+            lab.dict_object[identifier] = deepcopy(obj)
+        for identifier in entry["removed"]:
+            lab.dict_object.pop(identifier)
+        lab.notify_containment_change()
+
+    def as_log(self, entry: dict[str, Any], lab: Lab) -> dict[str, Any]:
+        """The dict of an entry as it would be in the "full" log mode."""
+        return {
+            "finished": entry["finished"],
+            "last_entry": entry["last_entry"],
+            "state_index": entry["state_index"],
+            "instruction": entry["instruction"],
+            "lab": lab,
+        }
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __getitem__(self, item: int | slice) -> dict[str, Any] | list[dict[str, Any]]:
+        if isinstance(item, slice):
+            return [self[i] for i in range(*item.indices(len(self)))]
+        return self.as_log(self.entries[item], self.lab_at(item))
+
+    def __iter__(self) -> Iterator[dict[str, Any]]:
+        lab = None
+        for entry in self.entries:
+            if entry["state_index"] in self.keyframes:
+                lab = deepcopy(self.keyframes[entry["state_index"]])
+            else:
+                self.apply(lab, entry)
+            yield self.as_log(entry, deepcopy(lab))
@@ -2,50 +2,271 @@ from __future__ import annotations
 
 import os
 
-from simpy import Environment
+from simpy import Environment, PriorityResource
+from simpy.events import ProcessGenerator
 
 from hardware_pydantic import *
-from .schema import Source, Buffer, Spreader, Check, Sink, DeviceBlock
+from .schema import Source, Buffer, Spreader, Check, Sink, DeviceBlock, InstructionJob
+from .schema.object_resource import LabObjectResourceRegistry
+from .dispatch import DispatchPolicy
+from .events import EventPublisher
+from .schema.sink import SINK_LOG_MODE
 
 
 class Model:
-    def __init__(self, env: Environment, lab: Lab, wdir: str | os.PathLike, model_name: str):
+    def __init__(
+            self,
+            env: Environment,
+            lab: Lab | LabProxy,
+            wdir: str | os.PathLike,
+            model_name: str,
+            log_mode: SINK_LOG_MODE = "auto",
+            keyframe_interval: int = 50,
+            flush_every: int = 100,
+            columnar_trace: bool = False,
+            trace_tags: dict[str, int | float | str] = None,
+            release_when_ready: bool = True,
+            dispatch_policy: DispatchPolicy = None,
+            publisher: EventPublisher = None,
+    ):
         """Model class for the casymda hardware.
 
         Parameters
         ----------
         env : Environment
             The simpy environment.
-        lab : Lab
-            The lab object.
+        lab : Lab | LabProxy
+            The lab object, a proxy such as `JUNIOR_LAB` stands for the lab of the current context.
         wdir : str | os.PathLike
             The working directory.
         model_name : str
             The name of the model.
+        log_mode : SINK_LOG_MODE, optional
+            How the `Sink` logs lab states, one of "auto", "full", "journal", "stream" or "indexed". Default is "auto",
+            which streams the trace of long runs and keeps the full log otherwise.
+        keyframe_interval : int, optional
+            The keyframe interval of the "journal" and "indexed" log modes. Default is 50.
+        flush_every : int, optional
+            The number of trace records or states buffered before being written in the "stream" or "indexed" log
+            mode. Default is 100.
+        columnar_trace : bool, optional
+            Whether the `Sink` writes a columnar trace once all instructions are finished. Default is False.
+        trace_tags : dict[str, int | float | str], optional
+            Settings of the run stored in the columnar trace, e.g. `{"concurrency": 4}`. Default is None.
+        release_when_ready : bool, optional
+            If True, jobs are created and enter the model only once their preceding jobs are completed.
+            If False, all jobs are created and enter at the start, the ones not ready are parked in the
+            `Buffer` and woken up by interrupts.
+            Default is True.
+        dispatch_policy : DispatchPolicy, optional
+            Decides which of the jobs waiting for a device gets it next. Default is None, i.e. first come first
+            serve.
+        publisher : EventPublisher, optional
+            Publishes the trace record of each finished instruction, e.g. to follow the run in the visualizers,
+            see `casymda_hardware.events`. Default is None.
 
         """
         self.env = env
-        self.lab = lab
+        self.lab = resolve_lab(lab)
+        self.dispatch_policy = dispatch_policy
+        # the containment of lab objects may have been changed directly when setting up the lab
+        self.lab.notify_containment_change()
 
         # !resources+components
-        self.source = Source(self.env, self.lab)
-        self.sink = Sink(self.env, self.lab, wdir, model_name)
-        self.buffer = Buffer(self.env)
+        self.source = Source(self.env, self.lab, release_when_ready=release_when_ready)
+        self.sink = Sink(self.env, self.lab, wdir, model_name, log_mode=log_mode,
+                         keyframe_interval=keyframe_interval, flush_every=flush_every,
+                         columnar_trace=columnar_trace, trace_tags=trace_tags, publisher=publisher)
+        self.buffer = Buffer(self.env, wake_by_interrupt=not release_when_ready)
+
+        # one resource per lab object, shared by all device blocks
+        self.resource_registry = LabObjectResourceRegistry(self.env)
 
         self.device_blocks = []
         for i, device in lab.dict_object.items():
             if isinstance(device, Device):
-                device_block = DeviceBlock(self.env, device, block_capacity=1)
-                self.device_blocks.append(device_block)
+                self.device_blocks.append(self.create_device_block(device))
 
-        self.spreader = Spreader(self.env, device_blocks=self.device_blocks)
+        # routes jobs by device identifier, devices added to the lab during the run get their blocks on demand
+        self.spreader = Spreader(self.env, device_blocks=self.device_blocks,
+                                 device_block_factory=self.create_device_block)
 
         self.check = Check(self.env, self.sink, self.buffer)
 
         # !model
         self.source.successors = [self.buffer, ]
         self.buffer.successors = [self.spreader, ]
-        self.spreader.successors = self.device_blocks
+        self.spreader.successors = list(self.device_blocks)
         for db in self.device_blocks:
             db.successors = [self.check, ]
         self.check.successors = [self.sink, self.buffer]
+
+    def close(self):
+        """Append the buffered records of the sink to their files, e.g. after a run that stalled."""
+        self.sink.close()
+
+    def create_device_block(self, device: Device) -> DeviceBlock:
+        """Create a `DeviceBlock` for a device and connect it to the rest of the model.
+
+        Parameters
+        ----------
+        device : Device
+            The device.
+
+        Returns
+        -------
+        DeviceBlock
+            The device block.
+
+        """
+        device_block = DeviceBlock(self.env, device, block_capacity=1, resource_registry=self.resource_registry,
+                                   dispatch_policy=self.dispatch_policy)
+        device_block.do_on_post_list.append(self.sink.on_device_post)
+        # `self.check` does not exist yet when the initial blocks are created in `__init__`
+        if hasattr(self, "check"):
+            device_block.successors = [self.check, ]
+        return device_block
+
+
+class FastModel:
+    def __init__(
+            self,
+            env: Environment,
+            lab: Lab | LabProxy,
+            wdir: str | os.PathLike,
+            model_name: str,
+            log_mode: SINK_LOG_MODE = "auto",
+            keyframe_interval: int = 50,
+            flush_every: int = 100,
+            columnar_trace: bool = False,
+            trace_tags: dict[str, int | float | str] = None,
+            dispatch_policy: DispatchPolicy = None,
+            publisher: EventPublisher = None,
+    ):
+        """A model that runs the instructions of a lab without passing them through `casymda` blocks.
+
+        Parameters
+        ----------
+        env : Environment
+            The simpy environment.
+        lab : Lab | LabProxy
+            The lab object, a proxy such as `JUNIOR_LAB` stands for the lab of the current context.
+        wdir : str | os.PathLike
+            The working directory.
+        model_name : str
+            The name of the model.
+        log_mode : SINK_LOG_MODE, optional
+            How the `Sink` logs lab states, see `Model`. Default is "auto".
+        keyframe_interval : int, optional
+            The keyframe interval of the "journal" and "indexed" log modes. Default is 50.
+        flush_every : int, optional
+            The number of trace records or states buffered before being written in the "stream" or "indexed" log
+            mode. Default is 100.
+        columnar_trace : bool, optional
+            Whether the `Sink` writes a columnar trace once all instructions are finished. Default is False.
+        trace_tags : dict[str, int | float | str], optional
+            Settings of the run stored in the columnar trace, e.g. `{"concurrency": 4}`. Default is None.
+        dispatch_policy : DispatchPolicy, optional
+            Decides which of the instructions waiting for a device gets it next. Default is None, i.e. first come
+            first serve.
+        publisher : EventPublisher, optional
+            Publishes the trace record of each finished instruction, e.g. to follow the run in the visualizers,
+            see `casymda_hardware.events`. Default is None.
+
+        Notes
+        -----
+        In `Model` only the `DeviceBlock`s advance the clock, the other blocks add process hops and block
+        resource requests to every instruction. Here each instruction is one process started when its
+        preceding instructions are completed, it
+        1. waits for the device, in the order of the dispatch policy, like the block resource of a `DeviceBlock`;
+        2. makes projections and acquires the device and the involved lab objects from the shared
+           `LabObjectResourceRegistry` in the order of their identifiers;
+        3. runs the pre actor, moves the clock and runs the post actor;
+        4. releases everything and is logged by the `Sink`.
+
+        """
+        self.env = env
+        self.lab = resolve_lab(lab)
+        self.lab.notify_containment_change()
+        self.dispatch_policy = dispatch_policy
+        self.sink = Sink(self.env, self.lab, wdir, model_name, log_mode=log_mode,
+                         keyframe_interval=keyframe_interval, flush_every=flush_every,
+                         columnar_trace=columnar_trace, trace_tags=trace_tags, publisher=publisher)
+        self.resource_registry = LabObjectResourceRegistry(self.env)
+        # one resource per device, created on demand
+        self.device_resources: dict[str, PriorityResource] = dict()
+
+        self.n_pending_predecessors: dict[str, int] = dict()
+        self.dict_succeeding_instructions: dict[str, list[str]] = dict()
+        for k, v in lab.dict_instruction.items():
+            self.n_pending_predecessors[k] = len(v.preceding_instructions)
+            for predecessor_identifier in v.preceding_instructions:
+                if predecessor_identifier not in lab.dict_instruction:
+                    raise KeyError(predecessor_identifier)
+                self.dict_succeeding_instructions.setdefault(predecessor_identifier, []).append(k)
+
+        for k, n in self.n_pending_predecessors.items():
+            if n == 0:
+                self.release(k)
+
+    def close(self):
+        """Append the buffered records of the sink to their files, e.g. after a run that stalled."""
+        self.sink.close()
+
+    def release(self, instruction_identifier: str):
+        """Start the process of an instruction whose preceding instructions are all completed."""
+        job = InstructionJob(env=self.env, lab=self.lab, instruction=self.lab.dict_instruction[instruction_identifier])
+        job.on_is_ready(None)
+        self.env.process(self.process_job(job))
+
+    def process_job(self, job: InstructionJob) -> ProcessGenerator:
+        """Run the instruction of a job, see the notes of `FastModel`.
+
+        Parameters
+        ----------
+        job : InstructionJob
+            The job to be processed.
+
+        Yields
+        -------
+        ProcessGenerator
+            The process generator.
+
+        """
+        device = job.instruction.device
+        if device.identifier not in self.device_resources:
+            self.device_resources[device.identifier] = PriorityResource(self.env, capacity=1)
+        device_resource = self.device_resources[device.identifier]
+        if self.dispatch_policy is None:
+            priority = 0.0
+        else:
+            priority = self.dispatch_policy.priority(job.instruction.identifier)
+        device_request = device_resource.request(priority=priority)
+        yield device_request
+
+        involved_objects, processing_time = device.act_by_instruction(job.instruction, actor_type="proj")
+        touched_identifiers = DeviceBlock.get_touched_identifiers_of(device, involved_objects)
+
+        acquisition_start = self.env.now
+        acquired = yield from self.resource_registry.acquire_all([device, ] + list(involved_objects))
+        job.acquisition_wait_time = self.env.now - acquisition_start
+
+        device.act_by_instruction(job.instruction, actor_type="pre")
+        job.processing_start = self.env.now
+        yield self.env.timeout(processing_time)
+        device.act_by_instruction(job.instruction, actor_type="post")
+        touched_identifiers |= DeviceBlock.get_touched_identifiers_of(device, involved_objects)
+        job.touched_identifiers = touched_identifiers
+        self.sink.on_device_post(job, touched_identifiers)
+
+        self.resource_registry.release_all(acquired)
+        device_resource.release(device_request)
+        job.notify_processing_step_completion()
+
+        self.sink.do_on_enter(job, None, self.sink)
+        self.sink.do_on_exit(job, self.sink, None)
+
+        for k in self.dict_succeeding_instructions.get(job.instruction.identifier, []):
+            self.n_pending_predecessors[k] -= 1
+            if self.n_pending_predecessors[k] == 0:
+                self.release(k)
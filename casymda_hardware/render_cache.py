@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Hashable, Iterable
+
+
+class RenderCache:
+    def __init__(self, maxsize: int = 256, max_workers: int = 0):
+        """A bounded least recently used cache of rendered values, e.g. the figures of the visualizers.
+
+        Parameters
+        ----------
+        maxsize : int, optional
+            The maximum number of cached values. Default is 256.
+        max_workers : int, optional
+            The number of threads rendering values in the background, see `prerender`. Default is 0, i.e.
+            values are only rendered when requested.
+
+        Notes
+        -----
+        The keys are chosen by the caller, e.g. `(log_path, state_index, tracker_id)`. The render functions
+        run in the background threads must be safe to call from them, e.g. `StateLogReader.lab_at` is.
+
+        """
+        assert maxsize > 0
+        self.maxsize = maxsize
+        self._values: OrderedDict[Hashable, Any] = OrderedDict()
+        self._pending: dict[Hashable, Future] = dict()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers) if max_workers > 0 else None
+
+    def _store(self, key: Hashable, value: Any):
+        with self._lock:
+            self._values[key] = value
+            self._values.move_to_end(key)
+            if len(self._values) > self.maxsize:
+                self._values.popitem(last=False)
+
+    def get(self, key: Hashable, render: Callable[[], Any]) -> Any:
+        """The cached value of a key, rendered now unless cached or being rendered in the background."""
+        with self._lock:
+            if key in self._values:
+                self._values.move_to_end(key)
+                return self._values[key]
+            future = self._pending.get(key)
+        if future is not None:
+            return future.result()
+        value = render()
+        self._store(key, value)
+        return value
+
+    def prerender(self, items: Iterable[tuple[Hashable, Callable[[], Any]]]):
+        """Render the values of keys that are neither cached nor pending in the background, if there are workers."""
+        if self._executor is None:
+            return
+        for key, render in items:
+            with self._lock:
+                if key in self._values or key in self._pending:
+                    continue
+                self._pending[key] = self._executor.submit(self._render_pending, key, render)
+
+    def _render_pending(self, key: Hashable, render: Callable[[], Any]) -> Any:
+        try:
+            value = render()
+            self._store(key, value)
+            return value
+        finally:
+            with self._lock:
+                self._pending.pop(key, None)
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._values
+
+    def __len__(self):
+        with self._lock:
+            return len(self._values)
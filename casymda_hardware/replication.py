@@ -0,0 +1,209 @@
+from __future__ import annotations
+
+import importlib.util
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable
+
+import numpy as np
+
+from hardware_pydantic import Lab, Instruction, resolve_lab
+from hardware_pydantic.junior.settings import JUNIOR_LAB
+from hardware_pydantic.tecan.settings import TECAN_LAB
+from .heap_engine import HeapEngine
+
+DURATION_DISTRIBUTIONS: dict[str, Callable[[np.random.Generator, float, float], float]] = {
+    # truncated at 0, `scale` is the coefficient of variation
+    "normal": lambda rng, nominal, scale: max(0.0, rng.normal(nominal, scale * nominal)),
+    # mean-preserving, `scale` is the sigma of the underlying normal distribution
+    "lognormal": lambda rng, nominal, scale: nominal * rng.lognormal(-scale ** 2 / 2, scale),
+    # mean-preserving, `scale` is the coefficient of variation
+    "gamma": lambda rng, nominal, scale: rng.gamma(1 / scale ** 2, nominal * scale ** 2),
+    # `scale` is the half-width relative to the nominal duration
+    "uniform": lambda rng, nominal, scale: rng.uniform(nominal * (1 - scale), nominal * (1 + scale)),
+    "triangular": lambda rng, nominal, scale: rng.triangular(nominal * (1 - scale), nominal, nominal * (1 + scale)),
+}
+""" samplers of a perturbed duration given a random generator, the nominal duration and a relative scale """
+
+BOUNDED_DISTRIBUTIONS = ("uniform", "triangular")
+""" distributions whose lower bound `nominal * (1 - scale)` is negative for a scale above 1 """
+
+
+class DurationPerturbation:
+    def __init__(self, distributions: dict[str, tuple[str, float]], rng: np.random.Generator):
+        """Perturb the processing times projected by devices, used as the `duration_model` of `HeapEngine`.
+
+        Parameters
+        ----------
+        distributions : dict[str, tuple[str, float]]
+            The name of a distribution in `DURATION_DISTRIBUTIONS` and its scale, keyed by
+            "<device class>.<action name>", e.g. "JuniorArmZ2.pick_up", by action name, e.g. "pick_up", or by "*"
+            for all other actions. The most specific key is used, actions without a key keep their durations.
+            The scales of the bounded distributions "uniform" and "triangular" must be at most 1.
+        rng : np.random.Generator
+            The random generator.
+
+        Notes
+        -----
+        Durations are drawn in the order instructions start, which only depends on the durations drawn before,
+        so a run is reproducible given the seed of `rng`.
+
+        """
+        for kind, scale in distributions.values():
+            if kind not in DURATION_DISTRIBUTIONS:
+                raise ValueError(f"unknown distribution: {kind}")
+            if scale < 0:
+                raise ValueError(f"negative scale of distribution: {kind}")
+            if kind in BOUNDED_DISTRIBUTIONS and scale > 1:
+                raise ValueError(f"scale above 1 of distribution: {kind}, durations would be negative")
+        self.distributions = distributions
+        self.rng = rng
+
+    def get_distribution(self, instruction: Instruction) -> tuple[str, float] | None:
+        """The distribution and scale for an instruction, None if its duration is not perturbed."""
+        for key in (
+                f"{instruction.device.__class__.__name__}.{instruction.action_name}",
+                instruction.action_name,
+                "*",
+        ):
+            if key in self.distributions:
+                return self.distributions[key]
+        return None
+
+    def __call__(self, instruction: Instruction, duration: float) -> float:
+        distribution = self.get_distribution(instruction)
+        if distribution is None or duration <= 0:
+            return duration
+        kind, scale = distribution
+        if scale == 0:
+            return duration
+        return float(DURATION_DISTRIBUTIONS[kind](self.rng, duration, scale))
+
+
+def load_lab(script_path: str | os.PathLike) -> Lab:
+    """Import an example script and define its instructions, returns the lab of the example.
+
+    Parameters
+    ----------
+    script_path : str | os.PathLike
+        The path of a script setting up `JUNIOR_LAB` or `TECAN_LAB` on import, its instructions are defined on
+        import or by its `define_instructions` function. The script should not run a simulation on import.
+
+    Returns
+    -------
+    Lab
+        The lab the proxy of the script stands for, the script is executed again on every call, so each call
+        should be made in a new context of the proxy, see `LabProxy.context`.
+
+    """
+    script_path = os.path.abspath(script_path)
+    folder, filename = os.path.split(script_path)
+    if folder not in sys.path:
+        sys.path.insert(0, folder)
+    spec = importlib.util.spec_from_file_location(os.path.splitext(filename)[0], script_path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    if hasattr(module, "define_instructions"):
+        module.define_instructions()
+    if hasattr(module, "JUNIOR_LAB"):
+        return resolve_lab(module.JUNIOR_LAB)
+    return resolve_lab(module.TECAN_LAB)
+
+
+def run_replication(
+        script_path: str | os.PathLike,
+        distributions: dict[str, tuple[str, float]],
+        seed: np.random.SeedSequence | int,
+) -> dict[str, Any]:
+    """Run one replication of an example script with perturbed durations.
+
+    The example is built in new contexts of `JUNIOR_LAB` and `TECAN_LAB`, so replications can run one after another
+    in the same process.
+
+    Returns
+    -------
+    dict[str, Any]
+        The makespan and the busy time and utilization of each device.
+
+    """
+    with JUNIOR_LAB.context(), TECAN_LAB.context():
+        lab = load_lab(script_path)
+        engine = HeapEngine(lab, duration_model=DurationPerturbation(distributions, np.random.default_rng(seed)))
+        makespan = engine.run()
+    return {
+        "makespan": makespan,
+        "device_busy_time": engine.device_busy_time,
+        "device_utilization": engine.device_utilization,
+    }
+
+
+def run_replications(
+        script_path: str | os.PathLike,
+        n_replications: int,
+        distributions: dict[str, tuple[str, float]],
+        seed: int = 0,
+        max_workers: int = None,
+) -> list[dict[str, Any]]:
+    """Run independent replications of an example script with perturbed durations in a process pool.
+
+    Parameters
+    ----------
+    script_path : str | os.PathLike
+        The path of the example script, see `load_lab`.
+    n_replications : int
+        The number of replications.
+    distributions : dict[str, tuple[str, float]]
+        The distributions of the durations, see `DurationPerturbation`.
+    seed : int, optional
+        The root seed, replication `i` uses the `i`-th child of `np.random.SeedSequence(seed)`, so the results
+        do not depend on `max_workers`. Default is 0.
+    max_workers : int, optional
+        The number of worker processes. Default is None, i.e. the number of processors.
+
+    Returns
+    -------
+    list[dict[str, Any]]
+        The results of `run_replication` in the order of the replications.
+
+    Notes
+    -----
+    Each replication builds its own lab, see `run_replication`, so a worker process runs many replications.
+
+    """
+    seeds = np.random.SeedSequence(seed).spawn(n_replications)
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(run_replication, script_path, distributions, s) for s in seeds]
+        return [f.result() for f in futures]
+
+
+def summarize_replications(
+        results: list[dict[str, Any]], percentiles: tuple[float, ...] = (5, 50, 95)
+) -> dict[str, Any]:
+    """Aggregate the results of `run_replications`.
+
+    Parameters
+    ----------
+    results : list[dict[str, Any]]
+        The results of the replications.
+    percentiles : tuple[float, ...], optional
+        The percentiles of the makespan. Default is (5, 50, 95).
+
+    Returns
+    -------
+    dict[str, Any]
+        The mean, standard deviation and percentiles of the makespan, and the mean utilization of each device.
+
+    """
+    makespans = np.array([r["makespan"] for r in results])
+    devices = sorted({k for r in results for k in r["device_utilization"]})
+    return {
+        "n_replications": len(results),
+        "makespan_mean": float(makespans.mean()),
+        "makespan_std": float(makespans.std(ddof=1)) if len(results) > 1 else 0.0,
+        "makespan_percentiles": {p: float(v) for p, v in zip(percentiles, np.percentile(makespans, percentiles))},
+        "device_utilization": {
+            k: float(np.mean([r["device_utilization"].get(k, 0.0) for r in results])) for k in devices
+        },
+    }
@@ -6,7 +6,7 @@ from .instruction_job import InstructionJob
 
 
 class Buffer(Block):
-    def __init__(self, env: Environment):
+    def __init__(self, env: Environment, wake_by_interrupt: bool = False):
         """
         Conceptual block used for sending jobs to actual devices.
 
@@ -14,10 +14,15 @@ class Buffer(Block):
         ----------
         env : Environment
             The `simpy` simulation environment.
+        wake_by_interrupt : bool, optional
+            If True, a job that is not ready waits on an infinite timeout and is woken up by interrupting
+            its process, this is the behavior before `Source.release_when_ready` was introduced and is kept
+            for comparison. If False, the job waits on its `is_ready_event`. Default is False.
 
         """
         # TODO combine with `Spreader`
         super().__init__(env, name="BUFFER", block_capacity=float('inf'))
+        self.wake_by_interrupt = wake_by_interrupt
 
     def actual_processing(self, job: InstructionJob):
         """Release job as soon as it is ready (Flad's original comments).
@@ -34,6 +39,8 @@ class Buffer(Block):
         """
         if job.is_ready:
             yield self.env.timeout(0)
+        elif not self.wake_by_interrupt:
+            yield job.is_ready_event
         else:
             # wake up on is_ready
             job.add_on_is_ready_callback(lambda ev: job.current_process.interrupt())
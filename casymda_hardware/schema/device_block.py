@@ -1,9 +1,28 @@
 from casymda.blocks.block_components.block import Block
+from simpy import PriorityResource
 from simpy.core import Environment
 
-from hardware_pydantic import Device
+from hardware_pydantic import Device, LabObject
+from ..dispatch import DispatchPolicy
 from .instruction_job import InstructionJob
-from .object_resource import LabObjectResource
+from .object_resource import LabObjectResourceRegistry
+
+
+class DispatchResource(PriorityResource):
+    """The block resource of a `DeviceBlock` with a dispatch policy.
+
+    `Block` requests the resource of its successor without arguments, so the priority of the next request is
+    set by `DeviceBlock.prepare_request` right before, when the predecessor finds this block as the successor.
+    """
+
+    def __init__(self, env: Environment, capacity: int = 1):
+        super().__init__(env, capacity=capacity)
+        self.next_priority = 0.0
+
+    def request(self, priority: float = None, preempt: bool = True):
+        if priority is None:
+            priority, self.next_priority = self.next_priority, 0.0
+        return super().request(priority=priority, preempt=preempt)
 
 
 class DeviceBlock(Block):
@@ -13,6 +32,8 @@ class DeviceBlock(Block):
             env: Environment,
             device: Device,
             block_capacity=1,
+            resource_registry: LabObjectResourceRegistry = None,
+            dispatch_policy: DispatchPolicy = None,
     ):
         """Device block, which can be used to model a device in a lab.
 
@@ -24,11 +45,65 @@ class DeviceBlock(Block):
             The device to be modeled.
         block_capacity : int, optional
             The capacity of the block. Default is 1.
+        resource_registry : LabObjectResourceRegistry, optional
+            The registry of lab object resources, it should be shared by all device blocks of a model.
+            Default is None, i.e. a registry used only by this block.
+        dispatch_policy : DispatchPolicy, optional
+            Decides which of the jobs waiting for this block enters it next. Default is None, i.e. first come
+            first serve.
 
         """
         self.device = device
         self.identifier = self.__class__.__name__ + ": " + self.device.identifier
         super().__init__(env, name=self.identifier, block_capacity=block_capacity)
+        if resource_registry is None:
+            resource_registry = LabObjectResourceRegistry(env)
+        self.resource_registry = resource_registry
+        self.dispatch_policy = dispatch_policy
+        if dispatch_policy is not None:
+            self.block_resource = DispatchResource(env, capacity=block_capacity)
+        # total time jobs processed by this block spent waiting for lab objects
+        self.acquisition_wait_time = 0
+        # called right after the post actor with the job and the identifiers of the involved lab objects
+        self.do_on_post_list = []
+
+    def prepare_request(self, job: InstructionJob):
+        """Set the priority of the next request of the block resource, which is made for `job`."""
+        if self.dispatch_policy is not None:
+            self.block_resource.next_priority = self.dispatch_policy.priority(job.instruction.identifier)
+
+    def get_touched_identifiers(self, involved_objects: list[LabObject]) -> set[str]:
+        """The identifiers of the lab objects an action of this device may change."""
+        return self.get_touched_identifiers_of(self.device, involved_objects)
+
+    @staticmethod
+    def get_touched_identifiers_of(device: Device, involved_objects: list[LabObject]) -> set[str]:
+        """The identifiers of the lab objects an action may change.
+
+        Parameters
+        ----------
+        device : Device
+            The device running the action.
+        involved_objects : list[LabObject]
+            The involved objects returned by the projection of the action.
+
+        Returns
+        -------
+        set[str]
+            The identifiers of the device, the involved objects and their containers.
+
+        Notes
+        -----
+        Containers are included as moving an object changes the `slot_content` of its container.
+
+        """
+        identifiers = {device.identifier}
+        for obj in involved_objects:
+            identifiers.add(obj.identifier)
+            container_identifier = getattr(obj, "contained_by", None)
+            if container_identifier is not None:
+                identifiers.add(container_identifier)
+        return identifiers
 
     def actual_processing(self, job: InstructionJob):
         """The actual processing of the job.
@@ -43,7 +118,7 @@ class DeviceBlock(Block):
         This process involves the following steps:
         1. Check if we have the right device as resource;
         2. Make projections;
-        3. Request resources for lab objects;
+        3. Acquire resources for the device and the involved lab objects in the order of their identifiers;
         4. Run preactor check to make sure everything is ready;
         5. Move clock;
         6. Release resources;
@@ -55,24 +130,28 @@ class DeviceBlock(Block):
 
         # make projections
         involved_objects, processing_time = self.device.act_by_instruction(job.instruction, actor_type="proj")
+        touched_identifiers = self.get_touched_identifiers(involved_objects)
 
-        # request resources for lab objects
-        resource_objects = [LabObjectResource.from_lab_object(obj, self.env) for obj in involved_objects]
-        reqs = [ro.resource.request() for ro in resource_objects]
-        # note the device resource is requested/released in `_process_entity` of `Block`
-        for req in reqs:
-            yield req
+        # acquire the device and all involved lab objects,
+        # note the device block resource is requested/released in `_process_entity` of `Block`
+        acquisition_start = self.env.now
+        acquired = yield from self.resource_registry.acquire_all([self.device, ] + list(involved_objects))
+        job.acquisition_wait_time = self.env.now - acquisition_start
+        self.acquisition_wait_time += job.acquisition_wait_time
 
         # TODO there is an arbitrary delay between "requests are sent" and "resources are ready",
         #  projections could change after this delay
         # everything is ready, run preactor check
         self.device.act_by_instruction(job.instruction, actor_type="pre")
         # move clock
+        job.processing_start = self.env.now
         yield self.env.timeout(processing_time)
         self.device.act_by_instruction(job.instruction, actor_type="post")
+        touched_identifiers |= self.get_touched_identifiers(involved_objects)
+        job.touched_identifiers = touched_identifiers
+        for method in self.do_on_post_list:
+            method(job, touched_identifiers)
         # release resources
-        for i, ro in enumerate(resource_objects):
-            req = reqs[i]
-            ro.resource.release(req)
+        self.resource_registry.release_all(acquired)
         # exit, change job status
         job.notify_processing_step_completion()
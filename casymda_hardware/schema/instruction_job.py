@@ -46,6 +46,11 @@ class InstructionJob(Entity):
         self.is_ready_event = Event(env)
         self.add_on_is_ready_callback(self.on_is_ready)
 
+        # set by `DeviceBlock`
+        self.processing_start: float | None = None
+        self.acquisition_wait_time: float = 0
+        self.touched_identifiers: set[str] = set()
+
     @property
     def preceding_instructions(self) -> list[Instruction]:
         """The preceding instructions of this instruction job.
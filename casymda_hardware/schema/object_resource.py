@@ -39,3 +39,148 @@ class LabObjectResource:
 
         """
         return cls(o, Resource(env, capacity=1), env)
+
+
+class LabObjectResourceRegistry:
+    def __init__(self, env: Environment):
+        """The registry holding exactly one resource per lab object, so instructions involving the same
+        lab object are serialized.
+
+        Parameters
+        ----------
+        env : Environment
+            The `simpy` environment.
+
+        """
+        self.env = env
+        self.resources: dict[str, LabObjectResource] = dict()
+        self.n_requests: dict[str, int] = dict()
+        self.wait_time: dict[str, float] = dict()
+
+    def get(self, o: LabObject) -> LabObjectResource:
+        """Get the resource of a lab object, create it if it does not exist yet.
+
+        Parameters
+        ----------
+        o : LabObject
+            The lab object.
+
+        Returns
+        -------
+        LabObjectResource
+            The lab object resource.
+
+        """
+        try:
+            return self.resources[o.identifier]
+        except KeyError:
+            ro = LabObjectResource.from_lab_object(o, self.env)
+            self.resources[o.identifier] = ro
+            self.n_requests[o.identifier] = 0
+            self.wait_time[o.identifier] = 0
+            return ro
+
+    def get_resources(self, objects: list[LabObject]) -> list[LabObjectResource]:
+        """Get the resources of a list of lab objects.
+
+        Parameters
+        ----------
+        objects : list[LabObject]
+            The lab objects, `None` and duplicates are skipped.
+
+        Returns
+        -------
+        list[LabObjectResource]
+            The lab object resources, one for each unique lab object, in the order of `objects`.
+
+        Notes
+        -----
+        Duplicates have to be removed as requesting the same capacity-1 resource twice in one job
+        would block that job forever.
+
+        """
+        resource_objects = []
+        seen = set()
+        for o in objects:
+            if o is None or o.identifier in seen:
+                continue
+            seen.add(o.identifier)
+            resource_objects.append(self.get(o))
+        return resource_objects
+
+    def request(self, ro: LabObjectResource):
+        """Request the resource of a lab object and record the time spent waiting for it.
+
+        Parameters
+        ----------
+        ro : LabObjectResource
+            The lab object resource.
+
+        Returns
+        -------
+        simpy.resources.resource.Request
+            The request event.
+
+        """
+        identifier = ro.lab_object.identifier
+        requested_at = self.env.now
+        req = ro.resource.request()
+        self.n_requests[identifier] += 1
+
+        def record_wait_time(event):
+            self.wait_time[identifier] += self.env.now - requested_at
+
+        req.callbacks.append(record_wait_time)
+        return req
+
+    def acquire_all(self, objects: list[LabObject]):
+        """Acquire the resources of all lab objects, one at a time in the order of their identifiers.
+
+        Parameters
+        ----------
+        objects : list[LabObject]
+            The lab objects, `None` and duplicates are skipped.
+
+        Yields
+        ------
+        simpy.resources.resource.Request
+            The requests, to be used with `yield from` in a process.
+
+        Returns
+        -------
+        list[tuple[LabObjectResource, simpy.resources.resource.Request]]
+            The acquired resources and the granted requests, to be passed to `release_all`.
+
+        Notes
+        -----
+        As every job requests its resources in the same global order a job can only wait for jobs
+        holding resources that come earlier in this order, so no cycle of waiting jobs, i.e. no deadlock,
+        can form. The next request is only sent once the previous one is granted, so a waiting job does
+        not occupy places in the queues of the resources it does not hold yet.
+
+        """
+        resource_objects = sorted(self.get_resources(objects), key=lambda ro: ro.lab_object.identifier)
+        acquired = []
+        for ro in resource_objects:
+            req = self.request(ro)
+            yield req
+            acquired.append((ro, req))
+        return acquired
+
+    @staticmethod
+    def release_all(acquired):
+        """Release the resources acquired by `acquire_all`."""
+        for ro, req in acquired:
+            ro.resource.release(req)
+
+    @property
+    def statistics(self) -> dict[str, dict[str, float]]:
+        """The number of requests, the total and the mean waiting time of each lab object."""
+        return {
+            k: {
+                "n_requests": self.n_requests[k],
+                "wait_time": self.wait_time[k],
+                "mean_wait_time": self.wait_time[k] / self.n_requests[k] if self.n_requests[k] else 0,
+            }
+            for k in self.resources
+        }
@@ -2,16 +2,40 @@ from __future__ import annotations
 
 import os
 import pickle
+import weakref
+
+from typing import Literal
 
 from casymda.blocks.block_components.block import Block
 from simpy import Environment
-from copy import deepcopy
 from hardware_pydantic import Lab
 from .instruction_job import InstructionJob
+from ..events import EventPublisher
+from ..journal import SinkJournal
+from ..columnar import write_columnar_trace
+from ..state_log import StateLogWriter
+from ..trace import TraceWriter, read_trace
+
+SINK_LOG_MODE = Literal["auto", "full", "journal", "stream", "indexed"]
+
+LONG_RUN_INSTRUCTIONS = 1000
+""" in the "auto" log mode, runs with at least this many instructions are logged in the "stream" mode """
 
 
 class Sink(Block):
-    def __init__(self, env: Environment, lab: Lab, wdir: str | os.PathLike, model_name: str):
+    def __init__(
+            self,
+            env: Environment,
+            lab: Lab,
+            wdir: str | os.PathLike,
+            model_name: str,
+            log_mode: SINK_LOG_MODE = "auto",
+            keyframe_interval: int = 50,
+            flush_every: int = 100,
+            columnar_trace: bool = False,
+            trace_tags: dict[str, int | float | str] = None,
+            publisher: EventPublisher = None,
+    ):
         """Conceptual block used for sending jobs to actual devices.
 
         Parameters
@@ -24,6 +48,34 @@ class Sink(Block):
             The working directory.
         model_name : str
             The name of the model.
+        log_mode : SINK_LOG_MODE, optional
+            How lab states are logged, default is "auto".
+            - "full": one snapshot of the lab per finished instruction, sharing the lab objects not touched by the
+              instruction with the previous snapshot, see `Lab.snapshot`, the whole log is pickled every time,
+              the instructions of each snapshot refer to the lab objects of that snapshot
+            - "journal": only the lab objects touched by the finished instruction are copied, with a full
+              copy every `keyframe_interval` entries, see `SinkJournal`
+            - "stream": no lab states, one record per finished instruction is appended to
+              `sim_<model_name>.trace`, see `casymda_hardware.trace`
+            - "indexed": the lab states of the "journal" mode are appended to `sim_<model_name>.states`, which the
+              visualizers read lazily, see `casymda_hardware.state_log`
+            - "auto": "stream" if the lab has at least `LONG_RUN_INSTRUCTIONS` instructions, otherwise "full",
+              so long runs write no `sim_<model_name>.pkl` and their `sink_log` is None, pass "full" to keep them
+        keyframe_interval : int, optional
+            The keyframe interval used in the "journal" and "indexed" modes. Default is 50.
+        flush_every : int, optional
+            The number of records buffered before they are appended to the trace file in the "stream" mode, or
+            states to the state log in the "indexed" mode. Default is 100. The buffer is appended once all
+            instructions are finished, on `close`, or when the interpreter exits, e.g. after a run that stalled.
+        columnar_trace : bool, optional
+            Whether to write the trace of all instructions to `sim_<model_name>.columns` once all instructions are
+            finished, see `casymda_hardware.columnar`. Default is False.
+        trace_tags : dict[str, int | float | str], optional
+            Settings of the run stored as constant columns of the columnar trace, e.g. `{"concurrency": 4}`.
+            Default is None.
+        publisher : EventPublisher, optional
+            Publishes the trace record of each finished instruction once its state is logged, e.g. to follow the
+            run in the visualizers, see `casymda_hardware.events`. Default is None.
 
         """
         super().__init__(env, name="SINK", block_capacity=float('inf'))
@@ -36,30 +88,188 @@ class Sink(Block):
 
         self.wdir = wdir
         self.sink_counter = 0
-        self.sink_log = [
-            {
-                "finished": self.time_of_last_entry,
-                "last_entry": self.time_of_last_last_entry,
-                "state_index": self.sink_counter,
-                "instruction": None,
-                "lab": deepcopy(self.lab),
-            }
-        ]
+        self.columnar_trace = columnar_trace
+        self.trace_tags = dict() if trace_tags is None else trace_tags
+        self.publisher = publisher
+        # trace records of the "full" and "journal" modes, the "stream" mode reads them back from the trace file
+        self.trace_records = []
+        if log_mode == "auto":
+            log_mode = "stream" if len(self.lab.dict_instruction) >= LONG_RUN_INSTRUCTIONS else "full"
+        self.log_mode = log_mode
+        # identifiers of lab objects changed by post actors since the last entry
+        self.touched_identifiers = set()
+        # the writer of the "stream" or "indexed" mode
+        self._writer: TraceWriter | StateLogWriter | None = None
+        if self.log_mode == "full":
+            self.sink_log = [
+                {
+                    "finished": self.time_of_last_entry,
+                    "last_entry": self.time_of_last_last_entry,
+                    "state_index": self.sink_counter,
+                    "instruction": None,
+                    "lab": self.lab.snapshot(),
+                }
+            ]
+        elif self.log_mode == "journal":
+            self.sink_log = SinkJournal(keyframe_interval=keyframe_interval)
+            self.sink_log.record(self.lab, self.time_of_last_entry, self.time_of_last_last_entry, None)
+        elif self.log_mode == "stream":
+            self.sink_log = None
+            self.trace_writer = TraceWriter(self.trace_path, flush_every=flush_every)
+            self._writer = self.trace_writer
+        elif self.log_mode == "indexed":
+            self.sink_log = None
+            self.state_writer = StateLogWriter(
+                self.states_path, keyframe_interval=keyframe_interval, flush_every=flush_every
+            )
+            self.state_writer.record(self.lab, self.time_of_last_entry, self.time_of_last_last_entry, None)
+            self._writer = self.state_writer
+        else:
+            raise ValueError(f"unknown log mode: {self.log_mode}")
+        if self._writer is not None:
+            # keep the buffered records of a run that never finishes, the finalizer must not refer to the sink
+            weakref.finalize(self, self._writer.close)
 
-    def do_on_exit(self, job: InstructionJob, previous, current):
-        sink_log = {
+    @property
+    def log_path(self) -> str:
+        """The path of the pickled log."""
+        return os.path.join(f"{self.wdir}", f"sim_{self.model_name}.pkl")
+
+    @property
+    def trace_path(self) -> str:
+        """The path of the trace file written in the "stream" log mode."""
+        return os.path.join(f"{self.wdir}", f"sim_{self.model_name}.trace")
+
+    @property
+    def states_path(self) -> str:
+        """The path of the state log written in the "indexed" log mode."""
+        return os.path.join(f"{self.wdir}", f"sim_{self.model_name}.states")
+
+    @property
+    def columns_path(self) -> str:
+        """The directory of the columnar trace."""
+        return os.path.join(f"{self.wdir}", f"sim_{self.model_name}.columns")
+
+    @property
+    def is_finished(self) -> bool:
+        """Whether all instructions of the lab have reached the sink."""
+        return self.sink_counter == len(self.lab.dict_instruction)
+
+    def get_trace_record(self, job: InstructionJob) -> dict:
+        """The trace record of a finished job.
+
+        Parameters
+        ----------
+        job : InstructionJob
+            The finished job.
+
+        Returns
+        -------
+        dict
+            The record with the state index, start/finish times, the time spent waiting for lab objects,
+            the instruction, the device and the identifiers of the touched lab objects.
+
+        """
+        return {
+            "state_index": self.sink_counter,
+            "start": job.processing_start,
             "finished": self.time_of_last_entry,
             "last_entry": self.time_of_last_last_entry,
-            "state_index": self.sink_counter,
-            "instruction": job.instruction,
-            "lab": deepcopy(self.lab),
+            "wait": job.acquisition_wait_time,
+            "instruction": job.instruction.identifier,
+            "action_name": job.instruction.action_name,
+            "description": job.instruction.description,
+            "device": job.instruction.device.identifier,
+            "objects": sorted(job.touched_identifiers),
         }
-        self.sink_log.append(sink_log)
+
+    def on_device_post(self, job: InstructionJob, touched_identifiers: set[str]):
+        """Collect the identifiers of lab objects changed by the post actor of a `DeviceBlock`.
+
+        Parameters
+        ----------
+        job : InstructionJob
+            The job that has just been processed.
+        touched_identifiers : set[str]
+            The identifiers of the lab objects involved in this job.
+
+        """
+        self.touched_identifiers.update(touched_identifiers)
+
+    def close(self):
+        """Append the records or states buffered in the "stream" and "indexed" modes to their files."""
+        if self._writer is not None:
+            self._writer.close()
+
+    def do_on_exit(self, job: InstructionJob, previous, current):
+        self.log_state(job)
+        self.publish(job)
+
+    def publish(self, job: InstructionJob):
+        """Publish the trace record of a finished job, the logged states are flushed first so the subscribers can
+        read them."""
+        if self.publisher is None:
+            return
+        if self.log_mode == "stream":
+            self.trace_writer.flush()
+        elif self.log_mode == "indexed":
+            self.state_writer.flush()
+        self.publisher.publish(self.get_trace_record(job))
+
+    def log_state(self, job: InstructionJob):
+        if self.log_mode == "stream":
+            record = self.get_trace_record(job)
+            self.trace_writer.write(record)
+            self.touched_identifiers = set()
+            print(record['last_entry'], record['finished'], record['description'])
+            if self.is_finished:
+                self.trace_writer.flush()
+                if self.columnar_trace:
+                    write_columnar_trace(self.columns_path, read_trace(self.trace_path), **self.trace_tags)
+            return
+
+        if self.columnar_trace:
+            self.trace_records.append(self.get_trace_record(job))
+            if self.is_finished:
+                write_columnar_trace(self.columns_path, self.trace_records, **self.trace_tags)
+
+        if self.log_mode == "indexed":
+            self.state_writer.record(
+                self.lab, self.time_of_last_entry, self.time_of_last_last_entry, job.instruction,
+                touched=self.touched_identifiers,
+            )
+            self.touched_identifiers = set()
+            print(self.time_of_last_last_entry, self.time_of_last_entry, job.instruction.description)
+            if self.is_finished:
+                self.state_writer.flush()
+            return
+
+        if self.log_mode == "journal":
+            sink_log = self.sink_log.record(
+                self.lab, self.time_of_last_entry, self.time_of_last_last_entry, job.instruction,
+                touched=self.touched_identifiers,
+            )
+        else:
+            sink_log = {
+                "finished": self.time_of_last_entry,
+                "last_entry": self.time_of_last_last_entry,
+                "state_index": self.sink_counter,
+                "instruction": job.instruction,
+                # objects not touched by any instruction since the last entry are shared with the last entry
+                "lab": self.lab.snapshot(dirty=self.touched_identifiers, previous=self.sink_log[-1]["lab"]),
+            }
+            self.sink_log.append(sink_log)
+        self.touched_identifiers = set()
         print(sink_log['last_entry'], sink_log['finished'], sink_log['instruction'].description)
+
+        if self.log_mode == "journal":
+            # the journal is only dumped at keyframes and once all instructions are finished
+            if not self.is_finished and sink_log['state_index'] not in self.sink_log.keyframes:
+                return
         # TODO pydantic is ignoring subclasses when reconstructing
         #  (not like in monty the class meta info is kept), have to use pkl fn...
         # TODO use dedicate logger
-        with open(os.path.join(f"{self.wdir}", f"sim_{self.model_name}.pkl"), "wb") as f:
+        with open(self.log_path, "wb") as f:
             # output = {"simulation_time": self.env.now, "lab": self.lab, "instruction":
             # job.instruction, "last_entry": last_entry, "log": self.sink_log}
             pickle.dump(self.sink_log, f)
@@ -8,7 +8,7 @@ from .instruction_job import InstructionJob
 
 
 class Source(Block):
-    def __init__(self, env: Environment, lab: Lab):
+    def __init__(self, env: Environment, lab: Lab, release_when_ready: bool = True):
         """
         Conceptual block used for creating all jobs.
 
@@ -18,12 +18,27 @@ class Source(Block):
             The `simpy` environment.
         lab : Lab
             The lab object.
+        release_when_ready : bool, optional
+            If True, a job is only created once all of its preceding jobs are completed, see
+            `lazy_creation_loop`. If False, all jobs are created and sent to the `Buffer` at the start
+            and wait there. Default is True.
 
         """
         super().__init__(env, name="SOURCE", block_capacity=float('inf'))
         self.lab = lab
+        self.release_when_ready = release_when_ready
 
-        env.process(self.creation_loop(self.lab))
+        # used by `lazy_creation_loop`
+        self.n_pending_predecessors: dict[str, int] = dict()
+        self.dict_succeeding_instructions: dict[str, list[str]] = dict()
+        self.dict_instruction_job: dict[str, InstructionJob] = dict()
+        self.n_created = 0
+        self.max_created_not_completed = 0
+
+        if self.release_when_ready:
+            env.process(self.lazy_creation_loop(self.lab))
+        else:
+            env.process(self.creation_loop(self.lab))
 
     def creation_loop(self, lab: Lab) -> ProcessGenerator:
         """Create all jobs and let them subscribe to the completion of the jobs they depend on.
@@ -73,6 +88,97 @@ class Source(Block):
             yield instruction_job.block_resource_request
             self.env.process(self.process_entity(instruction_job))
 
+    def lazy_creation_loop(self, lab: Lab) -> ProcessGenerator:
+        """Create the jobs without preceding instructions, the others are created when they become ready.
+
+        Parameters
+        ----------
+        lab : Lab
+            The lab object.
+
+        Yields
+        -------
+        ProcessGenerator
+            The process generator.
+
+        Notes
+        -----
+        Instead of creating all jobs upfront, the number of preceding instructions not yet completed is
+        counted for each instruction. A job is created in `on_job_completion` once this count drops to zero,
+        so the number of existing jobs is proportional to the frontier of the instruction graph.
+
+        """
+        for k, v in lab.dict_instruction.items():
+            self.n_pending_predecessors[k] = len(v.preceding_instructions)
+            for predecessor_identifier in v.preceding_instructions:
+                if predecessor_identifier not in lab.dict_instruction:
+                    raise KeyError(predecessor_identifier)
+                self.dict_succeeding_instructions.setdefault(predecessor_identifier, []).append(k)
+
+        ready = [k for k, n in self.n_pending_predecessors.items() if n == 0]
+        for k in ready:
+            instruction_job = self.create_job(k)
+            instruction_job.block_resource_request = self.block_resource.request()
+            yield instruction_job.block_resource_request
+            self.env.process(self.process_entity(instruction_job))
+
+    def create_job(self, instruction_identifier: str) -> InstructionJob:
+        """Create the job of an instruction whose preceding instructions are all completed.
+
+        Parameters
+        ----------
+        instruction_identifier : str
+            The identifier of the instruction.
+
+        Returns
+        -------
+        InstructionJob
+            The job, already marked as ready.
+
+        """
+        instruction_job = InstructionJob(
+            env=self.env, lab=self.lab, instruction=self.lab.dict_instruction[instruction_identifier]
+        )
+        instruction_job.on_is_ready(None)
+        instruction_job.is_completed_event.callbacks.append(
+            lambda ev: self.on_job_completion(instruction_identifier)
+        )
+        self.dict_instruction_job[instruction_identifier] = instruction_job
+        self.n_created += 1
+        self.max_created_not_completed = max(self.max_created_not_completed, len(self.dict_instruction_job))
+        return instruction_job
+
+    def on_job_completion(self, instruction_identifier: str):
+        """Create and release the jobs that become ready because of the completion of a job.
+
+        Parameters
+        ----------
+        instruction_identifier : str
+            The identifier of the instruction of the completed job.
+
+        """
+        self.dict_instruction_job.pop(instruction_identifier)
+        for k in self.dict_succeeding_instructions.pop(instruction_identifier, []):
+            self.n_pending_predecessors[k] -= 1
+            if self.n_pending_predecessors[k] == 0:
+                self.release(self.create_job(k))
+
+    def release(self, job: InstructionJob):
+        """Start processing a job that became ready.
+
+        Parameters
+        ----------
+        job : InstructionJob
+            The job to be released.
+
+        Notes
+        -----
+        The capacity of this block is infinite, so the block resource request is granted immediately.
+
+        """
+        job.block_resource_request = self.block_resource.request()
+        self.env.process(self.process_entity(job))
+
     def actual_processing(self, entity: Entity):
         """Do nothing, as this block is only conceptual."""
         yield self.env.timeout(0)
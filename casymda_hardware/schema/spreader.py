@@ -1,12 +1,22 @@
+from __future__ import annotations
+
+from typing import Callable
+
 from casymda.blocks.block_components.block import Block
 from simpy.core import Environment
 
+from hardware_pydantic import Device
 from .device_block import DeviceBlock
 from .instruction_job import InstructionJob
 
 
 class Spreader(Block):
-    def __init__(self, env: Environment, device_blocks: list[DeviceBlock]):
+    def __init__(
+            self,
+            env: Environment,
+            device_blocks: list[DeviceBlock],
+            device_block_factory: Callable[[Device], DeviceBlock] = None,
+    ):
         """The conceptual block used for sending jobs to actual devices.
 
         Parameters
@@ -15,10 +25,32 @@ class Spreader(Block):
             The `simpy` environment.
         device_blocks : list[DeviceBlock]
             The list of `DeviceBlock`s to which jobs can be sent.
+        device_block_factory : Callable[[Device], DeviceBlock], optional
+            Used to create a `DeviceBlock` for a device that has no block yet, e.g. a device added to the
+            lab after the model is built. Default is None, i.e. such jobs cannot be routed.
 
         """
         super().__init__(env, "SPREADER", block_capacity=float('inf'))
         self.device_blocks = device_blocks
+        self.device_block_factory = device_block_factory
+        self.routing_table: dict[str, DeviceBlock] = {db.device.identifier: db for db in self.device_blocks}
+        self.routing_counts: dict[str, int] = {k: 0 for k in self.routing_table}
+
+    def add_device_block(self, device_block: DeviceBlock):
+        """Register a `DeviceBlock` so jobs can be routed to it.
+
+        Parameters
+        ----------
+        device_block : DeviceBlock
+            The device block to be added.
+
+        """
+        assert device_block.device.identifier not in self.routing_table
+        self.device_blocks.append(device_block)
+        self.routing_table[device_block.device.identifier] = device_block
+        self.routing_counts[device_block.device.identifier] = 0
+        if device_block not in self.successors:
+            self.successors.append(device_block)
 
     def actual_processing(self, entity: InstructionJob):
         """Process the job by sending it to the next device block.
@@ -59,7 +91,26 @@ class Spreader(Block):
         Please note this restricts that a job can only be sent to a `DeviceBlock`.
 
         """
-        for db in self.device_blocks:
-            if db.device.identifier == job.get_next_machine():
-                return db
-        raise ValueError(f'successor not found: {job.get_next_machine()}\nFor: {job.identifier}')
+        device_identifier = job.get_next_machine()
+        try:
+            db = self.routing_table[device_identifier]
+        except KeyError:
+            if self.device_block_factory is None:
+                raise ValueError(f'successor not found: {device_identifier}\nFor: {job.identifier}')
+            db = self.device_block_factory(job.instruction.device)
+            self.add_device_block(db)
+        self.routing_counts[device_identifier] += 1
+        # `Block` requests the block resource of the successor right after this
+        db.prepare_request(job)
+        return db
+
+    @property
+    def routing_statistics(self) -> dict[str, dict[str, float]]:
+        """The number of jobs routed to each device and the time these jobs spent waiting for lab objects."""
+        return {
+            k: {
+                "n_jobs": self.routing_counts[k],
+                "acquisition_wait_time": db.acquisition_wait_time,
+            }
+            for k, db in self.routing_table.items()
+        }
@@ -0,0 +1,297 @@
+from __future__ import annotations
+
+import mmap
+import os
+import pickle
+import threading
+from collections import OrderedDict
+from copy import deepcopy
+from typing import Any, Iterable
+
+from hardware_pydantic.base import Lab, Instruction
+from .journal import SinkJournal
+from .trace import TRACE_FRAME_HEADER, pack_frame
+
+
+class StateLogWriter:
+    def __init__(self, path: str | os.PathLike, keyframe_interval: int = 50, flush_every: int = 100):
+        """Append-only writer of the lab states of a run, read back lazily by `StateLogReader`.
+
+        Parameters
+        ----------
+        path : str | os.PathLike
+            The path of the state log, an existing file will be truncated.
+        keyframe_interval : int, optional
+            A full copy of the lab (keyframe) is written every `keyframe_interval` states, the states in between
+            only hold the lab objects touched by the finished instruction, as in `SinkJournal`. Default is 50.
+        flush_every : int, optional
+            The number of states buffered in memory before they are appended to the file. Default is 100.
+
+        Notes
+        -----
+        Each state is written as two frames of `casymda_hardware.trace`: the entry, i.e. "finished",
+        "last_entry", "state_index", "instruction" and "keyframe", then either the lab or its delta. The entries
+        are read when the log is opened, the labs only when they are displayed.
+
+        """
+        assert keyframe_interval > 0
+        assert flush_every > 0
+        self.path = path
+        self.keyframe_interval = keyframe_interval
+        self.flush_every = flush_every
+        self.n_states = 0
+        self.closed = False
+        self._buffer: list[bytes] = []
+        self._known_identifiers: set[str] = set()
+        with open(self.path, "wb"):
+            pass
+
+    def record(
+            self,
+            lab: Lab,
+            finished: float,
+            last_entry: float,
+            instruction: Instruction | None,
+            touched: Iterable[str] = (),
+    ):
+        """Record the current state of the lab, see `SinkJournal.record`."""
+        state_index = self.n_states
+        delta = dict()
+        removed = []
+        if state_index % self.keyframe_interval != 0:
+            for identifier in touched:
+                if identifier in lab.dict_object:
+                    delta[identifier] = lab.dict_object[identifier]
+                    self._known_identifiers.add(identifier)
+                elif identifier in self._known_identifiers:
+                    removed.append(identifier)
+                    self._known_identifiers.remove(identifier)
+        # objects added or removed without being touched by any instruction can only be caught by a keyframe
+        keyframe = state_index % self.keyframe_interval == 0 or len(self._known_identifiers) != len(lab.dict_object)
+        if keyframe:
+            self._known_identifiers = set(lab.dict_object.keys())
+        self.write_state(
+            {
+                "finished": finished,
+                "last_entry": last_entry,
+                "state_index": state_index,
+                "instruction": instruction,
+            },
+            lab=lab if keyframe else None,
+            delta=delta,
+            removed=removed,
+        )
+
+    def write_state(
+            self,
+            entry: dict[str, Any],
+            lab: Lab | None = None,
+            delta: dict[str, Any] = None,
+            removed: list[str] = None,
+    ):
+        """Buffer the frames of a state, either with the whole lab or with its delta from the previous state."""
+        if self.closed:
+            raise ValueError("write to a closed state log writer")
+        entry = dict(entry, state_index=self.n_states, keyframe=lab is not None)
+        if lab is not None:
+            state = lab
+        else:
+            state = {"delta": dict() if delta is None else delta, "removed": [] if removed is None else removed}
+        self._buffer.append(pack_frame(entry) + pack_frame(state))
+        self.n_states += 1
+        if len(self._buffer) >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        """Append all buffered states to the file."""
+        if len(self._buffer) == 0:
+            return
+        with open(self.path, "ab") as f:
+            f.write(b"".join(self._buffer))
+        self._buffer = []
+
+    def close(self):
+        """Append all buffered states to the file, no states can be written afterward."""
+        self.flush()
+        self.closed = True
+
+
+class StateLogReader:
+    def __init__(self, path: str | os.PathLike, cache_size: int = 16):
+        """Lazy reader of a state log written by `StateLogWriter`.
+
+        Parameters
+        ----------
+        path : str | os.PathLike
+            The path of the state log.
+        cache_size : int, optional
+            The number of reconstructed labs kept in a least recently used cache. Default is 16.
+
+        Notes
+        -----
+        Only the entries are loaded when the log is opened, `reader[i]` gives the same dict as the "full" log
+        mode of `Sink`, with the lab reconstructed from the closest preceding keyframe or cached state. Stepping
+        through neighbouring states only applies one delta per step. The returned labs are shared with the cache
+        and should not be changed. Reading is thread safe, e.g. for rendering states in the background.
+
+        """
+        assert cache_size > 0
+        self.path = path
+        self.cache_size = cache_size
+        self.entries: list[dict[str, Any]] = []
+        self._state_spans: list[tuple[int, int]] = []
+        self._keyframes: list[int] = []
+        self._cache: OrderedDict[int, Lab] = OrderedDict()
+        self._offset = 0
+        self._mmap: mmap.mmap | None = None
+        self._lock = threading.RLock()
+        self.refresh()
+
+    def _map(self) -> mmap.mmap | None:
+        size = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        if size == 0:
+            return None
+        if self._mmap is None or len(self._mmap) != size:
+            if self._mmap is not None:
+                self._mmap.close()
+            with open(self.path, "rb") as f:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._mmap
+
+    def refresh(self) -> int:
+        """Index the states appended since the log was opened or last refreshed.
+
+        Returns
+        -------
+        int
+            The number of new states, incomplete trailing states are left for the next call.
+
+        """
+        with self._lock:
+            buffer = self._map()
+            if buffer is None:
+                return 0
+            n_new = 0
+            header = TRACE_FRAME_HEADER.size
+            while True:
+                entry_start = self._offset + header
+                if entry_start > len(buffer):
+                    break
+                (entry_size,) = TRACE_FRAME_HEADER.unpack_from(buffer, self._offset)
+                state_offset = entry_start + entry_size
+                if state_offset + header > len(buffer):
+                    break
+                (state_size,) = TRACE_FRAME_HEADER.unpack_from(buffer, state_offset)
+                state_end = state_offset + header + state_size
+                if state_end > len(buffer):
+                    break
+                entry = pickle.loads(buffer[entry_start: state_offset])
+                if entry["keyframe"]:
+                    self._keyframes.append(entry["state_index"])
+                self.entries.append(entry)
+                self._state_spans.append((state_offset + header, state_end))
+                self._offset = state_end
+                n_new += 1
+            return n_new
+
+    def _load_state(self, state_index: int) -> Lab | dict[str, Any]:
+        start, end = self._state_spans[state_index]
+        return pickle.loads(self._map()[start: end])
+
+    def lab_at(self, state_index: int) -> Lab:
+        """The lab at a given state index, negative values count from the end."""
+        with self._lock:
+            if state_index < 0:
+                state_index += len(self.entries)
+            if not 0 <= state_index < len(self.entries):
+                raise IndexError(f"state index out of range: {state_index}")
+            if state_index in self._cache:
+                self._cache.move_to_end(state_index)
+                return self._cache[state_index]
+
+            i_keyframe = max(i for i in self._keyframes if i <= state_index)
+            i_cached = max((i for i in self._cache if i_keyframe <= i < state_index), default=None)
+            if i_cached is None:
+                lab = self._load_state(i_keyframe)
+                i_base = i_keyframe
+            else:
+                lab = deepcopy(self._cache[i_cached])
+                i_base = i_cached
+            for i in range(i_base + 1, state_index + 1):
+                SinkJournal.apply(lab, self._load_state(i))
+
+            self._cache[state_index] = lab
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+            return lab
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __getitem__(self, item: int | slice) -> dict[str, Any] | list[dict[str, Any]]:
+        if isinstance(item, slice):
+            return [self[i] for i in range(*item.indices(len(self)))]
+        entry = self.entries[item]
+        return {
+            "finished": entry["finished"],
+            "last_entry": entry["last_entry"],
+            "state_index": entry["state_index"],
+            "instruction": entry["instruction"],
+            "lab": self.lab_at(item),
+        }
+
+    def close(self):
+        with self._lock:
+            if self._mmap is not None:
+                self._mmap.close()
+                self._mmap = None
+
+
+def write_state_log(
+        path: str | os.PathLike, log: list[dict[str, Any]] | SinkJournal, keyframe_interval: int = 50
+):
+    """Convert the log of the "full" or "journal" mode of `Sink` to a state log.
+
+    In the "full" log, the lab objects not touched by an instruction are shared with the previous state, see
+    `Lab.snapshot`, so only the objects that are not shared are written as the delta of a state.
+    """
+    writer = StateLogWriter(path, keyframe_interval=keyframe_interval)
+    if isinstance(log, SinkJournal):
+        for entry in log.entries:
+            i = entry["state_index"]
+            writer.write_state(entry, lab=log.keyframes.get(i), delta=entry["delta"], removed=entry["removed"])
+    else:
+        previous = None
+        for state in log:
+            entry = {k: v for k, v in state.items() if k != "lab"}
+            lab = state["lab"]
+            if previous is None or writer.n_states % keyframe_interval == 0:
+                writer.write_state(entry, lab=lab)
+            else:
+                delta = {k: v for k, v in lab.dict_object.items() if previous.dict_object.get(k) is not v}
+                removed = [k for k in previous.dict_object if k not in lab.dict_object]
+                writer.write_state(entry, delta=delta, removed=removed)
+            previous = lab
+    writer.flush()
+
+
+def open_state_log(path: str | os.PathLike, cache_size: int = 16) -> StateLogReader:
+    """Open a state log, a pickled log of `Sink` is converted once to a state log next to it.
+
+    Parameters
+    ----------
+    path : str | os.PathLike
+        The path of a state log, or of the pickled log `sim_<model_name>.pkl` of the "full" or "journal" mode,
+        which is converted to `sim_<model_name>.states` unless that file is newer.
+    cache_size : int, optional
+        The number of reconstructed labs kept in cache. Default is 16.
+
+    """
+    path = os.fspath(path)
+    if path.endswith(".pkl"):
+        states_path = path[:-len(".pkl")] + ".states"
+        if not os.path.exists(states_path) or os.path.getmtime(states_path) < os.path.getmtime(path):
+            with open(path, "rb") as f:
+                write_state_log(states_path, pickle.load(f))
+        path = states_path
+    return StateLogReader(path, cache_size=cache_size)
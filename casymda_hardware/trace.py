@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+import os
+import pickle
+import struct
+import time
+from typing import Any, Callable, Iterator
+
+TRACE_FRAME_HEADER = struct.Struct("<I")
+"""Each frame of a trace file is a little-endian uint32 payload length followed by the pickled payload."""
+
+
+def pack_frame(record: Any) -> bytes:
+    """Pack a record as a frame.
+
+    Parameters
+    ----------
+    record : Any
+        The record to be packed, usually a dict.
+
+    Returns
+    -------
+    bytes
+        The header followed by the pickled record.
+
+    """
+    payload = pickle.dumps(record, protocol=pickle.HIGHEST_PROTOCOL)
+    return TRACE_FRAME_HEADER.pack(len(payload)) + payload
+
+
+def unpack_frames(buffer: bytes | memoryview, offset: int = 0) -> tuple[list[Any], int]:
+    """Unpack all complete frames in a buffer.
+
+    Parameters
+    ----------
+    buffer : bytes | memoryview
+        The buffer holding the frames.
+    offset : int, optional
+        Where to start reading. Default is 0.
+
+    Returns
+    -------
+    tuple[list[Any], int]
+        The unpacked records and the offset right after the last complete frame.
+
+    """
+    records = []
+    while offset + TRACE_FRAME_HEADER.size <= len(buffer):
+        (size,) = TRACE_FRAME_HEADER.unpack_from(buffer, offset)
+        end = offset + TRACE_FRAME_HEADER.size + size
+        if end > len(buffer):
+            # incomplete frame, the writer has not flushed it yet
+            break
+        records.append(pickle.loads(buffer[offset + TRACE_FRAME_HEADER.size: end]))
+        offset = end
+    return records, offset
+
+
+class TraceWriter:
+    def __init__(self, path: str | os.PathLike, flush_every: int = 100):
+        """Append-only writer of framed records.
+
+        Parameters
+        ----------
+        path : str | os.PathLike
+            The path of the trace file, an existing file will be truncated.
+        flush_every : int, optional
+            The number of records buffered in memory before they are appended to the file. Default is 100.
+
+        Notes
+        -----
+        Records are only ever appended, so a `TraceReader` can tail the file while it is being written.
+
+        """
+        assert flush_every > 0
+        self.path = path
+        self.flush_every = flush_every
+        self.n_written = 0
+        self.closed = False
+        self._buffer: list[bytes] = []
+        with open(self.path, "wb"):
+            pass
+
+    def write(self, record: Any):
+        """Buffer a record, flush if the buffer is full."""
+        if self.closed:
+            raise ValueError("write to a closed trace writer")
+        self._buffer.append(pack_frame(record))
+        if len(self._buffer) >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        """Append all buffered records to the file."""
+        if len(self._buffer) == 0:
+            return
+        with open(self.path, "ab") as f:
+            f.write(b"".join(self._buffer))
+        self.n_written += len(self._buffer)
+        self._buffer = []
+
+    def close(self):
+        """Append all buffered records to the file, no records can be written afterward."""
+        self.flush()
+        self.closed = True
+
+    def __enter__(self) -> TraceWriter:
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class TraceReader:
+    def __init__(self, path: str | os.PathLike):
+        """Reader of a trace file written by `TraceWriter`.
+
+        Parameters
+        ----------
+        path : str | os.PathLike
+            The path of the trace file.
+
+        """
+        self.path = path
+        self.offset = 0
+
+    def read_new(self) -> list[Any]:
+        """Read the records appended since the last call.
+
+        Returns
+        -------
+        list[Any]
+            The new records, incomplete trailing frames are left for the next call.
+
+        """
+        if not os.path.exists(self.path):
+            return []
+        with open(self.path, "rb") as f:
+            f.seek(self.offset)
+            buffer = f.read()
+        records, consumed = unpack_frames(buffer)
+        self.offset += consumed
+        return records
+
+    def follow(self, poll_interval: float = 0.5, stop: Callable[[], bool] = None) -> Iterator[Any]:
+        """Tail the trace file.
+
+        Parameters
+        ----------
+        poll_interval : float, optional
+            Seconds to wait before polling the file again. Default is 0.5.
+        stop : Callable[[], bool], optional
+            Stop following once this returns True and no new records are found.
+            Default is None, i.e. follow forever.
+
+        Yields
+        ------
+        Any
+            The records in the order they were written.
+
+        """
+        while True:
+            records = self.read_new()
+            yield from records
+            if len(records) == 0:
+                if stop is not None and stop():
+                    return
+                time.sleep(poll_interval)
+
+
+def read_trace(path: str | os.PathLike) -> list[Any]:
+    """Read all complete records of a trace file."""
+    return TraceReader(path).read_new()
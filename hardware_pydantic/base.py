@@ -1,9 +1,12 @@
 from __future__ import annotations
 
-from typing import Any, Literal, Type
+from contextlib import contextmanager
+from contextvars import ContextVar
+from copy import copy, deepcopy
+from typing import Any, Callable, ClassVar, Iterable, Iterator, Literal, Type
 
 from N2G import drawio_diagram  # only used for drawing instruction DAG
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PrivateAttr
 
 from .utils import str_uuid
 
@@ -65,13 +68,26 @@ class Device(LabObject):
     3. cannot change another device's state # TODO does this actually matter?
     """
 
+    action_registry: ClassVar[dict[str, Callable]] = dict()
+    """ action name -> action method (unbound), computed once per class, including inherited actions """
+
+    @classmethod
+    def build_action_registry(cls) -> dict[str, Callable]:
+        """ collect the action methods of this class, sorted by action name """
+        return {
+            k[len(DEVICE_ACTION_METHOD_PREFIX):]: getattr(cls, k)
+            for k in sorted(dir(cls)) if k.startswith(DEVICE_ACTION_METHOD_PREFIX)
+        }
+
+    @classmethod
+    def __pydantic_init_subclass__(cls, **kwargs: Any):
+        super().__pydantic_init_subclass__(**kwargs)
+        cls.action_registry = cls.build_action_registry()
+
     @property
     def action_names(self) -> list[str]:
         """ a sorted list of the names of all defined actions """
-        names = sorted(
-            {k[len(DEVICE_ACTION_METHOD_PREFIX):] for k in dir(self) if k.startswith(DEVICE_ACTION_METHOD_PREFIX)}
-        )
-        return names
+        return list(self.action_registry)
 
     def action__dummy(
             self,
@@ -106,11 +122,13 @@ class Device(LabObject):
             actor_type: Literal['pre', 'post', 'proj'] = 'pre',
             action_parameters: dict[str, Any] = None,
     ):
-        assert action_name in self.action_names, f"{action_name} not in {self.action_names}"
+        try:
+            action_method = self.action_registry[action_name]
+        except KeyError:
+            raise AssertionError(f"{action_name} not in {self.action_names}")
         if action_parameters is None:
             action_parameters = dict()
-        method_name = DEVICE_ACTION_METHOD_PREFIX + action_name
-        return getattr(self, method_name)(actor_type=actor_type, **action_parameters)
+        return action_method(self, actor_type=actor_type, **action_parameters)
 
     def act_by_instruction(self, i: Instruction, actor_type: DEVICE_ACTION_METHOD_ACTOR_TYPE):
         """ perform action with an instruction """
@@ -118,6 +136,9 @@ class Device(LabObject):
         return self.act(action_name=i.action_name, action_parameters=i.action_parameters, actor_type=actor_type)
 
 
+Device.action_registry = Device.build_action_registry()
+
+
 class Instruction(Individual):
     """
     an instruction sent to a device for an action
@@ -161,10 +182,39 @@ class Instruction(Individual):
             self.model_dump()
 
 
+def _referenced_identifiers(instruction: Instruction) -> list[str]:
+    """ the identifiers of the device and the lab objects in the action parameters of an instruction """
+    identifiers = [instruction.device.identifier]
+    identifiers += [v.identifier for v in instruction.action_parameters.values() if isinstance(v, LabObject)]
+    return identifiers
+
+
+def _rebind_instruction(instruction: Instruction, dict_object: dict[str, LabObject]) -> Instruction:
+    """ a shallow copy of an instruction referring to the objects of `dict_object` with the same identifiers """
+    action_parameters = {
+        k: dict_object.get(v.identifier, v) if isinstance(v, LabObject) else v
+        for k, v in instruction.action_parameters.items()
+    }
+    device = dict_object.get(instruction.device.identifier, instruction.device)
+    return instruction.model_copy(update={"device": device, "action_parameters": action_parameters})
+
+
 class Lab(BaseModel):
     dict_instruction: dict[str, Instruction] = dict()
     dict_object: dict[str, LabObject | Device] = dict()
 
+    _containees_index: dict[str, tuple[str, ...]] = PrivateAttr(default_factory=dict)
+    """ container identifier -> identifiers of all its containees, direct or not, in depth-first order """
+
+    _containers_index: dict[str, tuple[str, ...]] = PrivateAttr(default_factory=dict)
+    """ containee identifier -> identifiers of its container, the container of its container, etc. """
+
+    def __setstate__(self, state: dict[str, Any]):
+        super().__setstate__(state)
+        # labs pickled before the containment index existed
+        if self.__pydantic_private__ is None:
+            object.__setattr__(self, "__pydantic_private__", {"_containees_index": dict(), "_containers_index": dict()})
+
     def __getitem__(self, identifier: str):
         return self.dict_object[identifier]
 
@@ -191,6 +241,7 @@ class Lab(BaseModel):
     def add_object(self, d: LabObject | Device):
         assert d.identifier not in self.dict_object
         self.dict_object[d.identifier] = d
+        self.notify_containment_change()
 
     def remove_object(self, d: LabObject | Device | str):
         if isinstance(d, str):
@@ -199,11 +250,103 @@ class Lab(BaseModel):
         else:
             assert d.identifier in self.dict_object
             self.dict_object.pop(d.identifier)
+        self.notify_containment_change()
+
+    def get_containees(self, identifier: str) -> tuple[str, ...]:
+        """
+        identifiers of all lab objects held by a container, directly or not, in depth-first order
+
+        the result is cached until `notify_containment_change` is called for this container or its containees
+        """
+        try:
+            return self._containees_index[identifier]
+        except KeyError:
+            pass
+        containees = []
+        for containee in self.dict_object[identifier].slot_content.values():
+            if containee is None:
+                continue
+            containees.append(containee)
+            # only `LabContainer` has `slot_content`
+            if hasattr(self.dict_object[containee], "slot_content"):
+                containees += self.get_containees(containee)
+        containees = tuple(containees)
+        self._containees_index[identifier] = containees
+        return containees
+
+    def get_containers(self, identifier: str) -> tuple[str, ...]:
+        """
+        identifiers of the container of a lab object, the container of that container, etc.
+
+        the result is cached until `notify_containment_change` is called for this object or its containers
+        """
+        try:
+            return self._containers_index[identifier]
+        except KeyError:
+            pass
+        container_identifier = getattr(self.dict_object[identifier], "contained_by", None)
+        if container_identifier is None:
+            containers = ()
+        else:
+            containers = (container_identifier,) + self.get_containers(container_identifier)
+        self._containers_index[identifier] = containers
+        return containers
+
+    def notify_containment_change(self, *identifiers: str):
+        """
+        invalidate the containment index after `slot_content` or `contained_by` of lab objects changed
+
+        the identifiers should include every object whose `slot_content` or `contained_by` changed, e.g. the moved
+        object and its source and destination containers, call without identifiers to clear the whole index
+        """
+        # chains of containers are short, they are always rebuilt
+        self._containers_index.clear()
+        if len(identifiers) == 0:
+            self._containees_index.clear()
+            return
+        for identifier in identifiers:
+            # this object and all of its containers hold different containees now
+            current = identifier
+            while current is not None:
+                self._containees_index.pop(current, None)
+                current = getattr(self.dict_object.get(current), "contained_by", None)
 
     @property
     def state(self) -> dict[str, dict[str, Any]]:
         return {d.identifier: d.state for d in self.dict_object.values()}
 
+    def snapshot(self, dirty: Iterable[str] | None = None, previous: Lab | None = None) -> Lab:
+        """
+        a copy of the lab recording its current state, snapshots should be treated as read-only
+
+        if `previous`, an earlier snapshot of this lab, is given, only the objects in `dirty` and the objects added
+        since `previous` are copied, all the others are shared with `previous`,
+        so `dirty` must include every object changed since `previous` was taken,
+        the instructions of a snapshot refer to the device and lab objects of the same snapshot
+        """
+        if previous is None or dirty is None:
+            return deepcopy(self)
+        dirty = set(dirty)
+        copied = set()
+        dict_object = dict()
+        for k, v in self.dict_object.items():
+            if k in dirty or k not in previous.dict_object:
+                dict_object[k] = deepcopy(v)
+                copied.add(k)
+            else:
+                dict_object[k] = previous.dict_object[k]
+        # the device and lab objects of the instructions are the objects of this snapshot
+        dict_instruction = dict()
+        for k, ins in self.dict_instruction.items():
+            previous_ins = previous.dict_instruction.get(k)
+            if previous_ins is None:
+                dict_instruction[k] = _rebind_instruction(deepcopy(ins), dict_object)
+            elif copied.isdisjoint(_referenced_identifiers(previous_ins)):
+                dict_instruction[k] = previous_ins
+            else:
+                dict_instruction[k] = _rebind_instruction(previous_ins, dict_object)
+        return self.__class__.model_construct(dict_instruction=dict_instruction, dict_object=dict_object)
+
     def dict_object_by_class(self, object_class: Type):
         return {k: v for k, v in self.dict_object.items() if v.__class__ == object_class}
 
@@ -228,3 +371,70 @@ class Lab(BaseModel):
                 pre_ins_node = f"{pre_ins.identifier}\n{pre_ins.description}"
                 diagram.add_link(pre_ins_node, this_ins_node, style="endArrow=classic")
         return diagram
+
+
+class LabProxy:
+    """
+    a module-level lab, e.g. `JUNIOR_LAB`, standing for the lab of the current context
+
+    lab objects and instructions of a platform register themselves in the proxy of the platform when created,
+    so everything created in `with JUNIOR_LAB.context() as lab:` goes to `lab` and leaves the labs of other
+    contexts untouched, this allows building and simulating many independent labs in one process
+
+    outside any context the proxy stands for a default lab shared by the whole process,
+    contexts are local to the thread or `asyncio` task that entered them
+    """
+
+    def __init__(self, name: str):
+        self._lab_var: ContextVar[Lab] = ContextVar(name, default=Lab())
+
+    def resolve(self) -> Lab:
+        """ the lab of the current context """
+        return self._lab_var.get()
+
+    @contextmanager
+    def context(self, lab: Lab | None = None) -> Iterator[Lab]:
+        """ make `lab`, or a new empty lab if not given, the lab of this proxy within the `with` block """
+        if lab is None:
+            lab = Lab()
+        token = self._lab_var.set(lab)
+        try:
+            yield lab
+        finally:
+            self._lab_var.reset(token)
+
+    def __getattr__(self, name: str):
+        return getattr(self._lab_var.get(), name)
+
+    def __getitem__(self, identifier: str):
+        return self._lab_var.get().dict_object[identifier]
+
+    def __setitem__(self, key, value):
+        raise NotImplementedError
+
+    def __copy__(self) -> Lab:
+        return copy(self.resolve())
+
+    def __deepcopy__(self, memo: dict) -> Lab:
+        return deepcopy(self.resolve(), memo)
+
+    def __reduce__(self):
+        # pickled as the lab of the current context
+        return _unpickle_proxied_lab, (self.resolve(),)
+
+    def __repr__(self):
+        return repr(self.resolve())
+
+    def __str__(self):
+        return str(self.resolve())
+
+
+def _unpickle_proxied_lab(lab: Lab) -> Lab:
+    return lab
+
+
+def resolve_lab(lab: Lab | LabProxy) -> Lab:
+    """ the lab a proxy currently stands for, or the lab itself """
+    if isinstance(lab, LabProxy):
+        return lab.resolve()
+    return lab
@@ -22,7 +22,7 @@ class JuniorMage(Device, JuniorLabObject):
         elif actor_type == 'post':
             vial.chemical_content = chemical
         elif actor_type == 'proj':
-            return vial, time_cost
+            return [vial, ], time_cost
         else:
             raise ValueError
 
@@ -46,6 +46,7 @@ class JuniorMage(Device, JuniorLabObject):
                 v.contained_by = in_rack.identifier
                 v.contained_in_slot = vk
                 in_rack.slot_content[vk] = v.identifier
+            JUNIOR_LAB.notify_containment_change(in_rack.identifier)
         elif actor_type == 'proj':
             return vials + [in_rack, ], time_cost
         else:
@@ -73,6 +74,7 @@ class JuniorMage(Device, JuniorLabObject):
                 v.contained_in_slot = None
                 v.contained_by = None
                 JUNIOR_LAB.remove_object(v)
+                JUNIOR_LAB.notify_containment_change(rack.identifier)
         elif actor_type == 'proj':
             return vials + [JUNIOR_LAB[v.contained_by] for v in vials], time_cost
 
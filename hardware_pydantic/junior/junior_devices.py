@@ -9,6 +9,7 @@ from hardware_pydantic.junior.junior_objects import JuniorRack, JuniorZ1Needle,
 from hardware_pydantic.junior.settings import *
 from hardware_pydantic.junior.utils import running_time_washing
 from hardware_pydantic.lab_objects import LabContainer, LabContainee, ChemicalContainer
+from hardware_pydantic.travel import move_cost
 
 
 
@@ -95,14 +96,18 @@ class JuniorSlot(JuniorBaseHeater, JuniorBaseStirrer):
             The slot to put the rack in.
 
         """
-        if rack.contained_by is not None:
-            prev_slot = JUNIOR_LAB[rack.contained_by]
+        prev_slot_id = rack.contained_by
+        if prev_slot_id is not None:
+            prev_slot = JUNIOR_LAB[prev_slot_id]
             assert isinstance(prev_slot, JuniorSlot)
             prev_slot.slot_content["SLOT"] = None
         assert rack.__class__.__name__ in slot.can_contain
         rack.contained_by = slot.identifier
         rack.contained_in_slot = "SLOT"
         slot.slot_content["SLOT"] = rack.identifier
+        JUNIOR_LAB.notify_containment_change(
+            *[i for i in (rack.identifier, prev_slot_id, slot.identifier) if i is not None]
+        )
 
 
 class JuniorArmPlatform(Device, LabContainer, JuniorLabObject):
@@ -148,12 +153,9 @@ class JuniorArmPlatform(Device, LabContainer, JuniorLabObject):
         ValueError
             If the actor type is not one of 'pre', 'post', or 'proj'.
         """
-        # it takes time zero to move to the same slot
-        if self.position_on_top_of == move_to_slot.identifier:
-            move_cost = 1e-6
-        # it takes 5 seconds to move to a different slot
-        else:
-            move_cost = 5
+        # it takes time zero to move to the same slot, 5 seconds to a different slot unless a travel model
+        # is used, see `hardware_pydantic.travel`
+        time_cost = move_cost(self.position_on_top_of, move_to_slot.identifier)
 
         if actor_type == 'pre':
             if anchor_arm.identifier not in self.get_all_containees(self, JUNIOR_LAB):
@@ -163,7 +165,7 @@ class JuniorArmPlatform(Device, LabContainer, JuniorLabObject):
             self.anchor_arm = anchor_arm.identifier
         elif actor_type == 'proj':
             containees = self.get_all_containees(container=self, lab=JUNIOR_LAB)
-            return [JUNIOR_LAB[i] for i in containees], move_cost
+            return [JUNIOR_LAB[i] for i in containees], time_cost
         else:
             raise ValueError
 
@@ -527,6 +529,7 @@ class JuniorArmZ2(LabContainer, LabContainee, JuniorBaseLiquidDispenser):
                 dest_slot.disposal_content.append(thing.identifier)
                 thing.contained_by = None
                 thing.contained_in_slot = None  # disposal doesn't have slot labels
+                JUNIOR_LAB.notify_containment_change(thing.identifier, thing_container.identifier)
         elif actor_type == 'proj':
             # putting down SV Powder Dispense Tool
             if isinstance(thing, JuniorSvt):
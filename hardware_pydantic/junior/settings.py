@@ -2,13 +2,13 @@ from __future__ import annotations
 
 from typing import Literal
 
-from hardware_pydantic.base import Lab, LabObject, Instruction, BaseModel
+from hardware_pydantic.base import Lab, LabProxy, LabObject, Instruction, BaseModel
 
 JUNIOR_LAYOUT_SLOT_SIZE_X = 80
 JUNIOR_LAYOUT_SLOT_SIZE_Y = 120
 JUNIOR_LAYOUT_SLOT_SIZE_X_SMALL = 40
 JUNIOR_LAYOUT_SLOT_SIZE_Y_SMALL = 20
-JUNIOR_LAB = Lab()
+JUNIOR_LAB = LabProxy("JUNIOR_LAB")
 JUNIOR_VIAL_TYPE = Literal["HRV", "MRV", "SV"]
 
 
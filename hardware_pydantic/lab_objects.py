@@ -80,15 +80,10 @@ class LabContainer(LabObject):
         if we are requesting a container as a resource, we should always also request its containees
         ex. if an arm is trying to move a plate while another arm is aspirating liquid from a vial on this plate,
         the former arm should wait for the vial until it is released by the aspiration action
+
+        the containees are looked up in the containment index of the lab, see `Lab.get_containees`
         """
-        containees = []
-        for containee in container.slot_content.values():
-            if containee is None:
-                continue
-            containees.append(containee)
-            if isinstance(lab[containee], LabContainer):
-                containees += LabContainer.get_all_containees(lab[containee], lab)
-        return containees
+        return list(lab.get_containees(container.identifier))
 
 
 class LabContainee(LabObject):
@@ -104,8 +99,9 @@ class LabContainee(LabObject):
 
     @staticmethod
     def move(containee: LabContainee, dest_container: LabContainer, lab: Lab, dest_slot: str = "SLOT"):
-        if containee.contained_by is not None:
-            source_container = lab[containee.contained_by]
+        source_container_id = containee.contained_by
+        if source_container_id is not None:
+            source_container = lab[source_container_id]
             source_container: LabContainer
             assert source_container.slot_content[containee.contained_in_slot] == containee.identifier
             source_container.slot_content[containee.contained_in_slot] = None
@@ -113,17 +109,24 @@ class LabContainee(LabObject):
         dest_container.slot_content[dest_slot] = containee.identifier
         containee.contained_by = dest_container.identifier
         containee.contained_in_slot = dest_slot
+        if source_container_id is None:
+            lab.notify_containment_change(containee.identifier, dest_container.identifier)
+        else:
+            lab.notify_containment_change(containee.identifier, source_container_id, dest_container.identifier)
 
     @staticmethod
     def get_container(containee: LabContainee, lab: Lab, upto: Type = None) -> LabContainer | None:
+        """
+        the direct container if it is an instance of `upto`, otherwise the outermost container,
+        the containee itself if it is not contained
+        """
         current_container_id = containee.contained_by
         if current_container_id is None:
             return containee
-        else:
-            current_container = lab[current_container_id]
-            if upto is not None and isinstance(current_container, upto):
-                return current_container
-            elif isinstance(current_container, LabContainee):
-                return LabContainee.get_container(current_container, lab)
-            else:
-                return current_container
+        current_container = lab[current_container_id]
+        if upto is not None and isinstance(current_container, upto):
+            return current_container
+        containers = lab.get_containers(current_container_id)
+        if len(containers) == 0:
+            return current_container
+        return lab[containers[-1]]
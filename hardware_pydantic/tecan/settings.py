@@ -2,13 +2,13 @@ from __future__ import annotations
 
 from typing import Literal
 
-from hardware_pydantic.base import Lab, LabObject, Instruction, BaseModel
+from hardware_pydantic.base import Lab, LabProxy, LabObject, Instruction, BaseModel
 
 TECAN_LAYOUT_SLOT_SIZE_X = 80
 TECAN_LAYOUT_SLOT_SIZE_Y = 120
 TECAN_LAYOUT_SLOT_SIZE_X_SMALL = 40
 TECAN_LAYOUT_SLOT_SIZE_Y_SMALL = 20
-TECAN_LAB = Lab()
+TECAN_LAB = LabProxy("TECAN_LAB")
 TECAN_VIAL_TYPE = Literal["HRV", "MRV", "SV"]
 
 
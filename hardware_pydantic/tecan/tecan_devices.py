@@ -4,6 +4,7 @@ from hardware_pydantic.base import Device, DEVICE_ACTION_METHOD_ACTOR_TYPE, PreA
 from hardware_pydantic.tecan.settings import *
 from hardware_pydantic.tecan.tecan_base_devices import TecanBaseHeater, TecanBaseLiquidDispenser
 from hardware_pydantic.tecan.tecan_objects import *
+from hardware_pydantic.travel import move_cost
 
 
 class TecanSlot(TecanBaseHeater):
@@ -37,14 +38,18 @@ class TecanSlot(TecanBaseHeater):
 
     @staticmethod
     def put_plate_in_a_slot(plate: TecanPlate, tecan_slot: TecanSlot):
-        if plate.contained_by is not None:
-            prev_slot = TECAN_LAB[plate.contained_by]
+        prev_slot_id = plate.contained_by
+        if prev_slot_id is not None:
+            prev_slot = TECAN_LAB[prev_slot_id]
             assert isinstance(prev_slot, TecanSlot)
             prev_slot.slot_content["SLOT"] = None
         assert plate.__class__.__name__ in tecan_slot.can_contain
         plate.contained_by = tecan_slot.identifier
         plate.contained_in_slot = "SLOT"
         tecan_slot.slot_content["SLOT"] = plate.identifier
+        TECAN_LAB.notify_containment_change(
+            *[i for i in (plate.identifier, prev_slot_id, tecan_slot.identifier) if i is not None]
+        )
 
 
 class TecanArm(Device, LabContainer, TecanLabObject):
@@ -62,10 +67,7 @@ class TecanArm(Device, LabContainer, TecanLabObject):
         PARAMS:
             - wait_time: float = 0
         """
-        if self.position_on_top_of == move_to_slot.identifier:
-            move_cost = 1e-6
-        else:
-            move_cost = 5
+        time_cost = move_cost(self.position_on_top_of, move_to_slot.identifier)
 
         if actor_type == 'pre':
             return
@@ -73,7 +75,7 @@ class TecanArm(Device, LabContainer, TecanLabObject):
             self.position_on_top_of = move_to_slot.identifier
         elif actor_type == 'proj':
             containees = self.get_all_containees(container=self, lab=TECAN_LAB)
-            return [TECAN_LAB[i] for i in containees], move_cost
+            return [TECAN_LAB[i] for i in containees], time_cost
         else:
             raise ValueError
 
@@ -80,4 +80,4 @@ def create_tecan_base():
 
     arm_z2 = TecanArm2(identifier='ARM-2', )
 
-    return TECAN_LAB
+    return TECAN_LAB.resolve()
@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Literal
+
+import numpy as np
+
+from .base import Lab, LabObject
+
+FLAT_MOVE_COST = 5
+""" the time cost of moving an arm to a different position without a travel model """
+
+SAME_POSITION_MOVE_COST = 1e-6
+""" the time cost of moving an arm to where it already is """
+
+TRAVEL_METRIC = Literal["chebyshev", "euclidean", "manhattan"]
+
+
+def layout_center(obj: LabObject) -> tuple[float, float] | None:
+    """ the center of the layout box of a lab object, None if it does not appear in the layout """
+    layout = getattr(obj, "layout", None)
+    if layout is None or layout.layout_position is None:
+        return None
+    x, y = layout.layout_position
+    return x + layout.layout_x / 2, y + layout.layout_y / 2
+
+
+class TravelTimeModel:
+    """
+    time costs of arm moves from the distances between the layout boxes of a lab
+
+    moving between two positions takes `overhead + distance / speed`, the slot-to-slot distances between the
+    centers of all lab objects in the layout are computed once, moves from or to positions outside the layout,
+    e.g. an arm that has not moved yet, take `FLAT_MOVE_COST`
+
+    the distance is "chebyshev" by default as the axes of a gantry arm move at the same time,
+    if `speed` is not given it is calibrated so that a move between two positions takes `mean_move_time` on average
+    """
+
+    def __init__(
+            self,
+            lab: Lab,
+            speed: float | None = None,
+            overhead: float = 1.0,
+            metric: TRAVEL_METRIC = "chebyshev",
+            mean_move_time: float = FLAT_MOVE_COST,
+    ):
+        centers = {k: layout_center(v) for k, v in lab.dict_object.items()}
+        centers = {k: v for k, v in centers.items() if v is not None}
+        self.index: dict[str, int] = {k: i for i, k in enumerate(centers)}
+        xy = np.array(list(centers.values()), dtype=float).reshape(-1, 2)
+        delta = np.abs(xy[:, None, :] - xy[None, :, :])
+        if metric == "chebyshev":
+            self.distances = delta.max(axis=-1)
+        elif metric == "euclidean":
+            self.distances = np.sqrt((delta ** 2).sum(axis=-1))
+        elif metric == "manhattan":
+            self.distances = delta.sum(axis=-1)
+        else:
+            raise ValueError(f"unknown metric: {metric}")
+        self.overhead = overhead
+        self.metric = metric
+
+        if speed is None:
+            n = len(self.index)
+            if n < 2 or mean_move_time <= overhead:
+                raise ValueError("cannot calibrate the speed, give it explicitly")
+            mean_distance = self.distances.sum() / (n * (n - 1))
+            speed = mean_distance / (mean_move_time - overhead)
+        self.speed = speed
+
+    def travel_time(self, src: str | None, dest: str) -> float:
+        """ the time cost of moving from the position `src` to the position `dest` """
+        if src == dest:
+            return SAME_POSITION_MOVE_COST
+        if src not in self.index or dest not in self.index:
+            return FLAT_MOVE_COST
+        return float(self.overhead + self.distances[self.index[src], self.index[dest]] / self.speed)
+
+
+_TRAVEL_MODEL: ContextVar[TravelTimeModel | None] = ContextVar("TRAVEL_MODEL", default=None)
+
+
+@contextmanager
+def use_travel_model(model: TravelTimeModel | None) -> Iterator[TravelTimeModel | None]:
+    """ make the move actions use `model` within the `with` block, None for the flat time cost """
+    token = _TRAVEL_MODEL.set(model)
+    try:
+        yield model
+    finally:
+        _TRAVEL_MODEL.reset(token)
+
+
+def move_cost(src: str | None, dest: str) -> float:
+    """ the time cost of an arm move with the travel model of the current context, if any """
+    model = _TRAVEL_MODEL.get()
+    if model is not None:
+        return model.travel_time(src, dest)
+    if src == dest:
+        return SAME_POSITION_MOVE_COST
+    return FLAT_MOVE_COST
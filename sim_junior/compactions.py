@@ -0,0 +1,35 @@
+"""
+compact the instruction DAGs of the example workflows, keeping only the ordering constraints between instructions
+that touch the same lab objects, and compare the makespans before and after
+
+usage: python compactions.py [script ...]
+"""
+import argparse
+import os.path
+
+from casymda_hardware.compaction import compaction_report
+from casymda_hardware.replication import load_lab
+from hardware_pydantic.junior import JUNIOR_LAB
+from hardware_pydantic.tecan import TECAN_LAB
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+EXAMPLES = [
+    os.path.join(HERE, "sulfonylation", "parallel.py"),
+    os.path.join(HERE, "tips_pn", "grignard.py"),
+    os.path.join(HERE, "tips_pn", "quinone.py"),
+    os.path.join(HERE, "tips_pn", "tandem.py"),
+]
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument("scripts", nargs="*", default=EXAMPLES)
+    print("script", "n_instructions", "n_edges", "n_edges_reduced", "n_edges_compacted",
+          "makespan_before", "makespan_after", sep="\t")
+    for script in parser.parse_args().scripts:
+        with JUNIOR_LAB.context(), TECAN_LAB.context():
+            lab = load_lab(script)
+        report = compaction_report(lab, JUNIOR_LAB, TECAN_LAB)
+        print(os.path.basename(script), report["n_instructions"], report["n_edges"], report["n_edges_reduced"],
+              report["n_edges_compacted"], report["makespan_before"], report["makespan_after"], sep="\t")
+        if "error" in report:
+            print(f"  compacted instructions failed: {report['error']}")
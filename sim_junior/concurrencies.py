@@ -1,35 +1,24 @@
+import os.path
+
 import pandas as pd
 import plotly.express as px
-import pickle
-
 
-data = dict()
-for i in [1, 4, 6]:
-    with open(f"sim_con-{i}.pkl", "rb") as f:  # these were generated from `sim_junior.py`
-        sim_logs = pickle.load(f)
-        data[i] = sim_logs
+from casymda_hardware.columnar import convert_log, load_columnar_trace
 
-df_data = []
+dfs = []
 for i in [1, 4, 6]:
-   sim_logs = data[i]
-   for state in sim_logs:
-       cost = state['finished'] - state['last_entry']
-       try:
-           task = state['instruction'].description.split(":")[0]
-       except AttributeError:
-           continue
-       if task.startswith("wait"):
-           continue
-       df_data.append(
-           {
-               "concurrency": str(i),
-               "time_cost": cost,
-               "task": task
-           }
-       )
+    # these were generated from `sim_junior.py`, older runs only have the pickled log
+    columns_path = f"sim_con-{i}.columns"
+    if not os.path.exists(columns_path):
+        convert_log(f"sim_con-{i}.pkl", columns_path, concurrency=i)
+    dfs.append(load_columnar_trace(columns_path))
 
-df = pd.DataFrame(df_data)
+df = pd.concat(dfs, ignore_index=True)
+df["concurrency"] = df["concurrency"].astype(str)
+df["time_cost"] = df["finished"] - df["last_entry"]
+df["task"] = df["description"].astype(str).str.split(":").str[0]
+df = df[~df["task"].str.startswith("wait")][["concurrency", "time_cost", "task"]]
 
 print(df)
 fig = px.histogram(df, x="task", y="time_cost", color='concurrency', barmode='group', height=800)
-fig.show()
\ No newline at end of file
+fig.show()
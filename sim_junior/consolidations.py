@@ -0,0 +1,48 @@
+"""
+remove the redundant arm moves and pick-ups of the example workflows, and compare the total travel times and the
+makespans before and after, with the flat move time cost or with travel times from the layout distances
+
+usage: python consolidations.py [--travel] [script ...]
+"""
+import argparse
+import os.path
+
+from casymda_hardware.consolidation import consolidation_report
+from casymda_hardware.replication import load_lab
+from hardware_pydantic.junior import JUNIOR_LAB
+from hardware_pydantic.tecan import TECAN_LAB
+from hardware_pydantic.travel import TravelTimeModel
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+EXAMPLES = [
+    os.path.join(HERE, "sulfonylation", "parallel.py"),
+    os.path.join(HERE, "tips_pn", "grignard.py"),
+    os.path.join(HERE, "tips_pn", "quinone.py"),
+    os.path.join(HERE, "tips_pn", "tandem.py"),
+]
+
+
+def fmt(t: float | None) -> str:
+    return "-" if t is None else f"{t:.2f}"
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument("scripts", nargs="*", default=EXAMPLES)
+    parser.add_argument("--travel", action="store_true", help="time the moves by the distances in the layout")
+    args = parser.parse_args()
+
+    print("script", "n_instructions", "n_idle_move", "n_consecutive_move", "n_round_trip",
+          "travel_time_before", "travel_time_after", "makespan_before", "makespan_after", "time_saved", sep="\t")
+    for script in args.scripts:
+        with JUNIOR_LAB.context(), TECAN_LAB.context():
+            lab = load_lab(script)
+        report = consolidation_report(
+            lab, JUNIOR_LAB, TECAN_LAB, travel_model=TravelTimeModel(lab) if args.travel else None
+        )
+        print(os.path.basename(script), report["n_instructions"], report["n_idle_move"],
+              report["n_consecutive_move"], report["n_round_trip"],
+              *(fmt(report[k]) for k in ("travel_time_before", "travel_time_after", "makespan_before",
+                                         "makespan_after", "time_saved")), sep="\t")
+        if "error" in report:
+            print(f"  consolidated instructions failed: {report['error']}")
@@ -0,0 +1,59 @@
+"""
+critical paths of the example workflows, from the durations projected without waits for devices and lab objects,
+and from a simulation run with `HeapEngine`
+
+usage: python critical_paths.py [script ...]
+"""
+import argparse
+import os.path
+
+from casymda_hardware.critical_path import (
+    CriticalPathAnalysis, projected_durations, summarize_path, trace_critical_path,
+)
+from casymda_hardware.heap_engine import HeapEngine
+from casymda_hardware.replication import load_lab
+from hardware_pydantic.junior import JUNIOR_LAB
+from hardware_pydantic.tecan import TECAN_LAB
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+EXAMPLES = [
+    os.path.join(HERE, "sulfonylation", "parallel.py"),
+    os.path.join(HERE, "tips_pn", "tandem.py"),
+]
+
+
+def print_rows(rows: list[dict], n: int = 10):
+    for r in rows[:n]:
+        print(f"  {r['duration']:10.2f}  {r['n_instructions']:4d}  {r['device']:<16}  {r['task']}")
+
+
+def analyze(script_path: str):
+    print(os.path.basename(script_path))
+
+    with JUNIOR_LAB.context(), TECAN_LAB.context():
+        lab = load_lab(script_path)
+        durations = projected_durations(lab)
+    analysis = CriticalPathAnalysis(lab, durations)
+    n_critical = sum(analysis.is_critical(k) for k in analysis.order)
+    print(f"projected: lower bound of makespan {analysis.makespan:.2f}, "
+          f"{n_critical} of {len(analysis.order)} instructions without slack")
+    print_rows(summarize_path(lab, analysis.critical_path, durations))
+
+    with JUNIOR_LAB.context(), TECAN_LAB.context():
+        lab = load_lab(script_path)
+        engine = HeapEngine(lab)
+        makespan = engine.run()
+    path = trace_critical_path(lab, engine.start_time, engine.finish_time)
+    durations = {k: engine.finish_time[k] - engine.start_time[k] for k in engine.finish_time}
+    kinds = [kind for _, kind in path]
+    print(f"simulated: makespan {makespan:.2f}, {len(path)} instructions on the critical path, waiting for "
+          f"{kinds.count('precedence')} preceding instructions, {kinds.count('device')} devices "
+          f"and {kinds.count('object')} lab objects")
+    print_rows(summarize_path(lab, [k for k, _ in path], durations))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument("scripts", nargs="*", default=EXAMPLES)
+    for script in parser.parse_args().scripts:
+        analyze(script)
@@ -0,0 +1,50 @@
+"""
+compare the dispatch policies deciding which waiting instruction gets a busy device next on the example workflows,
+optionally after compacting their instruction DAGs, which lets more instructions wait for the same device
+
+usage: python dispatch_policies.py [--compact] [script ...]
+"""
+import argparse
+import os.path
+
+from casymda_hardware.compaction import apply_dependencies, compaction_report
+from casymda_hardware.critical_path import run_on_copy
+from casymda_hardware.dispatch import DISPATCH_POLICIES
+from casymda_hardware.heap_engine import HeapEngine
+from casymda_hardware.replication import load_lab
+from hardware_pydantic.junior import JUNIOR_LAB
+from hardware_pydantic.tecan import TECAN_LAB
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+EXAMPLES = [
+    os.path.join(HERE, "sulfonylation", "parallel.py"),
+    os.path.join(HERE, "tips_pn", "grignard.py"),
+    os.path.join(HERE, "tips_pn", "quinone.py"),
+    os.path.join(HERE, "tips_pn", "tandem.py"),
+]
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument("scripts", nargs="*", default=EXAMPLES)
+    parser.add_argument("--compact", action="store_true", help="compact the instruction DAGs first")
+    args = parser.parse_args()
+
+    print("script", "policy", "makespan", "gain over fcfs", "utilization: ARM PLATFORM", sep="\t")
+    for script in args.scripts:
+        with JUNIOR_LAB.context(), TECAN_LAB.context():
+            lab = load_lab(script)
+        if args.compact:
+            apply_dependencies(lab, compaction_report(lab, JUNIOR_LAB, TECAN_LAB)["preceding"])
+        makespan_fcfs = None
+        for name, policy_class in DISPATCH_POLICIES.items():
+            policy = policy_class.from_lab(lab, JUNIOR_LAB, TECAN_LAB)
+
+            def simulate(lab_copy):
+                engine = HeapEngine(lab_copy, dispatch_policy=policy)
+                return engine.run(), engine.device_utilization
+
+            makespan, utilization = run_on_copy(simulate, lab, JUNIOR_LAB, TECAN_LAB)
+            if makespan_fcfs is None:
+                makespan_fcfs = makespan
+            print(os.path.basename(script), name, f"{makespan:.2f}", f"{makespan_fcfs - makespan:.2f}",
+                  f"{utilization.get('ARM PLATFORM', 0.0):.3f}", sep="\t")
@@ -0,0 +1,25 @@
+import json
+import os.path
+
+from casymda_hardware.replication import run_replications, summarize_replications
+
+# relative scales of the durations, the hardcoded costs of arm actions (e.g. 29 s to pick up the SV tool) and moves
+# vary less than the liquid handling fitted in `hardware_pydantic.junior.utils`
+DISTRIBUTIONS = {
+    "move_to": ("triangular", 0.2),
+    "pick_up": ("triangular", 0.1),
+    "put_down": ("triangular", 0.1),
+    "concurrent_aspirate": ("lognormal", 0.15),
+    "concurrent_dispense": ("lognormal", 0.15),
+    "aspirate_pdp": ("lognormal", 0.15),
+    "dispense_pdp": ("lognormal", 0.15),
+    "dispense_sv": ("gamma", 0.2),
+    "wash": ("normal", 0.1),
+}
+
+if __name__ == '__main__':
+    results = run_replications(
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), "sulfonylation", "parallel.py"),
+        n_replications=200, distributions=DISTRIBUTIONS, seed=42,
+    )
+    print(json.dumps(summarize_replications(results), indent=2))
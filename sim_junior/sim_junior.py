@@ -1,127 +1,75 @@
+import os.path
+
+import simpy
+
+from casymda_hardware.events import SocketPublisher
+from casymda_hardware.model import Model
 from hardware_pydantic.junior import *
 
 """
 following the notes of N-Sulfonylation 
 """
 
-create_junior_base()
-
 # CONCURRENCY = 4
 CONCURRENCY = 1
 
-# RACK A: holding HRVs with DCM, on off deck initially
-RACK_A, RACK_A_VIALS = JuniorRack.create_rack_with_empty_vials(
-    n_vials=CONCURRENCY, rack_capacity=6, vial_type="HRV", rack_id="RACK A"
-)
-RACK_A: JuniorRack
-RACK_A_VIALS: list[JuniorVial]
-for v in RACK_A_VIALS:
-    v.chemical_content = {"DCM": 1000}
-JuniorSlot.put_rack_in_a_slot(RACK_A, JUNIOR_LAB['SLOT OFF-1'])
-
-# RACK B: holding HRVs for reactions, at 2-3-2 initially, one for RSO2Cl stock solution, another for pyridine source
-RACK_B, RACK_B_VIALS = JuniorRack.create_rack_with_empty_vials(
-    n_vials=CONCURRENCY + 1, rack_capacity=8, vial_type="HRV", rack_id="RACK B"
-)
-RACK_B: JuniorRack
-RACK_B_VIALS: list[JuniorVial]
-JuniorSlot.put_rack_in_a_slot(RACK_B, JUNIOR_LAB['SLOT 2-3-2'])
-
-# RACK C: holding one MRV for reaction, at 2-3-1 initially
-RACK_C, RACK_C_VIALS = JuniorRack.create_rack_with_empty_vials(
-    n_vials=CONCURRENCY, rack_capacity=6, vial_type="MRV", rack_id="RACK C"
-)
-RACK_C: JuniorRack
-RACK_C_VIALS: list[JuniorVial]
-JuniorSlot.put_rack_in_a_slot(RACK_C, JUNIOR_LAB['SLOT 2-3-1'])
-
-# RACK D: holding PDP tips, at 2-3-3 initially
-RACK_D, RACK_D_TIPS = JuniorRack.create_rack_with_empty_tips(
-    n_tips=CONCURRENCY, rack_capacity=6, rack_id="RACK D", tip_id_inherit=True
-)
-RACK_D: JuniorRack
-RACK_D_TIPS: list[JuniorPdpTip]
-JuniorSlot.put_rack_in_a_slot(RACK_D, JUNIOR_LAB['SLOT 2-3-3'])
-
-# SV VIALS, one for solid amine (aniline), another for RSO2Cl, each sits in a SVV SLOT
-SVV_1 = JuniorVial(
-    identifier="SV VIAL 1", contained_by=JUNIOR_LAB['SVV SLOT 1'].identifier,
-    chemical_content={'solid amine': 1000},
-    vial_type='SV',
-)
-SVV_2 = JuniorVial(
-    identifier="SV VIAL 2", contained_by=JUNIOR_LAB['SVV SLOT 2'].identifier,
-    chemical_content={'sulfonyl chloride': 1000},
-    vial_type='SV',
-)
-JUNIOR_LAB['SVV SLOT 1'].slot_content['SLOT'] = SVV_1.identifier
-JUNIOR_LAB['SVV SLOT 2'].slot_content['SLOT'] = SVV_2.identifier
-
-# INSTRUCTIONS
-Z1_ARM = JUNIOR_LAB['Z1 ARM']
-Z2_ARM = JUNIOR_LAB['Z2 ARM']
-ARM_PLATFORM = JUNIOR_LAB['ARM PLATFORM']
-
-Z1NEEDLES = [JUNIOR_LAB[f"Z1 Needle {i + 1}"] for i in range(CONCURRENCY)]
-
-VPG = JUNIOR_LAB['VPG']
-VPG_SLOT = JUNIOR_LAB['VPG SLOT']
-SV_TOOL = JUNIOR_LAB['SV TOOL']
-SV_TOOL_SLOT = JUNIOR_LAB['SV TOOL SLOT']
-BALANCE_SLOT = JUNIOR_LAB['BALANCE SLOT']
-
-PDP_1 = JUNIOR_LAB['PDT 1']
-
-DCM_VIALS = RACK_A_VIALS
-MRV_VIALS = RACK_C_VIALS
-PYRIDINE_VIAL = RACK_B_VIALS[0]
-RSO2Cl_STOCK_SOLUTION_VIALS = RACK_B_VIALS[1:]
-PYRIDINE_VIAL.chemical_content = {"pyridine": 1000}
+# the name of the log files of the run, also read by `vis_junior`
+MODEL_NAME = f"con-{CONCURRENCY}"
+
+# the capacity of the racks holding the reactors, their HRVs and their tips
+MAX_REACTORS = 6
+
+# publish the finished instructions so `vis_junior` can follow the run, see its `LIVE_ADDRESS`
+LIVE = False
 
 
 def pick_drop_rack_to(rack: JuniorRack, src_slot: JuniorSlot, dest_slot: JuniorSlot):
+    arm_platform = JUNIOR_LAB['ARM PLATFORM']
+    z2_arm = JUNIOR_LAB['Z2 ARM']
+    vpg_slot = JUNIOR_LAB['VPG SLOT']
+    vpg = JUNIOR_LAB['VPG']
     ins1 = JuniorInstruction(
-        device=ARM_PLATFORM, action_name="move_to",
+        device=arm_platform, action_name="move_to",
         action_parameters={
-            "anchor_arm": Z2_ARM,
-            "move_to_slot": VPG_SLOT,
+            "anchor_arm": z2_arm,
+            "move_to_slot": vpg_slot,
         },
-        description=f"move to slot: {VPG_SLOT.identifier}"
+        description=f"move to slot: {vpg_slot.identifier}"
     )
 
     ins2 = JuniorInstruction(
-        device=Z2_ARM, action_name="pick_up",
+        device=z2_arm, action_name="pick_up",
         action_parameters={
-            "thing": VPG,
+            "thing": vpg,
         },
-        description=f"pick up: {VPG.identifier}"
+        description=f"pick up: {vpg.identifier}"
     )
 
     ins3 = JuniorInstruction(
-        device=ARM_PLATFORM, action_name="move_to",
+        device=arm_platform, action_name="move_to",
         action_parameters={
-            "anchor_arm": Z2_ARM,
+            "anchor_arm": z2_arm,
             "move_to_slot": src_slot,
         },
         description=f"move to slot: {src_slot.identifier}"
     )
     ins4 = JuniorInstruction(
-        device=Z2_ARM, action_name="pick_up",
+        device=z2_arm, action_name="pick_up",
         action_parameters={
             "thing": rack,
         },
         description=f"pick up: {rack.identifier}"
     )
     ins5 = JuniorInstruction(
-        device=ARM_PLATFORM, action_name="move_to",
+        device=arm_platform, action_name="move_to",
         action_parameters={
-            "anchor_arm": Z2_ARM,
+            "anchor_arm": z2_arm,
             "move_to_slot": dest_slot,
         },
         description=f"move to slot: {dest_slot.identifier}"
     )
     ins6 = JuniorInstruction(
-        device=Z2_ARM, action_name="put_down",
+        device=z2_arm, action_name="put_down",
         action_parameters={
             "dest_slot": dest_slot,
         },
@@ -129,20 +77,20 @@ def pick_drop_rack_to(rack: JuniorRack, src_slot: JuniorSlot, dest_slot: JuniorS
     )
 
     ins7 = JuniorInstruction(
-        device=ARM_PLATFORM, action_name="move_to",
+        device=arm_platform, action_name="move_to",
         action_parameters={
-            "anchor_arm": Z2_ARM,
-            "move_to_slot": VPG_SLOT,
+            "anchor_arm": z2_arm,
+            "move_to_slot": vpg_slot,
         },
-        description=f"move to slot: {VPG_SLOT.identifier}"
+        description=f"move to slot: {vpg_slot.identifier}"
     )
 
     ins8 = JuniorInstruction(
-        device=Z2_ARM, action_name="put_down",
+        device=z2_arm, action_name="put_down",
         action_parameters={
-            "dest_slot": VPG_SLOT,
+            "dest_slot": vpg_slot,
         },
-        description=f"put down: {VPG_SLOT.identifier}"
+        description=f"put down: {vpg_slot.identifier}"
     )
 
     ins_list = [ins1, ins2, ins3, ins4, ins5, ins6, ins7, ins8]
@@ -160,44 +108,49 @@ def solid_dispense(
         include_dropoff_svvial=True,
         include_dropoff_svtool=True,
 ):
+    arm_platform = JUNIOR_LAB['ARM PLATFORM']
+    z2_arm = JUNIOR_LAB['Z2 ARM']
+    balance_slot = JUNIOR_LAB['BALANCE SLOT']
+    sv_tool_slot = JUNIOR_LAB['SV TOOL SLOT']
+    sv_tool = JUNIOR_LAB['SV TOOL']
     ins3 = JuniorInstruction(
-        device=ARM_PLATFORM, action_name="move_to",
+        device=arm_platform, action_name="move_to",
         action_parameters={
-            "anchor_arm": Z2_ARM,
+            "anchor_arm": z2_arm,
             "move_to_slot": sv_vial_slot,
         },
         description=f"move to slot: {sv_vial_slot.identifier}"
     )
 
     ins4 = JuniorInstruction(
-        device=Z2_ARM, action_name="pick_up",
+        device=z2_arm, action_name="pick_up",
         action_parameters={"thing": sv_vial},
         description=f"pick up: {sv_vial.identifier}",
     )
 
     ins5 = JuniorInstruction(
-        device=ARM_PLATFORM, action_name="move_to",
+        device=arm_platform, action_name="move_to",
         action_parameters={
-            "anchor_arm": Z2_ARM,
-            "move_to_slot": BALANCE_SLOT,
+            "anchor_arm": z2_arm,
+            "move_to_slot": balance_slot,
         },
-        description=f"move to slot: {BALANCE_SLOT.identifier}"
+        description=f"move to slot: {balance_slot.identifier}"
     )
 
     if include_pickup_svtool:
         ins1 = JuniorInstruction(
-            device=ARM_PLATFORM, action_name="move_to",
+            device=arm_platform, action_name="move_to",
             action_parameters={
-                "anchor_arm": Z2_ARM,
-                "move_to_slot": SV_TOOL_SLOT,
+                "anchor_arm": z2_arm,
+                "move_to_slot": sv_tool_slot,
             },
-            description=f"move to slot: {SV_TOOL_SLOT.identifier}"
+            description=f"move to slot: {sv_tool_slot.identifier}"
         )
 
         ins2 = JuniorInstruction(
-            device=Z2_ARM, action_name="pick_up",
-            action_parameters={"thing": SV_TOOL},
-            description=f"pick up: {SV_TOOL.identifier}",
+            device=z2_arm, action_name="pick_up",
+            action_parameters={"thing": sv_tool},
+            description=f"pick up: {sv_tool.identifier}",
         )
         ins_list = [ins1, ins2, ins3, ins4, ins5]
     else:
@@ -205,7 +158,7 @@ def solid_dispense(
 
     for dest_vial in dest_vials:
         ins6 = JuniorInstruction(
-            device=Z2_ARM, action_name="dispense_sv",
+            device=z2_arm, action_name="dispense_sv",
             action_parameters={
                 "destination_container": dest_vial,
                 "amount": amount,
@@ -217,16 +170,16 @@ def solid_dispense(
 
     if include_dropoff_svvial:
         ins7 = JuniorInstruction(
-            device=ARM_PLATFORM, action_name="move_to",
+            device=arm_platform, action_name="move_to",
             action_parameters={
-                "anchor_arm": Z2_ARM,
+                "anchor_arm": z2_arm,
                 "move_to_slot": sv_vial_slot,
             },
             description=f"move to slot: {sv_vial_slot.identifier}"
         )
 
         ins8 = JuniorInstruction(
-            device=Z2_ARM, action_name="put_down",
+            device=z2_arm, action_name="put_down",
             action_parameters={
                 "dest_slot": sv_vial_slot,
             },
@@ -237,20 +190,20 @@ def solid_dispense(
 
     if include_dropoff_svtool:
         ins9 = JuniorInstruction(
-            device=ARM_PLATFORM, action_name="move_to",
+            device=arm_platform, action_name="move_to",
             action_parameters={
-                "anchor_arm": Z2_ARM,
-                "move_to_slot": SV_TOOL_SLOT,
+                "anchor_arm": z2_arm,
+                "move_to_slot": sv_tool_slot,
             },
-            description=f"move to slot: {SV_TOOL_SLOT.identifier}"
+            description=f"move to slot: {sv_tool_slot.identifier}"
         )
 
         ins10 = JuniorInstruction(
-            device=Z2_ARM, action_name="put_down",
+            device=z2_arm, action_name="put_down",
             action_parameters={
-                "dest_slot": SV_TOOL_SLOT,
+                "dest_slot": sv_tool_slot,
             },
-            description=f"put down: {SV_TOOL_SLOT.identifier}"
+            description=f"put down: {sv_tool_slot.identifier}"
         )
         ins_list.append(ins9)
         ins_list.append(ins10)
@@ -268,52 +221,55 @@ def needle_dispense(
         amount: float,
         # speed: float,
 ):
+    arm_platform = JUNIOR_LAB['ARM PLATFORM']
+    z1_arm = JUNIOR_LAB['Z1 ARM']
+    z1_needles = [JUNIOR_LAB[f"Z1 Needle {i + 1}"] for i in range(len(src_vials))]
     ins1 = JuniorInstruction(
-        device=ARM_PLATFORM, action_name="move_to",
+        device=arm_platform, action_name="move_to",
         action_parameters={
-            "anchor_arm": Z1_ARM,
+            "anchor_arm": z1_arm,
             "move_to_slot": src_slot,
         },
         description=f"move to slot: {src_slot.identifier}"
     )
     ins2 = JuniorInstruction(
-        device=Z1_ARM, action_name="concurrent_aspirate",
+        device=z1_arm, action_name="concurrent_aspirate",
         action_parameters={
             "source_containers": src_vials,
-            "dispenser_containers": Z1NEEDLES,
-            "amounts": [amount, ] * CONCURRENCY,
+            "dispenser_containers": z1_needles,
+            "amounts": [amount, ] * len(src_vials),
             # "aspirate_speed": speed,
         },
         description=f"concurrent aspirate from: {','.join([v.identifier for v in src_vials])}"
     )
     ins3 = JuniorInstruction(
-        device=ARM_PLATFORM, action_name="move_to",
+        device=arm_platform, action_name="move_to",
         action_parameters={
-            "anchor_arm": Z1_ARM,
+            "anchor_arm": z1_arm,
             "move_to_slot": dest_vials_slot,
         },
         description=f"move to slot: {dest_vials_slot.identifier}"
     )
     ins4 = JuniorInstruction(
-        device=Z1_ARM, action_name="concurrent_dispense",
+        device=z1_arm, action_name="concurrent_dispense",
         action_parameters={
             "destination_containers": dest_vials,
-            "dispenser_containers": Z1NEEDLES,
+            "dispenser_containers": z1_needles,
             # "dispense_speed": speed,
-            "amounts": [amount, ] * CONCURRENCY,
+            "amounts": [amount, ] * len(src_vials),
         },
         description=f"concurrent dispense to: {','.join([v.identifier for v in dest_vials])}"
     )
     ins5 = JuniorInstruction(
-        device=ARM_PLATFORM, action_name="move_to",
+        device=arm_platform, action_name="move_to",
         action_parameters={
-            "anchor_arm": Z1_ARM,
+            "anchor_arm": z1_arm,
             "move_to_slot": JUNIOR_LAB['WASH BAY'],
         },
         description=f"move to slot: WASH BAY"
     )
     ins6 = JuniorInstruction(
-        device=Z1_ARM, action_name="wash",
+        device=z1_arm, action_name="wash",
         action_parameters={
             "wash_bay": JUNIOR_LAB['WASH BAY'],
         },
@@ -331,47 +287,50 @@ def pdp_dispense(
         amount: float,
         # speed: float
 ):
+    arm_platform = JUNIOR_LAB['ARM PLATFORM']
+    z2_arm = JUNIOR_LAB['Z2 ARM']
+    pdp_1 = JUNIOR_LAB['PDT 1']
     ins1 = JuniorInstruction(
-        device=ARM_PLATFORM, action_name="move_to",
+        device=arm_platform, action_name="move_to",
         action_parameters={
-            "anchor_arm": Z2_ARM,
+            "anchor_arm": z2_arm,
             "move_to_slot": JUNIOR_LAB['PDT SLOT 1'],
         },
         description=f"move to slot: PDT SLOT 1"
     )
 
     ins2 = JuniorInstruction(
-        device=Z2_ARM, action_name="pick_up",
-        action_parameters={"thing": PDP_1},
-        description=f"pick up: {PDP_1.identifier}",
+        device=z2_arm, action_name="pick_up",
+        action_parameters={"thing": pdp_1},
+        description=f"pick up: {pdp_1.identifier}",
     )
 
     ins_list = [ins1, ins2]
 
     for tip, dest_vial in zip(tips, dest_vials):
         i_a = JuniorInstruction(
-            device=ARM_PLATFORM, action_name="move_to",
+            device=arm_platform, action_name="move_to",
             action_parameters={
-                "anchor_arm": Z2_ARM,
+                "anchor_arm": z2_arm,
                 "move_to_slot": tips_slot,
             },
             description=f"move to slot: {tips_slot.identifier}"
         )
         i_b = JuniorInstruction(
-            device=Z2_ARM, action_name="pick_up",
+            device=z2_arm, action_name="pick_up",
             action_parameters={"thing": tip},
             description=f"pick up: {tip.identifier}",
         )
         i_c = JuniorInstruction(
-            device=ARM_PLATFORM, action_name="move_to",
+            device=arm_platform, action_name="move_to",
             action_parameters={
-                "anchor_arm": Z2_ARM,
+                "anchor_arm": z2_arm,
                 "move_to_slot": src_slot,
             },
             description=f"move to slot: {src_slot.identifier}"
         )
         i_d = JuniorInstruction(
-            device=Z2_ARM, action_name="aspirate_pdp",
+            device=z2_arm, action_name="aspirate_pdp",
             action_parameters={
                 "source_container": src_vial,
                 "amount": amount,
@@ -380,15 +339,15 @@ def pdp_dispense(
             description=f"aspirate_pdp from: {src_vial.identifier}"
         )
         i_e = JuniorInstruction(
-            device=ARM_PLATFORM, action_name="move_to",
+            device=arm_platform, action_name="move_to",
             action_parameters={
-                "anchor_arm": Z2_ARM,
+                "anchor_arm": z2_arm,
                 "move_to_slot": dest_vials_slot,
             },
             description=f"move to slot: {dest_vials_slot.identifier}"
         )
         i_f = JuniorInstruction(
-            device=Z2_ARM, action_name="dispense_pdp",
+            device=z2_arm, action_name="dispense_pdp",
             action_parameters={
                 "destination_container": dest_vial,
                 "amount": amount,
@@ -397,15 +356,15 @@ def pdp_dispense(
             description=f"dispense_pdp to: {dest_vial.identifier}"
         )
         i_g = JuniorInstruction(
-            device=ARM_PLATFORM, action_name="move_to",
+            device=arm_platform, action_name="move_to",
             action_parameters={
-                "anchor_arm": Z2_ARM,
+                "anchor_arm": z2_arm,
                 "move_to_slot": JUNIOR_LAB['DISPOSAL'],
             },
             description=f"move to slot: DISPOSAL"
         )
         i_h = JuniorInstruction(
-            device=Z2_ARM, action_name="put_down",
+            device=z2_arm, action_name="put_down",
             action_parameters={
                 "dest_slot": JUNIOR_LAB['DISPOSAL'],
             },
@@ -416,90 +375,185 @@ def pdp_dispense(
     return ins_list
 
 
-ins_list1 = pick_drop_rack_to(RACK_B, JUNIOR_LAB['SLOT 2-3-2'], BALANCE_SLOT)
-
-ins_list2 = solid_dispense(sv_vial=SVV_2,
-                           sv_vial_slot=JUNIOR_LAB['SVV SLOT 2'],
-                           dest_vials=RSO2Cl_STOCK_SOLUTION_VIALS,
-                           amount=10,
-                           include_pickup_svtool=True,
-                           include_dropoff_svvial=True,
-                           include_dropoff_svtool=True)
-ins_list2[0].preceding_instructions.append(ins_list1[-1].identifier)
-
-ins_list3 = pick_drop_rack_to(RACK_B, BALANCE_SLOT, JUNIOR_LAB['SLOT 2-3-2'])
-ins_list3[0].preceding_instructions.append(ins_list2[-1].identifier)
-
-ins_list4 = pick_drop_rack_to(RACK_C, JUNIOR_LAB['SLOT 2-3-1'], BALANCE_SLOT)
-ins_list4[0].preceding_instructions.append(ins_list3[-1].identifier)
-
-ins_list5 = solid_dispense(sv_vial=SVV_1, sv_vial_slot=JUNIOR_LAB['SVV SLOT 1'],
-                           dest_vials=MRV_VIALS,
-                           amount=10,
-                           include_pickup_svtool=True,
-                           include_dropoff_svvial=True, include_dropoff_svtool=True)
-ins_list5[0].preceding_instructions.append(ins_list4[-1].identifier)
-
-ins_list6 = pick_drop_rack_to(RACK_C, BALANCE_SLOT, JUNIOR_LAB['SLOT 2-3-1'])
-ins_list6[0].preceding_instructions.append(ins_list5[-1].identifier)
-
-ins_list7 = needle_dispense(DCM_VIALS, JUNIOR_LAB['SLOT OFF-1'], MRV_VIALS, JUNIOR_LAB['SLOT 2-3-1'], 10)
-ins_list7[0].preceding_instructions.append(ins_list6[-1].identifier)
-
-ins_list8 = needle_dispense(DCM_VIALS, JUNIOR_LAB['SLOT OFF-1'], RSO2Cl_STOCK_SOLUTION_VIALS, JUNIOR_LAB['SLOT 2-3-2'],
-                            10)
-ins_list8[0].preceding_instructions.append(ins_list7[-1].identifier)
-
-ins_list9 = pdp_dispense(PYRIDINE_VIAL, JUNIOR_LAB['SLOT 2-3-2'], RACK_D_TIPS, JUNIOR_LAB['SLOT 2-3-3'], MRV_VIALS,
-                         JUNIOR_LAB['SLOT 2-3-1'], 10)
-ins_list9[0].preceding_instructions.append(ins_list8[-1].identifier)
-
-ins_stir1 = JuniorInstruction(
-    device=JUNIOR_LAB['SLOT 2-3-1'], action_name="wait", action_parameters={"wait_time": 300},
-    description="wait for 5 min"
-)
-ins_stir2 = JuniorInstruction(
-    device=JUNIOR_LAB['SLOT 2-3-2'], action_name="wait", action_parameters={"wait_time": 300},
-    description="wait for 5 min"
-)
-ins_stir3 = JuniorInstruction(
-    device=JUNIOR_LAB['SLOT 2-3-3'], action_name="wait", action_parameters={"wait_time": 300},
-    description="wait for 5 min"
-)
-
-for i in [ins_stir1, ins_stir2, ins_stir3]:
-    i.preceding_instructions.append(ins_list9[-1].identifier)
-
-ins_list10 = needle_dispense(RSO2Cl_STOCK_SOLUTION_VIALS, JUNIOR_LAB['SLOT 2-3-2'], MRV_VIALS, JUNIOR_LAB['SLOT 2-3-1'],
-                             10)
-ins_list10[0].preceding_instructions = [ins_stir1.identifier, ins_stir2.identifier, ins_stir3.identifier]
-
-ins_stir21 = JuniorInstruction(
-    device=JUNIOR_LAB['SLOT 2-3-1'], action_name="wait", action_parameters={"wait_time": 7200},
-    description="wait for 120 min"
-)
-ins_stir22 = JuniorInstruction(
-    device=JUNIOR_LAB['SLOT 2-3-2'], action_name="wait", action_parameters={"wait_time": 7200},
-    description="wait for 120 min"
-)
-ins_stir23 = JuniorInstruction(
-    device=JUNIOR_LAB['SLOT 2-3-3'], action_name="wait", action_parameters={"wait_time": 7200},
-    description="wait for 120 min"
-)
-
-for i in [ins_stir21, ins_stir22, ins_stir23]:
-    i.preceding_instructions.append(ins_list10[-1].identifier)
-
-diagram = JUNIOR_LAB.instruction_graph
-
-diagram.layout(algo="rt_circular")
-diagram.dump_file(filename="sim_junior_instruction.drawio", folder="./")
-
-from casymda_hardware.model import *
-import simpy
+def needle_dispense_in_batches(
+        src_vials: list[JuniorVial],
+        src_slot: JuniorSlot,
+        dest_vials: list[JuniorVial],
+        dest_vials_slot: JuniorSlot,
+        amount: float,
+        concurrency: int,
+):
+    """ needle dispense with `concurrency` needles at a time, the batches follow one another """
+    ins_list = []
+    for i in range(0, len(dest_vials), concurrency):
+        batch = needle_dispense(src_vials[i: i + concurrency], src_slot, dest_vials[i: i + concurrency],
+                                dest_vials_slot, amount)
+        if ins_list:
+            batch[0].preceding_instructions.append(ins_list[-1].identifier)
+        ins_list += batch
+    return ins_list
+
+
+def build_workflow(concurrency: int = CONCURRENCY, n_reactors: int = None) -> Lab:
+    """
+    set up the lab and define all instructions in the current context of `JUNIOR_LAB`
+
+    `n_reactors` reactions run in MRVs, the needles of Z1 arm dispense to `concurrency` vials at a time,
+    by default there is one reactor per needle, the racks hold at most `MAX_REACTORS` reactors
+    """
+    if n_reactors is None:
+        n_reactors = concurrency
+    if concurrency not in JuniorArmZ1.model_fields["allowed_concurrency"].default:
+        raise ValueError(f"concurrency not allowed by Z1 arm: {concurrency}")
+    if n_reactors % concurrency != 0:
+        raise ValueError(f"the number of reactors {n_reactors} is not a multiple of concurrency {concurrency}")
+    if n_reactors > MAX_REACTORS:
+        raise ValueError(f"the number of reactors {n_reactors} is more than the racks hold: {MAX_REACTORS}")
+
+    create_junior_base()
+
+    # RACK A: holding HRVs with DCM, on off deck initially
+    rack_a, rack_a_vials = JuniorRack.create_rack_with_empty_vials(
+        n_vials=n_reactors, rack_capacity=MAX_REACTORS, vial_type="HRV", rack_id="RACK A"
+    )
+    for v in rack_a_vials:
+        v.chemical_content = {"DCM": 1000}
+    JuniorSlot.put_rack_in_a_slot(rack_a, JUNIOR_LAB['SLOT OFF-1'])
+
+    # RACK B: holding HRVs for reactions, at 2-3-2 initially, one for RSO2Cl stock solution, another for pyridine source
+    rack_b, rack_b_vials = JuniorRack.create_rack_with_empty_vials(
+        n_vials=n_reactors + 1, rack_capacity=8, vial_type="HRV", rack_id="RACK B"
+    )
+    JuniorSlot.put_rack_in_a_slot(rack_b, JUNIOR_LAB['SLOT 2-3-2'])
+
+    # RACK C: holding one MRV for reaction, at 2-3-1 initially
+    rack_c, rack_c_vials = JuniorRack.create_rack_with_empty_vials(
+        n_vials=n_reactors, rack_capacity=MAX_REACTORS, vial_type="MRV", rack_id="RACK C"
+    )
+    JuniorSlot.put_rack_in_a_slot(rack_c, JUNIOR_LAB['SLOT 2-3-1'])
+
+    # RACK D: holding PDP tips, at 2-3-3 initially
+    rack_d, rack_d_tips = JuniorRack.create_rack_with_empty_tips(
+        n_tips=n_reactors, rack_capacity=MAX_REACTORS, rack_id="RACK D", tip_id_inherit=True
+    )
+    JuniorSlot.put_rack_in_a_slot(rack_d, JUNIOR_LAB['SLOT 2-3-3'])
+
+    # SV VIALS, one for solid amine (aniline), another for RSO2Cl, each sits in a SVV SLOT
+    svv_1 = JuniorVial(
+        identifier="SV VIAL 1", contained_by=JUNIOR_LAB['SVV SLOT 1'].identifier,
+        chemical_content={'solid amine': 1000},
+        vial_type='SV',
+    )
+    svv_2 = JuniorVial(
+        identifier="SV VIAL 2", contained_by=JUNIOR_LAB['SVV SLOT 2'].identifier,
+        chemical_content={'sulfonyl chloride': 1000},
+        vial_type='SV',
+    )
+    JUNIOR_LAB['SVV SLOT 1'].slot_content['SLOT'] = svv_1.identifier
+    JUNIOR_LAB['SVV SLOT 2'].slot_content['SLOT'] = svv_2.identifier
+
+    # INSTRUCTIONS
+    balance_slot = JUNIOR_LAB['BALANCE SLOT']
+    dcm_vials = rack_a_vials
+    mrv_vials = rack_c_vials
+    pyridine_vial = rack_b_vials[0]
+    rso2cl_stock_solution_vials = rack_b_vials[1:]
+    pyridine_vial.chemical_content = {"pyridine": 1000}
+
+    ins_list1 = pick_drop_rack_to(rack_b, JUNIOR_LAB['SLOT 2-3-2'], balance_slot)
+
+    ins_list2 = solid_dispense(sv_vial=svv_2,
+                               sv_vial_slot=JUNIOR_LAB['SVV SLOT 2'],
+                               dest_vials=rso2cl_stock_solution_vials,
+                               amount=10,
+                               include_pickup_svtool=True,
+                               include_dropoff_svvial=True,
+                               include_dropoff_svtool=True)
+    ins_list2[0].preceding_instructions.append(ins_list1[-1].identifier)
+
+    ins_list3 = pick_drop_rack_to(rack_b, balance_slot, JUNIOR_LAB['SLOT 2-3-2'])
+    ins_list3[0].preceding_instructions.append(ins_list2[-1].identifier)
+
+    ins_list4 = pick_drop_rack_to(rack_c, JUNIOR_LAB['SLOT 2-3-1'], balance_slot)
+    ins_list4[0].preceding_instructions.append(ins_list3[-1].identifier)
+
+    ins_list5 = solid_dispense(sv_vial=svv_1, sv_vial_slot=JUNIOR_LAB['SVV SLOT 1'],
+                               dest_vials=mrv_vials,
+                               amount=10,
+                               include_pickup_svtool=True,
+                               include_dropoff_svvial=True, include_dropoff_svtool=True)
+    ins_list5[0].preceding_instructions.append(ins_list4[-1].identifier)
+
+    ins_list6 = pick_drop_rack_to(rack_c, balance_slot, JUNIOR_LAB['SLOT 2-3-1'])
+    ins_list6[0].preceding_instructions.append(ins_list5[-1].identifier)
+
+    ins_list7 = needle_dispense_in_batches(dcm_vials, JUNIOR_LAB['SLOT OFF-1'], mrv_vials, JUNIOR_LAB['SLOT 2-3-1'],
+                                           10, concurrency)
+    ins_list7[0].preceding_instructions.append(ins_list6[-1].identifier)
+
+    ins_list8 = needle_dispense_in_batches(dcm_vials, JUNIOR_LAB['SLOT OFF-1'], rso2cl_stock_solution_vials,
+                                           JUNIOR_LAB['SLOT 2-3-2'], 10, concurrency)
+    ins_list8[0].preceding_instructions.append(ins_list7[-1].identifier)
+
+    ins_list9 = pdp_dispense(pyridine_vial, JUNIOR_LAB['SLOT 2-3-2'], rack_d_tips, JUNIOR_LAB['SLOT 2-3-3'],
+                             mrv_vials, JUNIOR_LAB['SLOT 2-3-1'], 10)
+    ins_list9[0].preceding_instructions.append(ins_list8[-1].identifier)
+
+    ins_stir1 = JuniorInstruction(
+        device=JUNIOR_LAB['SLOT 2-3-1'], action_name="wait", action_parameters={"wait_time": 300},
+        description="wait for 5 min"
+    )
+    ins_stir2 = JuniorInstruction(
+        device=JUNIOR_LAB['SLOT 2-3-2'], action_name="wait", action_parameters={"wait_time": 300},
+        description="wait for 5 min"
+    )
+    ins_stir3 = JuniorInstruction(
+        device=JUNIOR_LAB['SLOT 2-3-3'], action_name="wait", action_parameters={"wait_time": 300},
+        description="wait for 5 min"
+    )
 
-env = simpy.Environment()
+    for i in [ins_stir1, ins_stir2, ins_stir3]:
+        i.preceding_instructions.append(ins_list9[-1].identifier)
 
-model = Model(env, JUNIOR_LAB, wdir=os.path.abspath("./"), model_name=f"con-{CONCURRENCY}")
+    ins_list10 = needle_dispense_in_batches(rso2cl_stock_solution_vials, JUNIOR_LAB['SLOT 2-3-2'], mrv_vials,
+                                            JUNIOR_LAB['SLOT 2-3-1'], 10, concurrency)
+    ins_list10[0].preceding_instructions = [ins_stir1.identifier, ins_stir2.identifier, ins_stir3.identifier]
 
-env.run()
+    ins_stir21 = JuniorInstruction(
+        device=JUNIOR_LAB['SLOT 2-3-1'], action_name="wait", action_parameters={"wait_time": 7200},
+        description="wait for 120 min"
+    )
+    ins_stir22 = JuniorInstruction(
+        device=JUNIOR_LAB['SLOT 2-3-2'], action_name="wait", action_parameters={"wait_time": 7200},
+        description="wait for 120 min"
+    )
+    ins_stir23 = JuniorInstruction(
+        device=JUNIOR_LAB['SLOT 2-3-3'], action_name="wait", action_parameters={"wait_time": 7200},
+        description="wait for 120 min"
+    )
+
+    for i in [ins_stir21, ins_stir22, ins_stir23]:
+        i.preceding_instructions.append(ins_list10[-1].identifier)
+
+    return JUNIOR_LAB.resolve()
+
+
+if __name__ == '__main__':
+    lab = build_workflow(CONCURRENCY)
+
+    diagram = lab.instruction_graph
+    diagram.layout(algo="rt_circular")
+    diagram.dump_file(filename="sim_junior_instruction.drawio", folder="./")
+
+    env = simpy.Environment()
+    if LIVE:
+        publisher = SocketPublisher()
+        model = Model(env, lab, wdir=os.path.abspath("./"), model_name=MODEL_NAME,
+                      trace_tags={"concurrency": CONCURRENCY}, columnar_trace=True, log_mode="indexed",
+                      publisher=publisher)
+        env.run()
+        publisher.close()
+    else:
+        model = Model(env, lab, wdir=os.path.abspath("./"), model_name=MODEL_NAME,
+                      trace_tags={"concurrency": CONCURRENCY}, columnar_trace=True)
+        env.run()
@@ -0,0 +1,82 @@
+"""
+run the sulfonylation workflow of `sim_junior.py` for each allowed concurrency of Z1 arm and each number of reactors,
+and write one table comparing the makespan, the utilization of the arms and the time cost of each task
+
+each setting is built in its own context of `JUNIOR_LAB` and runs with `HeapEngine` in a pool of worker processes
+
+usage: python sweep_concurrency.py [--concurrency 1 4 6] [--reactors 4 6] [--output sweep_concurrency.csv]
+"""
+import argparse
+import csv
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+
+from casymda_hardware.heap_engine import HeapEngine
+from hardware_pydantic.junior import JUNIOR_LAB, JuniorArmZ1
+from sim_junior import MAX_REACTORS, build_workflow
+
+ARMS = ["ARM PLATFORM", "Z1 ARM", "Z2 ARM"]
+
+
+def get_task(description: str) -> str:
+    """ the task of an instruction, as in `concurrencies.py` """
+    return description.split(":")[0]
+
+
+def run_setting(concurrency: int, n_reactors: int) -> dict:
+    with JUNIOR_LAB.context():
+        lab = build_workflow(concurrency, n_reactors)
+        engine = HeapEngine(lab)
+        makespan = engine.run()
+    row = {"concurrency": concurrency, "n_reactors": n_reactors, "makespan": makespan}
+    utilization = engine.device_utilization
+    for arm in ARMS:
+        row[f"utilization: {arm}"] = utilization.get(arm, 0.0)
+    for k, ins in lab.dict_instruction.items():
+        task = get_task(ins.description)
+        if task.startswith("wait"):
+            continue
+        column = f"time cost: {task}"
+        row[column] = row.get(column, 0.0) + engine.finish_time[k] - engine.start_time[k]
+    return row
+
+
+def main():
+    allowed_concurrency = JuniorArmZ1.model_fields["allowed_concurrency"].default
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrency", type=int, nargs="+", default=allowed_concurrency)
+    parser.add_argument("--reactors", type=int, nargs="+", default=None,
+                        help="numbers of reactors, default is one reactor per needle")
+    parser.add_argument("--output", default="sweep_concurrency.csv")
+    parser.add_argument("--max-workers", type=int, default=None)
+    args = parser.parse_args()
+
+    if args.reactors is None:
+        settings = [(c, c) for c in args.concurrency]
+    else:
+        # the needles dispense to `concurrency` reactors at a time
+        settings = [(c, n) for c, n in itertools.product(args.concurrency, args.reactors) if n % c == 0]
+    # settings the racks cannot hold are skipped instead of failing in the pool
+    skipped = [(c, n) for c, n in settings if n > MAX_REACTORS]
+    if skipped:
+        print(f"skipped settings with more than {MAX_REACTORS} reactors:", *skipped)
+    settings = [(c, n) for c, n in settings if n <= MAX_REACTORS]
+    if not settings:
+        parser.error("no setting to run")
+
+    with ProcessPoolExecutor(max_workers=args.max_workers) as executor:
+        rows = list(executor.map(run_setting, *zip(*settings)))
+
+    columns = list(dict.fromkeys(k for row in rows for k in row))
+    with open(args.output, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=columns, restval=0.0)
+        writer.writeheader()
+        writer.writerows(rows)
+
+    for row in rows:
+        print(row["concurrency"], row["n_reactors"], row["makespan"],
+              *[round(row[f"utilization: {arm}"], 3) for arm in ARMS], sep="\t")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,15 +1,23 @@
-import pickle
+import os
 import pprint
 import math
+import threading
+from bisect import bisect_right
+from functools import lru_cache, partial
 
 import dash_bootstrap_components as dbc
 import dash_renderjson
 import plotly.graph_objects as go
-from dash import Dash, dcc, html, Input, Output
+from dash import Dash, dcc, html, Input, Output, State, Patch, ctx, no_update
+from dash.exceptions import PreventUpdate
 import plotly.figure_factory as ff
+from casymda_hardware.events import LIVE_ADDRESS as PUBLISHER_ADDRESS, subscribe
+from casymda_hardware.render_cache import RenderCache
+from casymda_hardware.state_log import open_state_log
 from hardware_pydantic.junior import *
 import plotly.express as px
 import pandas as pd
+from sim_junior import LIVE, MODEL_NAME
 
 
 def get_gantt_fig(states):
@@ -43,6 +51,50 @@ def get_gantt_fig(states):
     fig.update_layout(xaxis_type='linear', autosize=True, yaxis_visible=False)
     return fig
 
+
+def add_gantt_cursor(fig: go.Figure, current_time: float) -> int:
+    """ add a vertical line marking the current simulation time, returns its index in the shapes of the figure """
+    fig.add_shape(
+        type="line", xref="x", yref="paper", x0=current_time, x1=current_time, y0=0, y1=1,
+        line=dict(color="red", width=2),
+        name="cursor",
+    )
+    return len(fig.layout.shapes) - 1
+
+
+def get_layout_items(lab: Lab) -> dict[str, tuple[str | None, str | None, str]]:
+    """ for each object drawn in the layout, its fill color, the border color of its label and its hover text """
+    z1_arm = lab['Z1 ARM']
+    z1_arm: JuniorArmZ1
+
+    z2_arm = lab['Z2 ARM']
+    z2_arm: JuniorArmZ2
+
+    arm_platform = lab['ARM PLATFORM']
+    arm_platform: JuniorArmPlatform
+
+    items = dict()
+    for k, v in lab.dict_object.items():
+        if isinstance(v, (JuniorSlot, JuniorWashBay, JuniorTipDisposal)):
+            if isinstance(v, JuniorSlot) and v.slot_content['SLOT'] is not None:
+                fillcolor = "gray"
+            else:
+                fillcolor = None
+
+            if arm_platform.anchor_arm == z1_arm.identifier and arm_platform.position_on_top_of == v.identifier:
+                bgcolor = "red"
+            elif arm_platform.anchor_arm == z2_arm.identifier and arm_platform.position_on_top_of == v.identifier:
+                bgcolor = "blue"
+            else:
+                bgcolor = None
+            items[k] = (fillcolor, bgcolor, get_hover_text(v.state))
+    return items
+
+
+def get_hover_text(state: dict) -> str:
+    return pprint.pformat(state, indent=2).replace("\n", "<br>")
+
+
 def get_layout_figure(lab: Lab) -> go.Figure:
     fig = go.Figure()
     fig.update_xaxes(
@@ -72,61 +124,79 @@ def get_layout_figure(lab: Lab) -> go.Figure:
         plot_bgcolor='rgba(0,0,0,0)',
     )
 
-    z1_arm = lab['Z1 ARM']
-    z1_arm: JuniorArmZ1
-
-    z2_arm = lab['Z2 ARM']
-    z2_arm: JuniorArmZ2
-
-    arm_platform = lab['ARM PLATFORM']
-    arm_platform: JuniorArmPlatform
-
-    for k, v in lab.dict_object.items():
-        if isinstance(v, (JuniorSlot, JuniorWashBay, JuniorTipDisposal)):
-            x0, y0 = v.layout.layout_position
-            x1 = x0 + v.layout.layout_x
-            y1 = y0 + v.layout.layout_y
-
-            if isinstance(v, JuniorSlot) and v.slot_content['SLOT'] is not None:
-                fillcolor = "gray"
-            else:
-                fillcolor = None
-
-            fig.add_shape(
-                type="rect", x0=x0, y0=y0, x1=x1, y1=y1,
-                line=dict(width=2, ),
-                fillcolor=fillcolor,
-                name=v.identifier,
-            )
-            fig.add_trace(
-                go.Scatter(
-                    x=[x0, x0, x0 + v.layout.layout_x, x0 + v.layout.layout_x],
-                    y=[y0, y0 + v.layout.layout_y, y0 + v.layout.layout_y, y0],
-                    fill="toself",
-                    mode='lines',
-                    name='',
-                    # hovertemplate='<br>',
-                    text=pprint.pformat(v.state, indent=2).replace("\n", "<br>"),
-                    opacity=0
-                )
+    # the shapes, traces and annotations of the objects are in the same order, see `patch_layout_figure`
+    for k, (fillcolor, bgcolor, hover_text) in get_layout_items(lab).items():
+        v = lab[k]
+        x0, y0 = v.layout.layout_position
+        x1 = x0 + v.layout.layout_x
+        y1 = y0 + v.layout.layout_y
+
+        fig.add_shape(
+            type="rect", x0=x0, y0=y0, x1=x1, y1=y1,
+            line=dict(width=2, ),
+            fillcolor=fillcolor,
+            name=v.identifier,
+        )
+        fig.add_trace(
+            go.Scatter(
+                x=[x0, x0, x0 + v.layout.layout_x, x0 + v.layout.layout_x],
+                y=[y0, y0 + v.layout.layout_y, y0 + v.layout.layout_y, y0],
+                fill="toself",
+                mode='lines',
+                name='',
+                # hovertemplate='<br>',
+                text=hover_text,
+                opacity=0
             )
-            if arm_platform.anchor_arm == z1_arm.identifier and arm_platform.position_on_top_of == v.identifier:
-                bgcolor = "red"
-            elif arm_platform.anchor_arm == z2_arm.identifier and arm_platform.position_on_top_of == v.identifier:
-                bgcolor = "blue"
-            else:
-                bgcolor = None
-
-            fig.add_annotation(x=x0 + v.layout.layout_x / 2, y=y0 + v.layout.layout_y / 2,
-                               font={"color": "black"},
-                               text=v.identifier,
-                               bordercolor=bgcolor,
-                               borderwidth=3,
-                               showarrow=False,
-                               yshift=0)
+        )
+        fig.add_annotation(x=x0 + v.layout.layout_x / 2, y=y0 + v.layout.layout_y / 2,
+                           font={"color": "black"},
+                           text=v.identifier,
+                           bordercolor=bgcolor,
+                           borderwidth=3,
+                           showarrow=False,
+                           yshift=0)
     return fig
 
 
+def patch_layout_figure(previous_items: dict, items: dict) -> Patch:
+    """ update the layout figure from one state to another given their `get_layout_items`, only the objects that
+    changed are sent """
+    patched = Patch()
+    for i, (k, (fillcolor, bgcolor, hover_text)) in enumerate(items.items()):
+        previous_fillcolor, previous_bgcolor, previous_hover_text = previous_items[k]
+        if fillcolor != previous_fillcolor:
+            patched["layout"]["shapes"][i]["fillcolor"] = fillcolor
+        if bgcolor != previous_bgcolor:
+            patched["layout"]["annotations"][i]["bordercolor"] = bgcolor
+        if hover_text != previous_hover_text:
+            patched["data"][i]["text"] = hover_text
+    return patched
+
+
+def get_log_item(state: dict) -> dbc.ListGroupItem:
+    ins = state['instruction']
+    if ins is None:
+        ins_id = None
+        ins_des = None
+    else:
+        ins_id = ins.identifier
+        ins_des = ins.description
+    item_content = [
+        html.B("SIM TIME "),
+        f"{state['finished']}",
+        html.Br(),
+        html.B("FINISHED INSTRUCTION "),
+        html.Br(),
+        ins_id,
+        html.Br(),
+        html.B("DESCRIPTION "),
+        html.Br(),
+        ins_des
+    ]
+    return dbc.ListGroupItem(item_content)
+
+
 JsonTheme = {
     "scheme": "monokai",
     "author": "wimer hazenberg (http://www.monokai.nl)",
@@ -148,8 +218,93 @@ JsonTheme = {
     "base0F": "#cc6633",
 }
 
-with open("sim_con-4.pkl", "rb") as f:
-    sim_logs = pickle.load(f)
+LOG_PAGE_SIZE = 50
+""" the simulation log shows the entries of the page of the current state, up to the current state """
+
+# the log of the run of `sim_junior.py`, its live runs write the state log of the "indexed" log mode
+LOG_PATH = f"sim_{MODEL_NAME}.states" if LIVE else f"sim_{MODEL_NAME}.pkl"
+
+LIVE_ADDRESS = PUBLISHER_ADDRESS if LIVE else None
+""" the address the `SocketPublisher` of a live run of `sim_junior.py` listens at, None to only read its log """
+
+LIVE_INTERVAL = 1000
+""" how often the page checks for the states of a live run, in milliseconds """
+
+PRERENDER_RADIUS = 3
+""" the layout items of this many states before and after the displayed one are rendered in the background """
+
+LIVE_TIMEOUT = 10.0
+""" how long to wait at startup for the live run and its first state, in seconds, before showing the state log as
+it is, e.g. if the run is over """
+
+live = False
+if LIVE_ADDRESS is not None:
+    # the state log is written by the run, wait for its first state
+    live_events = subscribe(LIVE_ADDRESS, timeout=LIVE_TIMEOUT)
+    live = next(live_events, None) is not None
+    if not live:
+        print(f"no live run at {LIVE_ADDRESS}, showing {LOG_PATH} as it is")
+if not os.path.exists(LOG_PATH):
+    raise FileNotFoundError(LOG_PATH)
+
+# only the entries are loaded here, the labs are read when displayed, see `StateLogReader`
+sim_logs = open_state_log(LOG_PATH)
+
+# layout items and tracker data keyed by (log file, state index, tracker id), the layout items have no tracker id
+render_cache = RenderCache(maxsize=1024, max_workers=1)
+
+
+def render_layout_items(i_state: int) -> dict:
+    return get_layout_items(sim_logs.lab_at(i_state))
+
+
+def render_tracker_data(i_state: int, tracker_id: str) -> dict:
+    return sim_logs.lab_at(i_state)[tracker_id].model_dump()
+
+
+# the gantt chart of the whole run is drawn once, only its cursor moves with the state index
+gantt_figure = get_gantt_fig(sim_logs.entries)
+gantt_cursor = add_gantt_cursor(gantt_figure, sim_logs.entries[0]['finished'])
+
+# the simulation times at which the states are reached, in increasing order
+finished_times = [e['finished'] for e in sim_logs.entries]
+
+
+def state_at_time(sim_time: float) -> int:
+    """ the index of the state displayed at a simulation time, i.e. the last state reached by then """
+    return max(bisect_right(finished_times, sim_time) - 1, 0)
+
+
+def follow_live_run():
+    """ index the states of a live run as their events arrive, the page picks them up with `LIVE_INTERVAL` """
+    for _ in live_events:
+        if sim_logs.refresh() > 0:
+            finished_times.extend(e['finished'] for e in sim_logs.entries[len(finished_times):])
+    # the last states may be flushed after their events
+    sim_logs.refresh()
+    finished_times.extend(e['finished'] for e in sim_logs.entries[len(finished_times):])
+
+
+if live:
+    threading.Thread(target=follow_live_run, daemon=True).start()
+
+
+@lru_cache(maxsize=1)
+def get_playback_data() -> dict:
+    """
+    what the browser needs to play the run back without calling the server, the layout items that changed in each
+    state as `[index in figure, fill color, label border color, hover text]`, see `patch_layout_figure`
+    """
+    diffs = [[]]
+    previous_items = render_cache.get((LOG_PATH, 0, None), partial(render_layout_items, 0))
+    for i_state in range(1, len(finished_times)):
+        items = render_cache.get((LOG_PATH, i_state, None), partial(render_layout_items, i_state))
+        diffs.append([
+            [i, *item] for i, (k, item) in enumerate(items.items()) if item != previous_items[k]
+        ])
+        previous_items = items
+    return {"times": finished_times, "diffs": diffs, "gantt_cursor": gantt_cursor}
+
 
 app = Dash(__name__, external_stylesheets=[dbc.themes.BOOTSTRAP], title="JUNIOR SIMULATOR")
 
@@ -161,6 +316,7 @@ card_layout = dbc.Card(
                 style={'height': '600px'},
                 config={'displayModeBar': False},
                 id="layout-figure",
+                figure=get_layout_figure(sim_logs.lab_at(0)),
             ),
             style={'height': '600px'},
         )
@@ -173,8 +329,11 @@ col_left = html.Div(
         dcc.Graph(
             style={'height': '700px'},
             config={'displayModeBar': False},
-            id="gantt-figure"
-        )
+            id="gantt-figure",
+            figure=gantt_figure,
+        ),
+        # the state index the layout figure shows, the next one is patched from it
+        dcc.Store(id="layout-state-index", data=0),
     ],
     className="col-7 p-2"
 )
@@ -209,7 +368,7 @@ list_group = dbc.ListGroup(id='sim-log', )
 
 card_log = dbc.Col(dbc.Card(
     [
-        dbc.CardHeader("Simulation log"),
+        dbc.CardHeader(["Simulation log ", html.Small(id="sim-log-page")]),
         dbc.CardBody(
             list_group, style={"overflow": "scroll", "height": 600}
         )
@@ -258,8 +417,16 @@ state_controller = html.Div(
             min=0,
         ),
         html.H5(style={'margin-right': 20}, id="sim-time"),
-        # dcc.Slider(0, sim_logs[-1]['finished'], value=0, marks={j['finished']: {'label': ""} for j in sim_logs[1:]}, id='sim-slider'),
-        # TODO add this
+        dcc.Slider(0, finished_times[-1], value=0, marks=None, tooltip={"placement": "bottom"}, id='sim-slider'),
+        html.Button("Play", id="play-button", n_clicks=0, className="btn btn-primary me-2"),
+        dcc.Input(id="playback-speed", type="number", value=60, min=1, placeholder="sim seconds per second"),
+        html.Span(" simulation seconds per second", className="me-2"),
+        dcc.Interval(id="playback-interval", interval=100, disabled=True),
+        dcc.Store(id="playback-data"),
+        dcc.Store(id="playback-time"),
+        # the number of states the page knows of, only changes when following a live run
+        dcc.Interval(id="live-interval", interval=LIVE_INTERVAL, disabled=not live),
+        dcc.Store(id="live-n-states", data=len(sim_logs)),
     ], className="mt-3 mx-3"
 )
 
@@ -273,51 +440,185 @@ app.layout = html.Div(
 
 
 
+def clip_state_index(i_state: int | None) -> int:
+    if i_state is None:
+        raise PreventUpdate
+    return min(max(i_state, 0), len(sim_logs) - 1)
+
+
 @app.callback(
     Output("layout-figure", "figure"),
+    Output("layout-state-index", "data"),
     Output("sim-time", "children"),
-    Output("tracker-1-json", "data"),
     Output("sim-log", "children"),
+    Output("sim-log-page", "children"),
     Output("gantt-figure", "figure"),
     Input("state-number", "value"),
+    State("layout-state-index", "data"),
+)
+def update_layout_figure(i_state: int, i_rendered: int):
+    i_state = clip_state_index(i_state)
+    current_time = sim_logs.entries[i_state]['finished']
+    fig_layout = patch_layout_figure(
+        render_cache.get((LOG_PATH, i_rendered, None), partial(render_layout_items, i_rendered)),
+        render_cache.get((LOG_PATH, i_state, None), partial(render_layout_items, i_state)),
+    )
+    render_cache.prerender(
+        ((LOG_PATH, j, None), partial(render_layout_items, j))
+        for j in range(max(i_state - PRERENDER_RADIUS, 0), min(i_state + PRERENDER_RADIUS + 1, len(sim_logs)))
+    )
+
+    i_page_start = i_state - i_state % LOG_PAGE_SIZE
+    log_items = [get_log_item(sim_logs.entries[i]) for i in range(i_page_start, i_state + 1)]
+    log_page = f"entries {i_page_start} to {i_state} of {len(sim_logs)}"
+
+    fig_gantt = Patch()
+    fig_gantt["layout"]["shapes"][gantt_cursor]["x0"] = current_time
+    fig_gantt["layout"]["shapes"][gantt_cursor]["x1"] = current_time
+    return fig_layout, i_state, "Simulation time: {}".format(current_time), log_items, log_page, fig_gantt
+
+
+@app.callback(
+    Output("tracker-1-json", "data"),
+    Input("state-number", "value"),
     Input("tracker-1-select", "value"),
 )
-def update_layout_figure(i_state: int, tracker_1_id):
-    if i_state > len(sim_logs) - 1:
-        i_state = len(sim_logs) - 1
-    loaded_state = sim_logs[i_state]
-    current_time = loaded_state['finished']
-    current_lab = loaded_state['lab']
-    fig_layout = get_layout_figure(current_lab)
-    tracker_1_obj = current_lab[tracker_1_id]
-
-    log_items = []
-
-    for state in sim_logs[:i_state + 1]:
-        ins = state['instruction']
-        if ins is None:
-            ins_id = None
-            ins_des = None
-        else:
-            ins_id = ins.identifier
-            ins_des = ins.description
-        item_content = [
-            html.B("SIM TIME "),
-            f"{state['finished']}",
-            html.Br(),
-            html.B("FINISHED INSTRUCTION "),
-            html.Br(),
-            ins_id,
-            html.Br(),
-            html.B("DESCRIPTION "),
-            html.Br(),
-            ins_des
-        ]
-        log_items.append(
-            dbc.ListGroupItem(item_content)
-        )
-    fig_gantt = get_gantt_fig(sim_logs[:i_state+1])
-    return fig_layout, "Simulation time: {}".format(current_time), tracker_1_obj.model_dump(), log_items, fig_gantt
+def update_tracker(i_state: int, tracker_1_id):
+    i_state = clip_state_index(i_state)
+    return render_cache.get((LOG_PATH, i_state, tracker_1_id), partial(render_tracker_data, i_state, tracker_1_id))
+
+
+@app.callback(
+    Output("state-number", "value"),
+    Output("sim-slider", "value"),
+    Input("state-number", "value"),
+    Input("sim-slider", "value"),
+)
+def sync_state_and_time(i_state: int, sim_time: float):
+    if ctx.triggered_id == "sim-slider":
+        if sim_time is None:
+            raise PreventUpdate
+        return state_at_time(sim_time), no_update
+    return no_update, finished_times[clip_state_index(i_state)]
+
+
+@app.callback(
+    Output("playback-interval", "disabled", allow_duplicate=True),
+    Output("playback-data", "data"),
+    Output("playback-time", "data", allow_duplicate=True),
+    Input("play-button", "n_clicks"),
+    State("playback-interval", "disabled"),
+    State("state-number", "value"),
+    State("playback-data", "data"),
+    prevent_initial_call=True,
+)
+def toggle_playback(n_clicks: int, paused: bool, i_state: int, playback_data: dict | None):
+    if not paused:
+        return True, no_update, no_update
+    # the playback data is sent once, the frames are then drawn in the browser
+    return False, get_playback_data() if playback_data is None else no_update, \
+        finished_times[clip_state_index(i_state)]
+
+
+@app.callback(
+    Output("play-button", "children"),
+    Output("state-number", "value", allow_duplicate=True),
+    Input("playback-interval", "disabled"),
+    State("playback-time", "data"),
+    prevent_initial_call=True,
+)
+def on_playback_toggled(paused: bool, sim_time: float | None):
+    if not paused:
+        return "Pause", no_update
+    # the figures already show the state reached, so updating the state index does not change them
+    return "Play", no_update if sim_time is None else state_at_time(sim_time)
+
+
+# one frame of the playback, the layout items changed since the displayed state are applied in the browser
+app.clientside_callback(
+    """
+    function(n_intervals, playback, layoutFigure, ganttFigure, iRendered, playTime, speed, interval) {
+        const times = playback.times;
+        const tEnd = times[times.length - 1];
+        const t = Math.min(playTime + (speed || 1) * interval / 1000, tEnd);
+        // binary search of the last state reached by t
+        let lo = 0, hi = times.length;
+        while (lo < hi) {
+            const mid = (lo + hi) >> 1;
+            if (times[mid] <= t) { lo = mid + 1; } else { hi = mid; }
+        }
+        const iState = Math.max(lo - 1, iRendered);
+
+        let layout = layoutFigure;
+        if (iState > iRendered) {
+            const data = layoutFigure.data.slice();
+            const shapes = layoutFigure.layout.shapes.slice();
+            const annotations = layoutFigure.layout.annotations.slice();
+            for (let s = iRendered + 1; s <= iState; s++) {
+                for (const [i, fillcolor, bordercolor, text] of playback.diffs[s]) {
+                    shapes[i] = {...shapes[i], fillcolor: fillcolor};
+                    annotations[i] = {...annotations[i], bordercolor: bordercolor};
+                    data[i] = {...data[i], text: text};
+                }
+            }
+            layout = {...layoutFigure, data: data, layout: {...layoutFigure.layout, shapes: shapes, annotations: annotations}};
+        }
+        const ganttShapes = ganttFigure.layout.shapes.slice();
+        const cursor = playback.gantt_cursor;
+        ganttShapes[cursor] = {...ganttShapes[cursor], x0: t, x1: t};
+        const gantt = {...ganttFigure, layout: {...ganttFigure.layout, shapes: ganttShapes}};
+        return [layout, gantt, iState, t, "Simulation time: " + t, t >= tEnd];
+    }
+    """,
+    Output("layout-figure", "figure", allow_duplicate=True),
+    Output("gantt-figure", "figure", allow_duplicate=True),
+    Output("layout-state-index", "data", allow_duplicate=True),
+    Output("playback-time", "data", allow_duplicate=True),
+    Output("sim-time", "children", allow_duplicate=True),
+    Output("playback-interval", "disabled", allow_duplicate=True),
+    Input("playback-interval", "n_intervals"),
+    State("playback-data", "data"),
+    State("layout-figure", "figure"),
+    State("gantt-figure", "figure"),
+    State("layout-state-index", "data"),
+    State("playback-time", "data"),
+    State("playback-speed", "value"),
+    State("playback-interval", "interval"),
+    prevent_initial_call=True,
+)
+
+
+@app.callback(
+    Output("state-number", "max"),
+    Output("sim-slider", "max"),
+    Output("gantt-figure", "figure", allow_duplicate=True),
+    Output("playback-data", "data", allow_duplicate=True),
+    Output("state-number", "value", allow_duplicate=True),
+    Output("live-n-states", "data"),
+    Input("live-interval", "n_intervals"),
+    State("live-n-states", "data"),
+    State("state-number", "value"),
+    State("playback-interval", "disabled"),
+    prevent_initial_call=True,
+)
+def update_live_states(n_intervals: int, n_shown: int, i_state: int | None, paused: bool):
+    global gantt_figure, gantt_cursor
+    n_states = len(finished_times)
+    if n_states == n_shown:
+        raise PreventUpdate
+    # the gantt chart and the playback data are redrawn with the new states, the page follows the last state if
+    # it was showing it
+    i_state = n_states - 1 if i_state == n_shown - 1 else min(max(i_state or 0, 0), n_states - 1)
+    figure = get_gantt_fig(sim_logs.entries[:n_states])
+    gantt_cursor = add_gantt_cursor(figure, finished_times[i_state])
+    gantt_figure = figure
+    get_playback_data.cache_clear()
+    # a paused playback gets the new playback data when it is resumed
+    playback_data = None if paused else get_playback_data()
+    return (
+        n_states - 1, finished_times[-1], figure, playback_data,
+        i_state if i_state == n_states - 1 else no_update, n_states,
+    )
 
 
 if __name__ == '__main__':
@@ -174,16 +174,17 @@ TecanInstruction.path_graph(
 # INS_LST12 = heat_plate(PLATE_3, HEATER_1)
 # INS_LST12[0].preceding_instructions.append(INS_LST9[-3].identifier)
 
-diagram = TECAN_LAB.instruction_graph
+if __name__ == '__main__':
+    diagram = TECAN_LAB.instruction_graph
 
-diagram.layout(algo="rt_circular")
-diagram.dump_file(filename="sim_tecan_instruction.drawio", folder="./")
+    diagram.layout(algo="rt_circular")
+    diagram.dump_file(filename="sim_tecan_instruction.drawio", folder="./")
 
-from casymda_hardware.model import *
-import simpy
+    from casymda_hardware.model import *
+    import simpy
 
-env = simpy.Environment()
+    env = simpy.Environment()
 
-model = Model(env, TECAN_LAB, wdir=os.path.abspath("./"), model_name=f"tecan_dummy")
+    model = Model(env, TECAN_LAB, wdir=os.path.abspath("./"), model_name=f"tecan_dummy")
 
-env.run()
+    env.run()
@@ -1,12 +1,18 @@
-import pickle
+import os
 import pprint
 import math
+import threading
+from functools import partial
 
 import dash_bootstrap_components as dbc
 import dash_renderjson
 import plotly.graph_objects as go
-from dash import Dash, dcc, html, Input, Output
+from dash import Dash, dcc, html, Input, Output, State, no_update
+from dash.exceptions import PreventUpdate
 import plotly.figure_factory as ff
+from casymda_hardware.events import subscribe
+from casymda_hardware.render_cache import RenderCache
+from casymda_hardware.state_log import open_state_log
 from hardware_pydantic.tecan import *
 import plotly.express as px
 import pandas as pd
@@ -147,8 +153,62 @@ JsonTheme = {
     "base0F": "#cc6633",
 }
 
-with open("sim_tecan_dummy.pkl", "rb") as f:
-    sim_logs = pickle.load(f)
+MODEL_NAME = "tecan_dummy"
+
+LIVE_ADDRESS = None
+""" to follow a running simulation, the address its `SocketPublisher` listens at, e.g.
+`casymda_hardware.events.LIVE_ADDRESS`, the run must use the "indexed" log mode """
+
+# the state log of the "indexed" log mode when following a live run
+LOG_PATH = f"sim_{MODEL_NAME}.pkl" if LIVE_ADDRESS is None else f"sim_{MODEL_NAME}.states"
+
+LIVE_INTERVAL = 1000
+""" how often the page checks for the states of a live run, in milliseconds """
+
+PRERENDER_RADIUS = 3
+""" the layout figures of this many states before and after the displayed one are rendered in the background """
+
+LIVE_TIMEOUT = 10.0
+""" how long to wait at startup for the live run and its first state, in seconds, before showing the state log as
+it is, e.g. if the run is over """
+
+live = False
+if LIVE_ADDRESS is not None:
+    # the state log is written by the run, wait for its first state
+    live_events = subscribe(LIVE_ADDRESS, timeout=LIVE_TIMEOUT)
+    live = next(live_events, None) is not None
+    if not live:
+        print(f"no live run at {LIVE_ADDRESS}, showing {LOG_PATH} as it is")
+if not os.path.exists(LOG_PATH):
+    raise FileNotFoundError(LOG_PATH)
+
+# only the entries are loaded here, the labs are read when displayed, see `StateLogReader`
+sim_logs = open_state_log(LOG_PATH)
+
+# serialized layout figures and tracker data keyed by (log file, state index, tracker id), the layout figures
+# have no tracker id
+render_cache = RenderCache(maxsize=256, max_workers=1)
+
+
+def render_layout_figure(i_state: int) -> dict:
+    return get_layout_figure(sim_logs.lab_at(i_state)).to_dict()
+
+
+def render_tracker_data(i_state: int, tracker_id: str) -> dict:
+    return sim_logs.lab_at(i_state)[tracker_id].model_dump()
+
+
+def follow_live_run():
+    """ index the states of a live run as their events arrive, the page picks them up with `LIVE_INTERVAL` """
+    for _ in live_events:
+        sim_logs.refresh()
+    # the last states may be flushed after their events
+    sim_logs.refresh()
+
+
+if live:
+    threading.Thread(target=follow_live_run, daemon=True).start()
+
 
 app = Dash(__name__, external_stylesheets=[dbc.themes.BOOTSTRAP], title="TECAN SIMULATOR")
 
@@ -259,6 +319,9 @@ state_controller = html.Div(
         html.H5(style={'margin-right': 20}, id="sim-time"),
         # dcc.Slider(0, sim_logs[-1]['finished'], value=0, marks={j['finished']: {'label': ""} for j in sim_logs[1:]}, id='sim-slider'),
         # TODO add this
+        # the number of states the page knows of, only changes when following a live run
+        dcc.Interval(id="live-interval", interval=LIVE_INTERVAL, disabled=not live),
+        dcc.Store(id="live-n-states", data=len(sim_logs)),
     ], className="mt-3 mx-3"
 )
 
@@ -284,15 +347,19 @@ app.layout = html.Div(
 def update_layout_figure(i_state: int, tracker_1_id):
     if i_state > len(sim_logs) - 1:
         i_state = len(sim_logs) - 1
-    loaded_state = sim_logs[i_state]
-    current_time = loaded_state['finished']
-    current_lab = loaded_state['lab']
-    fig_layout = get_layout_figure(current_lab)
-    tracker_1_obj = current_lab[tracker_1_id]
+    current_time = sim_logs.entries[i_state]['finished']
+    fig_layout = render_cache.get((LOG_PATH, i_state, None), partial(render_layout_figure, i_state))
+    tracker_1_data = render_cache.get(
+        (LOG_PATH, i_state, tracker_1_id), partial(render_tracker_data, i_state, tracker_1_id)
+    )
+    render_cache.prerender(
+        ((LOG_PATH, j, None), partial(render_layout_figure, j))
+        for j in range(max(i_state - PRERENDER_RADIUS, 0), min(i_state + PRERENDER_RADIUS + 1, len(sim_logs)))
+    )
 
     log_items = []
 
-    for state in sim_logs[:i_state + 1]:
+    for state in sim_logs.entries[:i_state + 1]:
         ins = state['instruction']
         if ins is None:
             ins_id = None
@@ -315,8 +382,25 @@ def update_layout_figure(i_state: int, tracker_1_id):
         log_items.append(
             dbc.ListGroupItem(item_content)
         )
-    fig_gantt = get_gantt_fig(sim_logs[:i_state+1])
-    return fig_layout, "Simulation time: {}".format(current_time), tracker_1_obj.model_dump(), log_items, fig_gantt
+    fig_gantt = get_gantt_fig(sim_logs.entries[:i_state + 1])
+    return fig_layout, "Simulation time: {}".format(current_time), tracker_1_data, log_items, fig_gantt
+
+
+@app.callback(
+    Output("state-number", "max"),
+    Output("state-number", "value"),
+    Output("live-n-states", "data"),
+    Input("live-interval", "n_intervals"),
+    State("live-n-states", "data"),
+    State("state-number", "value"),
+    prevent_initial_call=True,
+)
+def update_live_states(n_intervals: int, n_shown: int, i_state: int | None):
+    n_states = len(sim_logs)
+    if n_states == n_shown:
+        raise PreventUpdate
+    # the page follows the last state if it was showing it
+    return n_states - 1, n_states - 1 if i_state == n_shown - 1 else no_update, n_states
 
 
 if __name__ == '__main__':